@@ -0,0 +1,81 @@
+#-------------------------------------------------------------------------------
+# Name:         encodings
+# Purpose:      Compares the integer and bit-vector encodings on the test corpus
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/encodings.py [repeats]
+
+    Explores every source code of tests/test_source_codes.py with each
+    encoding and prints the time taken, and how many paths are feasible
+    in the encoding but not with integers or the other way around.
+"""
+
+import time
+import sys
+import os
+
+PACKAGE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PACKAGE_DIRECTORY)
+sys.path.insert(0, os.path.join(PACKAGE_DIRECTORY, "tests"))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.solvers import Z3Backend, BitVectorBackend
+from test_source_codes import source_codes
+
+ENCODINGS = [("integer", lambda: Z3Backend()),
+             ("bit-vector 32 wrap", lambda: BitVectorBackend(width=32, overflow="wrap")),
+             ("bit-vector 32 forbid", lambda: BitVectorBackend(width=32, overflow="forbid")),
+             ("bit-vector 64 forbid", lambda: BitVectorBackend(width=64, overflow="forbid"))]
+
+
+def explore(source_code, solver_backend):
+    """
+        returns (seconds, feasibility of every path)
+    """
+    start_time          = time.time()
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False,
+                                                    solver_backend=solver_backend)
+    source_code_digraph.build_code_digraph()
+    return time.time() - start_time, [test_case is not False for test_case in source_code_digraph.test_cases]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    integer_feasibility = None
+
+    for name, make_backend in ENCODINGS:
+        total_time      = 0.0
+        slowest         = (0.0, None)
+        feasibility     = []
+        for index, source_code in enumerate(source_codes):
+            times = []
+            for repeat in range(repeats):
+                seconds, source_feasibility = explore(source_code, make_backend())
+                times.append(seconds)
+            total_time += min(times)
+            slowest     = max(slowest, (min(times), index))
+            feasibility.append(source_feasibility)
+
+        if integer_feasibility is None:
+            integer_feasibility = feasibility
+
+        only_here, only_integer = 0, 0
+        for paths, integer_paths in zip(feasibility, integer_feasibility):
+            only_here       += sum(1 for path, integer_path in zip(paths, integer_paths) if path and not integer_path)
+            only_integer    += sum(1 for path, integer_path in zip(paths, integer_paths) if integer_path and not path)
+
+        print "{0:>22}: {1:7.1f} ms, slowest source_code{2} {3:6.1f} ms, " \
+              "{4} paths feasible only here, {5} only with integers".format(
+                  name, total_time*1000, slowest[1], slowest[0]*1000, only_here, only_integer)
+
+
+if __name__ == "__main__":
+    main()
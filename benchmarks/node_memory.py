@@ -0,0 +1,98 @@
+#-------------------------------------------------------------------------------
+# Name:         node_memory
+# Purpose:      Measures the memory used per node of an execution tree
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/node_memory.py [node count]
+
+    Builds a tree of node count nodes (one million by default) once for every
+    node layout, each in a fresh process, and prints the memory each node adds.
+"""
+
+import subprocess
+import resource
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+LAYOUTS = ["dictionary", "slots", "slots without states"]
+
+
+class DictionaryNode:
+    """
+        the node layout before slots, for comparison
+    """
+    def __init__(self, type, statement, state, children, node_id):
+        self.type           = type
+        self.statement      = statement
+        self.state          = state
+        self.children       = children
+        self.node_id        = node_id
+        self.child_of_error = False
+        self.test_case_index = None
+
+
+def get_maximum_resident_kilobytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def build_tree(node_class, node_count, keep_states):
+    """
+        every node gets its own label and a state of its own, like the nodes
+        made by SourceCodeDigraph.expand_node. Each node is the child of the
+        node before it but one, so the tree is both deep and branching
+    """
+    nodes = []
+    for node_id in range(node_count):
+        if keep_states:
+            state = {'constraints': [], 'variables': {}, 'type': None}
+        else:
+            state = None
+
+        node = node_class("Assign", "<Node {0}:<br/>x = 1>".format(node_id), state, [], node_id // 2)
+        if node_id > 0:
+            nodes[node_id // 2].children.append(node)
+        nodes.append(node)
+    return nodes
+
+
+def measure_layout(layout, node_count):
+    """
+        returns the bytes added per node
+    """
+    if layout == "dictionary":
+        node_class = DictionaryNode
+    else:
+        import halfwaytree.digraph as digraph
+        node_class = digraph.Node
+
+    kilobytes_before    = get_maximum_resident_kilobytes()
+    nodes               = build_tree(node_class, node_count, layout != "slots without states")
+    kilobytes_after     = get_maximum_resident_kilobytes()
+    return (kilobytes_after - kilobytes_before)*1024.0/len(nodes)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--layout":
+        print measure_layout(sys.argv[2], int(sys.argv[3]))
+        return
+
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print "{0} nodes".format(node_count)
+    for layout in LAYOUTS:
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+                                          "--layout", layout, str(node_count)])
+        print "{0:>22}: {1:8.1f} bytes per node".format(layout, float(output))
+
+
+if __name__ == "__main__":
+    main()
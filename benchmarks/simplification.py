@@ -0,0 +1,81 @@
+#-------------------------------------------------------------------------------
+# Name:         simplification
+# Purpose:      Measures what constraint simplification saves on deep paths
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/simplification.py [depth ...]
+
+    Explores nested if-statements whose conditions keep tightening the bounds of
+    the same variables, with and without a ConstraintSimplifier, and prints the
+    size of the constraints sent to the solver and the time spent solving them.
+"""
+
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.simplifier import ConstraintSimplifier, get_constraints_size
+from halfwaytree.solvers import Z3Backend
+
+
+class MeasuredBackend(Z3Backend):
+    def __init__(self):
+        Z3Backend.__init__(self)
+        self.constraints_size   = 0
+        self.solving_time       = 0.0
+
+    def check(self, constraints):
+        self.constraints_size += get_constraints_size(constraints)
+        start_time = time.time()
+        result = Z3Backend.check(self, constraints)
+        self.solving_time += time.time() - start_time
+        return result
+
+
+def make_deep_source_code(depth):
+    lines = ["x = 0", "y = 0", "z = 0"]
+    for level in range(depth):
+        indent = "    "*level
+        lines.append("{0}if x + 0*y > {1} and y - z + z < {2}:".format(indent, level, 1000 - level))
+    lines.append("    "*depth + "print x")
+    lines.append("print y")
+    return "\n".join(lines) + "\n"
+
+
+def explore(source_code, constraint_simplifier):
+    solver_backend      = MeasuredBackend()
+    start_time          = time.time()
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False,
+                                                    solver_backend=solver_backend,
+                                                    constraint_simplifier=constraint_simplifier)
+    source_code_digraph.build_code_digraph()
+    return solver_backend, time.time() - start_time
+
+
+def main():
+    depths = [int(depth) for depth in sys.argv[1:]] or [10, 20, 40]
+    for depth in depths:
+        source_code = make_deep_source_code(depth)
+        raw, raw_time                   = explore(source_code, None)
+        simplified, simplified_time     = explore(source_code, ConstraintSimplifier())
+
+        print "depth {0:3}: constraint size {1:6} -> {2:6}, solving {3:7.1f} ms -> {4:7.1f} ms, " \
+              "exploring {5:7.1f} ms -> {6:7.1f} ms".format(
+                  depth, raw.constraints_size, simplified.constraints_size,
+                  raw.solving_time*1000, simplified.solving_time*1000,
+                  raw_time*1000, simplified_time*1000)
+
+
+if __name__ == "__main__":
+    main()
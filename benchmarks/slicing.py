@@ -0,0 +1,70 @@
+#-------------------------------------------------------------------------------
+# Name:         slicing
+# Purpose:      Measures what slicing on asserts saves on wide source codes
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/slicing.py [width ...]
+
+    Explores a source code with width if-statements which have nothing to do with
+    its one assert, with and without slice_on_asserts, and prints the number of
+    nodes and test cases, whether the assert was reached, and the time taken.
+"""
+
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import halfwaytree.digraph as digraph
+
+
+def make_wide_source_code(width):
+    lines = ["x = 0", "y = 0"]
+    for index in range(width):
+        lines += ["w{0} = 0".format(index),
+                  "if w{0} > {0}:".format(index),
+                  "    z{0} = w{0} + 1".format(index),
+                  "    print z{0}".format(index)]
+    lines += ["t = x + 3",
+              "if t == 10:",
+              "    if y < x:",
+              "        assert False",
+              "print"]
+    return "\n".join(lines) + "\n"
+
+
+def explore(source_code, slice_on_asserts):
+    start_time          = time.time()
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False,
+                                                    keep_node_states=False, slice_on_asserts=slice_on_asserts)
+    source_code_digraph.build_code_digraph()
+
+    assert_reached = any(isinstance(test_case, dict) and test_case.get('x') == '7' and int(test_case['y']) < 7
+                         for test_case in source_code_digraph.test_cases)
+    return source_code_digraph, assert_reached, time.time() - start_time
+
+
+def main():
+    widths = [int(width) for width in sys.argv[1:]] or [2, 4, 6, 8]
+    for width in widths:
+        source_code = make_wide_source_code(width)
+        full, full_reached, full_time       = explore(source_code, False)
+        sliced, sliced_reached, sliced_time = explore(source_code, True)
+
+        print "width {0:3}: nodes {1:6} -> {2:4}, test cases {3:5} -> {4:3}, assert reached {5} -> {6}, " \
+              "exploring {7:8.1f} ms -> {8:6.1f} ms".format(
+                  width, full.node_count, sliced.node_count, len(full.test_cases), len(sliced.test_cases),
+                  full_reached, sliced_reached, full_time*1000, sliced_time*1000)
+
+
+if __name__ == "__main__":
+    main()
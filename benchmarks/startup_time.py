@@ -0,0 +1,65 @@
+#-------------------------------------------------------------------------------
+# Name:         startup_time
+# Purpose:      Measures how long a fresh interpreter takes to start analyzing
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/startup_time.py [repeats]
+
+    Times, in fresh interpreters, importing halfwaytree.digraph and a
+    trivial headless analysis, and lists the heavy modules each one loaded.
+"""
+
+import subprocess
+import sys
+import os
+
+PACKAGE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+IMPORT_ONLY = """
+import halfwaytree.digraph as digraph
+"""
+
+TRIVIAL_ANALYSIS = """
+import halfwaytree.digraph as digraph
+source_code_digraph = digraph.SourceCodeDigraph("x = 0\\nif x > 2:\\n    x = 1\\nprint x\\n", create_visual=False)
+source_code_digraph.build_code_digraph()
+"""
+
+MEASURE = """
+import time
+start_time = time.time()
+{0}
+elapsed_time = time.time() - start_time
+import sys
+print elapsed_time, ",".join(name for name in ["z3", "pygraphviz", "numpy"] if name in sys.modules)
+"""
+
+CASES = [("import halfwaytree.digraph", IMPORT_ONLY),
+         ("trivial headless analysis", TRIVIAL_ANALYSIS)]
+
+
+def measure(code):
+    output = subprocess.check_output([sys.executable, "-c", MEASURE.format(code)], cwd=PACKAGE_DIRECTORY)
+    elapsed_time, loaded_modules = (output.strip().split(" ") + [""])[:2]
+    return float(elapsed_time), loaded_modules
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, code in CASES:
+        results = [measure(code) for repeat in range(repeats)]
+        times   = sorted(elapsed_time for elapsed_time, loaded_modules in results)
+        print "{0:>28}: best {1:6.1f} ms, median {2:6.1f} ms, loaded: {3}".format(
+            name, times[0]*1000, times[len(times)//2]*1000, results[0][1] or "none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#-------------------------------------------------------------------------------
+# Name:         tracing
+# Purpose:      Measures the cost of span tracing and writes a trace of an exploration
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/tracing.py [width] [output directory]
+
+    Explores the same source code without a tracer and with one, prints the
+    time taken by each, and writes the trace as exploration.json, to open in
+    chrome://tracing or ui.perfetto.dev, and exploration.folded, to give to
+    flamegraph.pl
+"""
+
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.tracing import Tracer
+
+
+def make_source_code(width):
+    lines = ["y = 0"]
+    for index in range(width):
+        lines += ["x{0} = 0".format(index),
+                  "if x{0} > y + {0}:".format(index),
+                  "    y = y + x{0}".format(index)]
+    lines.append("print")
+    return "\n".join(lines) + "\n"
+
+
+def explore(source_code, tracer):
+    start_time          = time.time()
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False,
+                                                    keep_node_states=False, tracer=tracer)
+    source_code_digraph.build_code_digraph()
+    return source_code_digraph, time.time() - start_time
+
+
+def main():
+    width               = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    output_directory    = sys.argv[2] if len(sys.argv) > 2 else "."
+    source_code         = make_source_code(width)
+
+    #the first exploration imports z3, it is left out of the comparison
+    explore(source_code, None)
+    untraced, untraced_time = explore(source_code, None)
+    tracer                  = Tracer()
+    traced, traced_time     = explore(source_code, tracer)
+
+    print "width {0}: {1} nodes, exploring {2:.1f} ms without a tracer, {3:.1f} ms with one".format(
+        width, untraced.node_count, untraced_time*1000, traced_time*1000)
+    print tracer.report()
+
+    tracer.write_chrome_trace(os.path.join(output_directory, "exploration.json"))
+    tracer.write_collapsed_stacks(os.path.join(output_directory, "exploration.folded"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#-------------------------------------------------------------------------------
+# Name:         unsat_cores
+# Purpose:      Measures the solver calls unsat core learning saves
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python benchmarks/unsat_cores.py [width ...]
+
+    Explores a source code whose branches are correlated, many of its paths are
+    unsatisfiable for the same two conditions, with and without an
+    UnsatCoreLearner, and prints the number of solver calls and the time taken.
+"""
+
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.conflicts import UnsatCoreLearner
+from halfwaytree.solvers import Z3Backend
+
+
+class CountingBackend(Z3Backend):
+    def __init__(self):
+        Z3Backend.__init__(self)
+        self.checks = 0
+
+    def check(self, constraints):
+        self.checks += 1
+        return Z3Backend.check(self, constraints)
+
+
+def make_correlated_source_code(width):
+    lines = ["x = 0", "y = 0"]
+    for index in range(width):
+        lines += ["if x > {0}:".format(10 + index),
+                  "    if x < {0}:".format(5 - index),
+                  "        print x",
+                  "a{0} = 0".format(index),
+                  "if a{0} > y:".format(index),
+                  "    print y"]
+    lines.append("print")
+    return "\n".join(lines) + "\n"
+
+
+def explore(source_code, unsat_core_learner):
+    solver_backend      = CountingBackend()
+    start_time          = time.time()
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False,
+                                                    keep_node_states=False, solver_backend=solver_backend,
+                                                    unsat_core_learner=unsat_core_learner)
+    source_code_digraph.build_code_digraph()
+    return source_code_digraph, solver_backend.checks, time.time() - start_time
+
+
+def main():
+    widths = [int(width) for width in sys.argv[1:]] or [1, 2, 3]
+    for width in widths:
+        source_code         = make_correlated_source_code(width)
+        unsat_core_learner  = UnsatCoreLearner()
+        plain, plain_checks, plain_time         = explore(source_code, None)
+        learned, learned_checks, learned_time   = explore(source_code, unsat_core_learner)
+
+        print "width {0:2}: {1:5} nodes, solver calls {2:5} -> {3:5}, exploring {4:7.1f} ms -> {5:7.1f} ms, " \
+              "same test cases {6}".format(
+                  width, plain.node_count, plain_checks, learned_checks, plain_time*1000, learned_time*1000,
+                  [test_case is False for test_case in plain.test_cases] ==
+                  [test_case is False for test_case in learned.test_cases])
+        print "          " + unsat_core_learner.report()
+
+
+if __name__ == "__main__":
+    main()
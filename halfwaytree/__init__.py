@@ -1,2 +1,3 @@
 import astor
 import digraph
+import concolic
@@ -9,7 +9,11 @@ Copyright 2013 (c) Berker Peksag
 
 """
 
+from collections import OrderedDict
+import threading
 import ast
+import sys
+import os
 
 
 class NonExistent(object):
@@ -164,34 +168,144 @@ def parsefile(fname):
     return ast.parse(fstr, filename=fname)
 
 
+def estimate_size(obj, getsizeof=sys.getsizeof):
+    """Estimates the memory held by an object, in bytes:
+
+       - AST nodes, instances, lists, tuples and dicts are followed
+       - every object is counted once
+
+    """
+    size = 0
+    seen = set()
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += getsizeof(obj)
+        if isinstance(obj, (list, tuple)):
+            pending.extend(obj)
+        elif isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(getattr(obj, '__dict__', None), dict):
+            # AST nodes and instances, such as cached artifacts
+            size += getsizeof(obj.__dict__)
+            pending.extend(obj.__dict__.values())
+    return size
+
+
 class CodeToAst(object):
     """Given a module, or a function that was compiled as part
     of a module, re-compile the module into an AST and extract
     the sub-AST for the function.  Allow caching to reduce
     number of compiles.
 
+    Modules are cached by file name, least recently used first
+    out once their estimated size goes over max_bytes.  A file
+    whose modification time or size changed since it was parsed
+    is parsed again.  Artifacts built from a module AST, such as
+    preprocessed trees, are cached and invalidated along with it.
+    The size of an artifact is estimated once, when it is built.
+
+    A cache given as a plain dict is copied into an OrderedDict,
+    which keeps the order of use.  The cache may be shared by
+    threads, a lock is held while it is read or changed.
+
     """
-    def __init__(self, cache=None):
-        self.cache = cache or {}
+    def __init__(self, cache=None, max_bytes=None):
+        if cache is None:
+            cache = OrderedDict()
+        elif not isinstance(cache, OrderedDict):
+            cache = OrderedDict(cache)
+        self.cache = cache
+        self.lock = threading.RLock()
+        self.max_bytes = max_bytes
+        self.total_bytes = sum(entry['bytes'] for entry in cache.values())
+        self.statistics = dict(hits=0, misses=0, invalidations=0,
+                               evictions=0)
 
     def __call__(self, codeobj):
-        cache = self.cache
+        with self.lock:
+            return self.get_ast(codeobj)
+
+    def get_ast(self, codeobj):
         fname = getattr(codeobj, '__file__', None)
         if fname is None:
             func_code = codeobj.__code__
-            fname = func_code.co_filename
-            linenum = func_code.co_firstlineno
-            key = fname, linenum
-        else:
-            fname = key = fname.replace('.pyc', '.py')
-        result = cache.get(key)
-        if result is not None:
-            return result
-        cache[fname] = mod_ast = parsefile(fname)
+            entry = self.get_entry(func_code.co_filename)
+            return entry['functions'][func_code.co_firstlineno]
+        return self.get_entry(fname.replace('.pyc', '.py'))['module']
+
+    def get_module(self, fname):
+        """Returns the AST of the module in file fname."""
+        with self.lock:
+            return self.get_entry(fname)['module']
+
+    def get_artifact(self, fname, name, build):
+        """Returns build(module AST) for the module in file fname,
+        which is only called again once the file changes.
+
+        """
+        with self.lock:
+            entry = self.get_entry(fname)
+            artifacts = entry['artifacts']
+            if name not in artifacts:
+                artifacts[name] = build(entry['module'])
+                size = estimate_size(artifacts[name])
+                entry['bytes'] += size
+                self.total_bytes += size
+                self.evict()
+            return artifacts[name]
+
+    def get_entry(self, fname):
+        cache = self.cache
+        stat = os.stat(fname)
+        signature = stat.st_mtime, stat.st_size
+        entry = cache.get(fname)
+        if entry is not None:
+            if entry['signature'] == signature:
+                self.statistics['hits'] += 1
+                # Move the entry to the most recently used end
+                del cache[fname]
+                cache[fname] = entry
+                return entry
+            self.statistics['invalidations'] += 1
+            self.remove(fname)
+
+        self.statistics['misses'] += 1
+        mod_ast = parsefile(fname)
+        functions = {}
         for obj in mod_ast.body:
-            if not isinstance(obj, ast.FunctionDef):
-                continue
-            cache[(fname, obj.lineno)] = obj
-        return cache[key]
-
-codetoast = CodeToAst()
+            if isinstance(obj, ast.FunctionDef):
+                functions[obj.lineno] = obj
+        entry = dict(signature=signature, module=mod_ast,
+                     functions=functions, artifacts={},
+                     bytes=estimate_size(mod_ast))
+        cache[fname] = entry
+        self.total_bytes += entry['bytes']
+        self.evict()
+        return entry
+
+    def remove(self, fname):
+        entry = self.cache.pop(fname)
+        self.total_bytes -= entry['bytes']
+
+    def evict(self):
+        """Drops least recently used modules until the cache fits
+        in max_bytes, the most recently used one is always kept.
+
+        """
+        if self.max_bytes is None:
+            return
+        while self.total_bytes > self.max_bytes and len(self.cache) > 1:
+            self.remove(next(iter(self.cache)))
+            self.statistics['evictions'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.total_bytes = 0
+
+codetoast = CodeToAst(max_bytes=64 * 1024 * 1024)
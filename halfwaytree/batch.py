@@ -0,0 +1,386 @@
+#-------------------------------------------------------------------------------
+# Name:         batch
+# Purpose:      Symbolic execution of many source codes in a process pool
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python -m halfwaytree.batch [options] path [path ...]
+
+    Analyzes every .py file given, or found in the directories given, and
+    writes one JSON line per result. With --functions every top-level function
+    of the modules is analyzed on its own. See python -m halfwaytree.batch --help
+"""
+
+import multiprocessing
+import traceback
+import argparse
+import Queue
+import json
+import time
+import imp
+import sys
+import ast
+import os
+
+#workers are forked from this process, importing z3 here spares each of them importing it
+import z3
+
+import halfwaytree.digraph as digraph
+import halfwaytree.astor as astor
+
+
+def get_file_paths(paths):
+    """
+        param paths: list of file and directory paths, directories are searched for .py files
+        returns the list of file paths
+    """
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directory_names, file_names in os.walk(path):
+                directory_names.sort()
+                file_paths += [os.path.join(directory, file_name) for file_name in sorted(file_names)
+                               if file_name.endswith(".py")]
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def get_sources_from_paths(paths):
+    """
+        param paths: list of file and directory paths, directories are searched for .py files
+        returns a list of (name, source code, symbolic inputs, file path), named after the file,
+        every variable first assigned an integer is a symbolic input
+    """
+    sources = []
+    for file_path in get_file_paths(paths):
+        with open(file_path) as source_file:
+            sources.append((file_path, source_file.read(), None, file_path))
+    return sources
+
+
+def get_called_function_names(function_definition):
+    return set(node.func.id for node in ast.walk(function_definition)
+               if isinstance(node, ast.Call) and isinstance(node.func, ast.Name))
+
+
+def get_parameter_names(function_definition):
+    return [argument.id for argument in function_definition.args.args]
+
+
+def make_function_source(function_definition, module_functions=()):
+    """
+        returns the source code which explores the body of a function with symbolic parameters:
+        the functions of the module it calls are defined first, then every parameter is
+        assigned an integer, which makes it a symbolic input, then the body runs.
+        A return jumps to the end of the source code like an error does
+        param function_definition: ast.FunctionDef
+        param module_functions: list of the ast.FunctionDef of the module, in the order they are defined
+    """
+    functions_by_name   = dict((function.name, function) for function in module_functions)
+    called_names        = set()
+    pending_names       = list(get_called_function_names(function_definition))
+    while pending_names:
+        name = pending_names.pop()
+        if name in called_names or name not in functions_by_name or name == function_definition.name:
+            continue
+        called_names.add(name)
+        pending_names += get_called_function_names(functions_by_name[name])
+
+    statements  = [function for function in module_functions if function.name in called_names]
+    lines       = [astor.to_source(function) for function in statements]
+    lines      += ["{0} = 0".format(name) for name in get_parameter_names(function_definition)]
+    lines      += [astor.to_source(statement) for statement in function_definition.body]
+
+    #the print statement marks where every path ends, returns jump there
+    lines.append("print")
+    return "\n".join(lines) + "\n"
+
+
+def get_function_sources_from_module(file_path):
+    """
+        returns a list of (name, source code, symbolic inputs, file path) with one source code per
+        top-level function of the module, named module path:function name. Its parameters are the only
+        symbolic inputs, the integers its body assigns are concrete. See make_function_source
+    """
+    def make_function_sources(module_ast):
+        module_functions = [statement for statement in module_ast.body if isinstance(statement, ast.FunctionDef)]
+        return [("{0}:{1}".format(file_path, function.name), make_function_source(function, module_functions),
+                 get_parameter_names(function), file_path)
+                for function in module_functions]
+
+    #a module which did not change since it was last read is neither parsed nor split again
+    return astor.codetoast.get_artifact(file_path, 'function_sources', make_function_sources)
+
+
+def get_function_sources_from_paths(paths):
+    """
+        param paths: list of file and directory paths, directories are searched for .py files
+        returns a list of (name, source code, symbolic inputs, file path) with one source code per
+        top-level function
+    """
+    sources = []
+    for file_path in get_file_paths(paths):
+        sources += get_function_sources_from_module(file_path)
+    return sources
+
+
+def get_source_from_function(function):
+    """
+        param function: a python function defined at the top level of a module
+        returns (name, source code, symbolic inputs, file path) of the function,
+        see get_function_sources_from_module
+    """
+    file_path           = function.__code__.co_filename
+    function_definition = astor.codetoast(function)
+    module_ast          = astor.codetoast.get_module(file_path)
+    module_functions    = [statement for statement in module_ast.body if isinstance(statement, ast.FunctionDef)]
+    return ("{0}:{1}".format(file_path, function.__name__),
+            make_function_source(function_definition, module_functions), get_parameter_names(function_definition),
+            file_path)
+
+
+def get_sources_from_list(source_codes, name_prefix="source_code"):
+    """
+        param source_codes: list of source code strings, like the source_codes of tests/test_source_codes.py
+        returns a list of (name, source code) named after the position of each source code
+    """
+    return [("{0}{1}".format(name_prefix, index), source_code)
+            for index, source_code in enumerate(source_codes)]
+
+
+def load_source_list(file_path, variable_name="source_codes"):
+    """
+        returns the named list of source code strings defined in a python file
+    """
+    module = imp.load_source("halfwaytree_source_list", file_path)
+    return get_sources_from_list(getattr(module, variable_name))
+
+
+def get_front_end_artifact(file_path, source_code, create_visual):
+    """
+        returns the digraph.FrontEndArtifact of a source code made from the module in file_path.
+        It is cached with the module in astor.codetoast, so a worker given the source code
+        again skips the front end, and compiles no statement twice, until the file changes
+    """
+    def make_front_end_artifact(module_ast):
+        return digraph.SourceCodeDigraph(source_code=source_code, create_visual=create_visual).front_end_artifact
+
+    return astor.codetoast.get_artifact(file_path, ('front_end_artifact', source_code, create_visual),
+                                        make_front_end_artifact)
+
+
+def analyze_source_code(job):
+    """
+        runs in a worker process of the analysis pool
+        param job: dictionary with the name, source_code, symbolic_inputs and file_path of the job,
+                   its budgets and whether the visual digraph is needed for rendering
+        returns a dictionary which can be written as JSON
+    """
+    start_time  = time.time()
+    result      = {'record': 'analysis', 'name': job['name']}
+    source_code_digraph = None
+    try:
+        front_end_artifact = None
+        if job['file_path'] is not None:
+            front_end_artifact = get_front_end_artifact(job['file_path'], job['source_code'], job['render'])
+
+        source_code_digraph = digraph.SourceCodeDigraph(source_code=job['source_code'],
+                                                        create_visual=job['render'],
+                                                        keep_node_states=False,
+                                                        max_node_count=job['max_node_count'],
+                                                        time_budget=job['time_budget'],
+                                                        symbolic_inputs=job['symbolic_inputs'],
+                                                        front_end_artifact=front_end_artifact)
+        source_code_digraph.build_code_digraph()
+        result['status'] = 'ok'
+        if job['render']:
+            result['dot_source'] = source_code_digraph.visual_digraph.string()
+
+    except digraph.ExplorationBudgetExceeded as error:
+        result['status']    = 'budget_exceeded'
+        result['error']     = str(error)
+    except Exception:
+        result['status']    = 'error'
+        result['error']     = traceback.format_exc()
+
+    if source_code_digraph is not None:
+        result['node_count'] = source_code_digraph.node_count
+        result['test_cases'] = source_code_digraph.test_cases
+    result['seconds'] = time.time() - start_time
+    return result
+
+
+def render_image(name, dot_source, image_path):
+    """
+        runs in a worker process of the render pool, so graphviz never holds up the analysis
+    """
+    import pygraphviz as pgv
+
+    result = {'record': 'render', 'name': name}
+    try:
+        pgv.AGraph(string=dot_source).draw(image_path, prog='dot')
+        result['status']    = 'ok'
+        result['image']     = image_path
+    except Exception:
+        result['status']    = 'error'
+        result['error']     = traceback.format_exc()
+    return result
+
+
+class BatchRunner:
+    """
+        Analyzes many source codes in a pool of worker processes, each source code
+        with its own node and time budget. Results are given back as soon as each
+        source code is done, in the order they finish. When an image directory is
+        given, the digraphs are drawn in a second pool while the analysis goes on.
+    """
+
+    def __init__(self, processes=None, max_node_count=None, time_budget=None,
+                 image_directory=None, render_processes=1, max_jobs_per_process=None):
+        """
+            param processes: int, size of the analysis pool, the number of cpus by default
+            param max_node_count: int, node budget of each source code
+            param time_budget: float, seconds each source code may be explored
+            param image_directory: string, where a png of each digraph is drawn. No images without it
+            param render_processes: int, size of the render pool
+            param max_jobs_per_process: int, workers are replaced after this many jobs,
+                                        which gives back the memory z3 holds on to
+        """
+        self.processes              = processes
+        self.max_node_count         = max_node_count
+        self.time_budget            = time_budget
+        self.image_directory        = image_directory
+        self.render_processes       = render_processes
+        self.max_jobs_per_process   = max_jobs_per_process
+
+        self.statistics = {'ok': 0, 'budget_exceeded': 0, 'error': 0, 'rendered': 0, 'seconds': 0.0}
+
+    def make_jobs(self, sources):
+        jobs = []
+        for source in sources:
+            #a source may name its symbolic inputs and its file, see get_function_sources_from_module
+            name, source_code   = source[0], source[1]
+            symbolic_inputs     = source[2] if len(source) > 2 else None
+            file_path           = source[3] if len(source) > 3 else None
+            jobs.append({'name': name, 'source_code': source_code, 'symbolic_inputs': symbolic_inputs,
+                         'file_path': file_path,
+                         'render': self.image_directory is not None,
+                         'max_node_count': self.max_node_count, 'time_budget': self.time_budget})
+        return jobs
+
+    def get_image_path(self, name):
+        image_name = name.strip(os.sep).replace(os.sep, "_")
+        if image_name.endswith(".py"):
+            image_name = image_name[:-3]
+        return os.path.join(self.image_directory, image_name + ".png")
+
+    def run(self, sources):
+        """
+            param sources: list of (name, source code)
+            yields a dictionary per analysis and per rendered image
+        """
+        start_time      = time.time()
+        analysis_pool   = multiprocessing.Pool(self.processes, maxtasksperchild=self.max_jobs_per_process)
+        render_pool     = None
+        render_results  = Queue.Queue()
+        pending_renders = 0
+
+        if self.image_directory is not None:
+            if not os.path.isdir(self.image_directory):
+                os.makedirs(self.image_directory)
+            render_pool = multiprocessing.Pool(self.render_processes)
+
+        try:
+            for result in analysis_pool.imap_unordered(analyze_source_code, self.make_jobs(sources)):
+                self.statistics[result['status']] += 1
+
+                dot_source = result.pop('dot_source', None)
+                if dot_source is not None:
+                    render_pool.apply_async(render_image,
+                                            (result['name'], dot_source, self.get_image_path(result['name'])),
+                                            callback=render_results.put)
+                    pending_renders += 1
+                yield result
+
+                while not render_results.empty():
+                    pending_renders -= 1
+                    yield self.record_render(render_results.get())
+
+            analysis_pool.close()
+            while pending_renders > 0:
+                pending_renders -= 1
+                yield self.record_render(render_results.get())
+        finally:
+            analysis_pool.terminate()
+            if render_pool is not None:
+                render_pool.terminate()
+            self.statistics['seconds'] = time.time() - start_time
+
+    def record_render(self, result):
+        if result['status'] == 'ok':
+            self.statistics['rendered'] += 1
+        return result
+
+    def write_json_lines(self, sources, output_file):
+        """
+            writes every result to output_file as one line of JSON, flushed
+            as soon as it is known so the output can be followed while it runs
+        """
+        for result in self.run(sources):
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+
+    def report(self):
+        return "batch: {0} ok, {1} over budget, {2} errors, {3} images in {4:.1f} seconds".format(
+            self.statistics['ok'], self.statistics['budget_exceeded'], self.statistics['error'],
+            self.statistics['rendered'], self.statistics['seconds'])
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m halfwaytree.batch",
+                                     description="Symbolic execution of many source codes in parallel")
+    parser.add_argument("paths", nargs="*", help=".py files, or directories searched for .py files")
+    parser.add_argument("--functions", action="store_true",
+                        help="analyze every top-level function of the modules on its own, "
+                             "its parameters are symbolic inputs")
+    parser.add_argument("--source-list", help="python file defining a list named source_codes, "
+                                              "such as tests/test_source_codes.py")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--max-node-count", type=int, default=None)
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds per source code")
+    parser.add_argument("--image-directory", default=None, help="draw a png of each digraph there")
+    parser.add_argument("--render-processes", type=int, default=1)
+    parser.add_argument("--output", default=None, help="JSON Lines file, standard output by default")
+    options = parser.parse_args(arguments)
+
+    if options.functions:
+        sources = get_function_sources_from_paths(options.paths)
+    else:
+        sources = get_sources_from_paths(options.paths)
+    if options.source_list is not None:
+        sources += load_source_list(options.source_list)
+    if sources == []:
+        parser.error("no source codes given")
+
+    batch_runner = BatchRunner(processes=options.processes, max_node_count=options.max_node_count,
+                               time_budget=options.time_budget, image_directory=options.image_directory,
+                               render_processes=options.render_processes)
+    if options.output is None:
+        batch_runner.write_json_lines(sources, sys.stdout)
+    else:
+        with open(options.output, 'w') as output_file:
+            batch_runner.write_json_lines(sources, output_file)
+
+    sys.stderr.write(batch_runner.report() + "\n")
+
+
+if __name__ == "__main__":
+    main()
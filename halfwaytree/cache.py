@@ -0,0 +1,173 @@
+#-------------------------------------------------------------------------------
+# Name:         cache
+# Purpose:      Persistent solver result cache shared across runs
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import collections
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+from halfwaytree.smtlib import constraints_to_smt2, model_to_dictionary
+
+
+class SolverResultCache:
+    """
+        Stores whether a set of constraints is satisfiable, and its model,
+        keyed by the SMT-LIB2 serialization of the constraints.
+        Results are kept in a small in-memory LRU in front of a SQLite file,
+        so several processes (and later runs) share what was already solved.
+    """
+
+    def __init__(self, path, max_size_bytes=256*1024*1024, memory_entries=10000, timeout=30.0):
+        """
+            param path: string, location of the SQLite file
+            param max_size_bytes: int, when the stored results grow past this size the
+                                  least recently used ones are evicted
+            param memory_entries: int, number of results kept in memory
+            param timeout: float, seconds to wait for another process holding the database lock
+        """
+        self.path               = path
+        self.max_size_bytes     = max_size_bytes
+        self.memory_entries     = memory_entries
+        self.timeout            = timeout
+
+        self.memory_cache       = collections.OrderedDict()
+        self.connection         = None
+        self.connection_pid     = None
+
+        self.statistics = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                           'stores': 0, 'evictions': 0}
+
+    def get_connection(self):
+        """
+            connections are not shared with forked worker processes,
+            each process opens its own
+        """
+        if self.connection is None or self.connection_pid != os.getpid():
+            self.connection     = sqlite3.connect(self.path, timeout=self.timeout)
+            self.connection_pid = os.getpid()
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                                    "key TEXT PRIMARY KEY, satisfiable INTEGER, model TEXT, "
+                                    "size INTEGER, last_used REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            self.connection.commit()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get_key(self, constraints, namespace=None):
+        smt2_text = constraints_to_smt2(constraints)
+        if namespace is not None:
+            smt2_text = "; {0}\n{1}".format(namespace, smt2_text)
+        return hashlib.sha1(smt2_text).hexdigest()
+
+    def remember(self, key, result):
+        self.memory_cache.pop(key, None)
+        self.memory_cache[key] = result
+        while len(self.memory_cache) > self.memory_entries:
+            self.memory_cache.popitem(last=False)
+
+    def get(self, constraints, namespace=None):
+        """
+            param constraints: list of z3 arithmetic booleans
+            param namespace: string, the cache_namespace of the solver backend
+            returns a tuple (isfeasible, z3_solutions) like SourceCodeDigraph.solve_constraints,
+            or None when the constraints were never solved
+        """
+        key = self.get_key(constraints, namespace)
+        if key in self.memory_cache:
+            self.statistics['memory_hits'] += 1
+            result = self.memory_cache.pop(key)
+            self.memory_cache[key] = result
+            return result
+
+        connection  = self.get_connection()
+        row         = connection.execute("SELECT satisfiable, model FROM results WHERE key = ?",
+                                         (key,)).fetchone()
+        if row is None:
+            self.statistics['misses'] += 1
+            return None
+
+        with connection:
+            connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        self.statistics['disk_hits'] += 1
+        if row[0]:
+            result = (True, json.loads(row[1]))
+        else:
+            result = (False, None)
+        self.remember(key, result)
+        return result
+
+    def put(self, constraints, isfeasible, z3_solutions, namespace=None):
+        """
+            param constraints: list of z3 arithmetic booleans
+            param isfeasible: boolean, or None when the solver gave up, which is not stored:
+                              a later run, or a longer timeout, may decide the constraints
+            param z3_solutions: z3 model or dictionary, None unless isfeasible is True
+            param namespace: string, the cache_namespace of the solver backend
+        """
+        if isfeasible is None:
+            return
+
+        key = self.get_key(constraints, namespace)
+        if isfeasible:
+            model = model_to_dictionary(z3_solutions)
+        else:
+            model = None
+        self.remember(key, (isfeasible, model))
+
+        model_text  = json.dumps(model)
+        size        = len(key) + len(model_text)
+        connection  = self.get_connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                               (key, int(isfeasible), model_text, size, time.time()))
+        self.statistics['stores'] += 1
+
+        if self.statistics['stores'] % 100 == 0:
+            self.evict()
+
+    def get_stored_size(self):
+        return self.get_connection().execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def evict(self):
+        """
+            removes the least recently used results until the stored
+            size is back under 90% of max_size_bytes
+        """
+        stored_size = self.get_stored_size()
+        if stored_size <= self.max_size_bytes:
+            return
+
+        connection      = self.get_connection()
+        target_size     = self.max_size_bytes * 0.9
+        evicted_keys    = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if stored_size <= target_size:
+                break
+            evicted_keys.append((key,))
+            stored_size -= size
+
+        with connection:
+            connection.executemany("DELETE FROM results WHERE key = ?", evicted_keys)
+        self.statistics['evictions'] += len(evicted_keys)
+
+    def report(self):
+        return "solver cache: {0} memory hits, {1} disk hits, {2} misses, {3} evictions".format(
+            self.statistics['memory_hits'], self.statistics['disk_hits'],
+            self.statistics['misses'], self.statistics['evictions'])
@@ -0,0 +1,151 @@
+#-------------------------------------------------------------------------------
+# Name:         checkpoint
+# Purpose:      Checkpoint and resume for long running explorations
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import json
+import os
+
+from halfwaytree.smtlib import serialize_constraints, deserialize_constraints
+from halfwaytree.frontier import serialize_frontier_item, deserialize_frontier_item, deserialize_test_case
+
+
+class ExplorationCheckpoint:
+    """
+        Writes the frontier of an exploration to a directory as a sequence of
+        append-only segment files. A segment only holds what changed since the
+        previous one: frontier items pushed and still pending, ids of written
+        items which were explored since, the new test cases, the ast paths of the
+        functions defined since and the node count.
+        So writing a checkpoint costs little even when the frontier is large.
+
+        Pass it to SourceCodeDigraph.build_code_digraph, which resumes from the
+        segments already in the directory.
+    """
+
+    def __init__(self, directory, interval=1000):
+        """
+            param directory: string, created when missing
+            param interval: int, a segment is written every time this many nodes were explored
+        """
+        self.directory          = directory
+        self.interval           = interval
+
+        self.unwritten_items    = {}
+        self.written_item_ids   = set()
+        self.removed_item_ids   = []
+        self.written_test_cases = 0
+        self.written_functions  = 0
+        self.segment_count      = 0
+        self.expanded_nodes     = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get_segment_paths(self):
+        segment_names = sorted(name for name in os.listdir(self.directory)
+                               if name.startswith("segment-") and name.endswith(".json"))
+        return [os.path.join(self.directory, name) for name in segment_names]
+
+    def item_pushed(self, frontier_item):
+        self.unwritten_items[frontier_item['item_id']] = frontier_item
+
+    def item_popped(self, frontier_item):
+        """
+            items pushed and explored between two segments are never written
+        """
+        item_id = frontier_item['item_id']
+        if item_id in self.unwritten_items:
+            del self.unwritten_items[item_id]
+        elif item_id in self.written_item_ids:
+            self.written_item_ids.discard(item_id)
+            self.removed_item_ids.append(item_id)
+
+    def node_expanded(self, source_code_digraph):
+        self.expanded_nodes += 1
+        if self.expanded_nodes % self.interval == 0:
+            self.write_segment(source_code_digraph)
+
+    def exploration_finished(self, source_code_digraph):
+        self.write_segment(source_code_digraph, finished=True)
+
+    def write_segment(self, source_code_digraph, finished=False):
+        """
+            the segment is written to a temporary file and renamed, so a worker killed
+            while writing never leaves a partial segment behind
+        """
+        first_test_case = self.written_test_cases
+        segment = {'node_count': source_code_digraph.node_count,
+                   'frontier_item_count': source_code_digraph.frontier_item_count,
+                   'added_items': [serialize_frontier_item(frontier_item)
+                                   for item_id, frontier_item in sorted(self.unwritten_items.iteritems())],
+                   'removed_item_ids': self.removed_item_ids,
+                   'test_cases': source_code_digraph.test_cases[first_test_case:],
+                   'path_conditions': [serialize_constraints(path_condition) for path_condition in
+                                       source_code_digraph.path_conditions[first_test_case:]],
+                   'function_definitions': source_code_digraph.function_definition_paths[self.written_functions:],
+                   'finished': finished}
+
+        self.segment_count += 1
+        segment_path    = os.path.join(self.directory, "segment-{0:08d}.json".format(self.segment_count))
+        temporary_path  = segment_path + ".tmp"
+        with open(temporary_path, 'w') as segment_file:
+            json.dump(segment, segment_file)
+        os.rename(temporary_path, segment_path)
+
+        self.written_item_ids.update(self.unwritten_items.keys())
+        self.unwritten_items    = {}
+        self.removed_item_ids   = []
+        self.written_test_cases = len(source_code_digraph.test_cases)
+        self.written_functions  = len(source_code_digraph.function_definition_paths)
+
+    def resume(self, source_code_digraph):
+        """
+            replays the segments in the directory into source_code_digraph.
+            returns the frontier to continue from, an empty frontier when the
+            exploration already finished, or None when there is no checkpoint
+        """
+        segment_paths = self.get_segment_paths()
+        if segment_paths == []:
+            return None
+
+        frontier_items = {}
+        for segment_path in segment_paths:
+            with open(segment_path) as segment_file:
+                segment = json.load(segment_file)
+
+            for serialized_item in segment['added_items']:
+                frontier_items[serialized_item['item_id']] = serialized_item
+            for item_id in segment['removed_item_ids']:
+                frontier_items.pop(item_id, None)
+
+            source_code_digraph.node_count           = segment['node_count']
+            source_code_digraph.frontier_item_count  = segment['frontier_item_count']
+            source_code_digraph.test_cases          += [deserialize_test_case(test_case)
+                                                        for test_case in segment['test_cases']]
+            source_code_digraph.path_conditions     += [deserialize_constraints(path_condition)
+                                                        for path_condition in segment['path_conditions']]
+            #summaries are not written, the functions defined before the checkpoint are summarized again
+            for ast_path in segment.get('function_definitions', []):
+                source_code_digraph.define_function(source_code_digraph.get_ast_statement_from_path(
+                    ast_path, source_code_digraph.abstract_syntax_tree.body), ast_path)
+            finished = segment['finished']
+
+        self.segment_count      = len(segment_paths)
+        self.written_item_ids   = set(frontier_items.keys())
+        self.written_test_cases = len(source_code_digraph.test_cases)
+        self.written_functions  = len(source_code_digraph.function_definition_paths)
+
+        if finished:
+            return []
+
+        #items pushed last are explored first, like the call stack they replace
+        return [deserialize_frontier_item(frontier_items[item_id])
+                for item_id in sorted(frontier_items.keys())]
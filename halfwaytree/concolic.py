@@ -0,0 +1,234 @@
+#-------------------------------------------------------------------------------
+# Name:         concolic
+# Purpose:      Concolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import halfwaytree.astor as astor
+import halfwaytree.digraph as digraph
+
+
+class ConcolicExecution(digraph.SourceCodeDigraph):
+    """
+        Runs the source code concretely on seed inputs and records the path
+        condition of every run. New inputs are made by negating one branch of
+        a recorded path at a time (generational search), so the solver is only
+        called once per branch instead of once per path.
+    """
+
+    def __init__(self, source_code, seed_inputs=None, max_executions=None):
+        """
+            param source_code: string
+            param seed_inputs: list of dictionaries mapping input variable names to ints.
+                               When None, the values written in the source code are the seed
+            param max_executions: int, stops the search after this many concrete runs
+        """
+        digraph.SourceCodeDigraph.__init__(self, source_code, create_visual=False)
+
+        self.seed_inputs    = seed_inputs
+        self.max_executions = max_executions
+
+        """
+            a branch signature is the list of (ast_path, branch taken) pairs of a run.
+            signatures which were already run or already queued are never solved again
+        """
+        self.explored_branch_signatures = set()
+        self.error_inputs               = []
+
+        self.concolic_statistics = {'executions': 0, 'solver_calls': 0,
+                                    'unsatisfiable_negations': 0, 'unknown_negations': 0, 'divergences': 0}
+
+    def is_input_definition(self, ast_statement, variables):
+        """
+            inputs are variables defined for the first time as an integer,
+            this matches how update_node_variable_state makes variables symbolic
+        """
+        return hasattr(ast_statement.value, 'n') and \
+            self.variable_is_type(ast_statement.value.n, "int") and \
+            ast_statement.targets[0].id not in variables
+
+    def evaluate_concretely(self, source, concrete_variables):
+        return eval(source, {}, dict(concrete_variables))
+
+    def evaluate_condition_concretely(self, conditions, concrete_variables):
+        """
+            param conditions: the test of an if statement
+            returns True when every conditional joined with 'and' holds
+        """
+        if hasattr(conditions, 'values'):
+            condition_values = conditions.values
+        else:
+            condition_values = [conditions]
+
+        for condition in condition_values:
+            if not self.evaluate_concretely(astor.to_source(condition), concrete_variables):
+                return False
+        return True
+
+    def execute_assignment(self, ast_statement, inputs, symbolic_variables, concrete_variables,
+                           used_inputs):
+        variable_name = ast_statement.targets[0].id
+
+        if self.is_input_definition(ast_statement, symbolic_variables):
+            concrete_variables[variable_name] = inputs.get(variable_name, ast_statement.value.n)
+            used_inputs[variable_name]        = concrete_variables[variable_name]
+        else:
+            concrete_variables[variable_name] = self.evaluate_concretely(
+                astor.to_source(ast_statement.value), concrete_variables)
+
+        self.update_node_variable_state(ast_statement, symbolic_variables, "")
+
+    def run_concretely(self, inputs):
+        """
+            param inputs: dictionary of input variable names to ints
+            runs the code once and returns a dictionary holding the inputs used,
+            the branches taken and whether an assert was reached
+        """
+        ast                 = self.abstract_syntax_tree.body
+        ast_path            = [0]
+        symbolic_variables  = {}
+        concrete_variables  = {}
+        used_inputs         = {}
+        branches            = []
+        error_reached       = False
+
+        while ast_path is not None:
+            ast_statement   = self.get_ast_statement_from_path(ast_path, ast)
+            node_type       = type(ast_statement).__name__
+
+            if node_type == "Assert":
+                #code assumes assert is for Assert False
+                error_reached = True
+                break
+
+            elif node_type == "Assign":
+                self.execute_assignment(ast_statement, inputs, symbolic_variables, concrete_variables,
+                                        used_inputs)
+
+            elif node_type == "If":
+                true_constraints, false_constraints, unmutated_constraints = \
+                    self.extract_constraints_from_conditionals(ast_statement.test, symbolic_variables)
+                branch_taken = self.evaluate_condition_concretely(ast_statement.test, concrete_variables)
+
+                branches.append({'ast_path': tuple(ast_path), 'taken': branch_taken,
+                                 'true_constraints': true_constraints,
+                                 'false_constraints': false_constraints})
+
+                if branch_taken:
+                    ast_path = ast_path + ['b', 0]
+                    continue
+
+            ast_path = self.get_next_ast_path(ast_path, ast)
+
+        self.concolic_statistics['executions'] += 1
+        return {'inputs': used_inputs, 'branches': branches, 'error_reached': error_reached}
+
+    def get_branch_constraints(self, branch, taken):
+        if taken:
+            return branch['true_constraints']
+        return branch['false_constraints']
+
+    def get_branch_signature(self, branches, branch_count, last_branch_taken):
+        signature = [(branch['ast_path'], branch['taken']) for branch in branches[:branch_count]]
+        signature.append((branches[branch_count]['ast_path'], last_branch_taken))
+        return tuple(signature)
+
+    def get_inputs_from_model(self, z3_solutions, parent_inputs):
+        """
+            variables absent from the model keep the value of the run being expanded
+        """
+        inputs = dict(parent_inputs)
+        for variable in z3_solutions:
+            inputs[str(variable)] = int(str(z3_solutions[variable]))
+        return inputs
+
+    def expand_execution(self, execution, bound):
+        """
+            param execution: dictionary returned by run_concretely
+            param bound: int, branches before this index were already negated by an ancestor
+            returns a list of (inputs, bound, branch signature) for every branch that could be negated
+        """
+        branches        = execution['branches']
+        children        = []
+        path_condition  = []
+
+        for branch_count, branch in enumerate(branches):
+            if branch_count >= bound:
+                signature = self.get_branch_signature(branches, branch_count, not branch['taken'])
+
+                if signature not in self.explored_branch_signatures:
+                    self.explored_branch_signatures.add(signature)
+                    negated_constraints = self.get_branch_constraints(branch, not branch['taken'])
+
+                    self.concolic_statistics['solver_calls'] += 1
+                    isfeasible, z3_solutions = self.solve_constraints(path_condition + negated_constraints)
+
+                    if isfeasible:
+                        inputs = self.get_inputs_from_model(z3_solutions, execution['inputs'])
+                        children.append((inputs, branch_count+1, signature))
+                    elif isfeasible is None:
+                        self.concolic_statistics['unknown_negations'] += 1
+                    else:
+                        self.concolic_statistics['unsatisfiable_negations'] += 1
+
+            path_condition = path_condition + self.get_branch_constraints(branch, branch['taken'])
+
+        return children
+
+    def get_path_condition(self, execution):
+        path_condition = []
+        for branch in execution['branches']:
+            path_condition += self.get_branch_constraints(branch, branch['taken'])
+        return path_condition
+
+    def record_execution(self, execution):
+        self.get_solutions(execution['inputs'], {'constraints': self.get_path_condition(execution)})
+        if execution['error_reached']:
+            self.error_inputs.append(execution['inputs'])
+
+    def execution_diverged(self, execution, expected_signature):
+        """
+            a run diverges when the concrete semantics differ from the symbolic ones,
+            so the new inputs do not follow the branches they were solved for
+        """
+        if expected_signature is None:
+            return False
+        signature = tuple((branch['ast_path'], branch['taken'])
+                          for branch in execution['branches'][:len(expected_signature)])
+        return signature != expected_signature
+
+    def get_seed_inputs(self):
+        if self.seed_inputs is None:
+            return [{}]
+        return self.seed_inputs
+
+    def max_executions_reached(self):
+        return self.max_executions is not None and \
+            self.concolic_statistics['executions'] >= self.max_executions
+
+    def build_test_cases(self):
+        """
+            runs the generational search and returns the test cases found
+        """
+        pending = [(inputs, 0, None) for inputs in self.get_seed_inputs()]
+
+        while pending and not self.max_executions_reached():
+            inputs, bound, expected_signature = pending.pop(0)
+            execution = self.run_concretely(inputs)
+
+            if self.execution_diverged(execution, expected_signature):
+                self.concolic_statistics['divergences'] += 1
+
+            signature = tuple((branch['ast_path'], branch['taken']) for branch in execution['branches'])
+            self.explored_branch_signatures.add(signature)
+
+            self.record_execution(execution)
+            pending.extend(self.expand_execution(execution, bound))
+
+        return self.test_cases
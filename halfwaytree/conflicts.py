@@ -0,0 +1,122 @@
+#-------------------------------------------------------------------------------
+# Name:         conflicts
+# Purpose:      Learns unsat cores so infeasible paths skip the solver
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+from halfwaytree.lazy import LazyModule
+
+z3 = LazyModule("z3")
+
+
+class UnsatCoreLearner:
+    """
+        Keeps the unsat cores of the path conditions found unsatisfiable.
+
+        A core is a subset of a path condition which is unsatisfiable on its own,
+        such as x > 5 and x < 3 out of a longer path. Every path condition holding
+        all the constraints of a core is unsatisfiable as well, which is the case of
+        the sibling and descendant paths of an unsatisfiable path, so they are
+        answered without calling the solver.
+
+        Constraints are told apart by their z3 id, z3 gives structurally equal
+        expressions the same id. Cores are only learned when z3 proves the plain
+        constraints unsatisfiable, so they hold whatever the solver backend adds.
+    """
+
+    def __init__(self, minimize_cores=True, timeout=None):
+        """
+            param minimize_cores: boolean, z3 spends more time to make the cores smaller,
+                                  a smaller core is met on more paths
+            param timeout: int, milliseconds a core may take, no core is learned past it
+        """
+        self.minimize_cores = minimize_cores
+        self.timeout        = timeout
+
+        """
+            cores by constraint maps the key of a constraint to the cores holding it,
+            every core is kept under one of its constraints only
+        """
+        self.cores_by_constraint    = {}
+        self.constraints            = {}
+
+        self.statistics = {'queries': 0, 'hits': 0, 'learned_cores': 0, 'core_constraints': 0,
+                           'path_constraints': 0, 'failed_learning': 0}
+
+    def get_key(self, constraint):
+        if constraint is True or constraint is False:
+            return constraint
+        key = constraint.get_id()
+        #the constraint is kept alive, so its id is never given to another expression
+        self.constraints[key] = constraint
+        return key
+
+    def get_keys(self, constraints):
+        return set(self.get_key(constraint) for constraint in constraints if constraint is not True)
+
+    def find_core(self, constraints):
+        """
+            returns the learned core contained in constraints, or None
+        """
+        self.statistics['queries'] += 1
+        keys = self.get_keys(constraints)
+        for key in keys:
+            for core in self.cores_by_constraint.get(key, ()):
+                if core <= keys:
+                    self.statistics['hits'] += 1
+                    return core
+        return None
+
+    def add_core(self, core):
+        self.cores_by_constraint.setdefault(next(iter(core)), []).append(core)
+        self.statistics['learned_cores'] += 1
+        self.statistics['core_constraints'] += len(core)
+
+    def learn(self, constraints):
+        """
+            param constraints: a path condition the solver backend found unsatisfiable
+            returns the learned core, or None when z3 does not prove the constraints unsatisfiable
+        """
+        if any(constraint is False for constraint in constraints):
+            core = frozenset([False])
+            self.add_core(core)
+            return core
+
+        constraints = [constraint for constraint in constraints if constraint is not True]
+        solver      = z3.Solver()
+        if self.minimize_cores:
+            solver.set("core.minimize", True)
+        if self.timeout is not None:
+            solver.set("timeout", self.timeout)
+
+        trackers = {}
+        for index, constraint in enumerate(constraints):
+            tracker = z3.Bool("__core_{0}".format(index))
+            trackers[tracker.get_id()] = constraint
+            solver.assert_and_track(constraint, tracker)
+
+        if solver.check() != z3.unsat:
+            self.statistics['failed_learning'] += 1
+            return None
+
+        core = frozenset(self.get_key(trackers[tracker.get_id()]) for tracker in solver.unsat_core())
+        if not core:
+            self.statistics['failed_learning'] += 1
+            return None
+        self.statistics['path_constraints'] += len(constraints)
+        self.add_core(core)
+        return core
+
+    def report(self):
+        learned_cores = max(self.statistics['learned_cores'], 1)
+        return "unsat cores: {0} learned, {1:.1f} constraints on average out of paths of {2:.1f}, " \
+               "{3} of {4} queries answered without the solver".format(
+                   self.statistics['learned_cores'], float(self.statistics['core_constraints']) / learned_cores,
+                   float(self.statistics['path_constraints']) / learned_cores,
+                   self.statistics['hits'], self.statistics['queries'])
@@ -10,22 +10,52 @@
 #-------------------------------------------------------------------------------
 #!/usr/bin/env python
 
-import pygraphviz as pgv
 import halfwaytree.astor as astor
 import ast
-import z3
+import time
+
+#the solver backend imports z3 when the first constraint is made,
+#pygraphviz is only imported when a visual digraph is built
+from halfwaytree.solvers import get_solver_backend
+from halfwaytree.loops import transform_loops, get_trip_count, get_last_loop_value, TRIP_COUNT_FUNCTION, \
+    LAST_VALUE_FUNCTION
+from halfwaytree.frontend import run_front_end, is_loop_bound_exceeded, UnsupportedConstruct
+from halfwaytree.slicing import get_assert_slice
+
+
+#the value of a return statement is kept in this variable of the node state
+RETURN_VARIABLE = "__return__"
+
+#args of a traced span ended by an exception, see tracing.Tracer.end_open_spans
+UNFINISHED_SPAN_ARGS = {'unfinished': True}
+
+
+class ExplorationBudgetExceeded(Exception):
+    """
+        raised when an exploration goes past the max_node_count or time_budget
+        of its SourceCodeDigraph. The test cases found so far are kept
+    """
+    pass
+
+
+class Node(object):
+    """
+        Nodes are kept for every explored statement, so large trees hold millions of them.
+        Slots keep each node free of a per-instance dictionary and type strings are
+        interned, so every node of the same type refers to one string.
+    """
+    __slots__ = ('type', 'statement', 'state', 'children', 'node_id', 'child_of_error', 'test_case_index')
 
-class Node:
     def __init__(self, type, statement, state, children, node_id):
         """
             param type: string
             param statement: string
-            param state: dictionary
+            param state: dictionary, or None when the digraph does not keep node states
             param children: list of nodes
             param node_id: int
         """
 
-        self.type           = type
+        self.type           = intern(type) if isinstance(type, str) else type
         self.statement      = statement
         self.state          = state
         self.children       = children
@@ -39,6 +69,30 @@ class Node:
         """
         self.child_of_error = False
 
+        #index in test_cases of the test case this node produced, if any
+        self.test_case_index = None
+
+
+class FrontEndArtifact:
+    """
+        What the loop transformation and the front end make of a source code: its ast
+        and their statistics, and the code objects compiled from its statements. None
+        of it depends on the paths explored, so digraphs of the same source code share
+        an artifact, see astor.CodeToAst.get_artifact and batch.get_front_end_artifact
+    """
+
+    def __init__(self, source_code, options, abstract_syntax_tree, loop_statistics, front_end_statistics):
+        """
+            param options: tuple, see SourceCodeDigraph.get_front_end_options
+        """
+        self.source_code            = source_code
+        self.options                = options
+        self.abstract_syntax_tree   = abstract_syntax_tree
+        self.loop_statistics        = loop_statistics
+        self.front_end_statistics   = front_end_statistics
+        #filled in by the digraphs exploring the source code, a statement is compiled once for all of them
+        self.compiled_sources       = {}
+
 
 class SourceCodeDigraph:
     """
@@ -46,24 +100,114 @@ class SourceCodeDigraph:
     """
 
     def __init__(self, source_code, create_visual=True, show_unmutated_constraints=True,
-                 show_node_id=True, use_html_like_label=True, only_show_feasible_paths=False):
+                 show_node_id=True, use_html_like_label=True, only_show_feasible_paths=False,
+                 random_input_prepass=None, solver_cache=None, keep_node_states=True,
+                 max_node_count=None, time_budget=None, solver_backend=None, constraint_simplifier=None,
+                 loop_unroll_bound=4, summarize_loops=True, symbolic_inputs=None, slice_on_asserts=False,
+                 unsat_core_learner=None, tracer=None, query_dump=None, front_end_artifact=None):
         """
             param abstract_syntax_tree: an ast object
+            param random_input_prepass: a fuzzing.RandomInputPrepass, when given, path conditions
+                                        are first checked against random inputs and z3 is only
+                                        called for those which no sampled input satisfies
+            param solver_cache: a cache.SolverResultCache, solver results are looked up in it
+                                before z3 is called and stored in it afterwards
+            param keep_node_states: boolean, when False nodes do not hold on to their state,
+                                    which holds the variables and constraint list of the path.
+                                    Test cases and labels are unchanged
+            param max_node_count: int, build_code_digraph raises ExplorationBudgetExceeded
+                                  instead of exploring more nodes than this
+            param time_budget: float, seconds build_code_digraph may run before it raises
+                               ExplorationBudgetExceeded
+            param solver_backend: a solvers.SolverBackend, or the name of a registered one
+                                  such as "portfolio". z3 in this process by default
+            param constraint_simplifier: a simplifier.ConstraintSimplifier, when given the constraints
+                                         of each branch are simplified before they join the path
+            param loop_unroll_bound: int, iterations explored of a loop which is not summarized,
+                                     see loops.LoopTransformer
+            param summarize_loops: boolean, when True loops which only step induction variables
+                                   are replaced by their closed form instead of being unrolled
+            param symbolic_inputs: list of the names of the variables which are symbolic inputs,
+                                   other variables first assigned an integer are concrete.
+                                   By default every variable first assigned an integer is an input
+            param slice_on_asserts: boolean, when True if-statements which cannot change whether an
+                                    assert is reached, see slicing.get_assert_slice, are not forked on:
+                                    their body is skipped and their test adds no constraint. A source
+                                    code without asserts is then explored along a single path
+            param unsat_core_learner: a conflicts.UnsatCoreLearner, when given the unsat core of every
+                                      unsatisfiable path condition is learned, and path conditions
+                                      holding a learned core are found unsatisfiable without the solver
+            param tracer: a tracing.Tracer, when given spans are recorded around the exploration of every
+                          subtree, every solver check, the source code made from the ast and the calls
+                          to the visual digraph
+            param query_dump: an offline.QueryDump, when given no path condition is solved during the
+                              exploration. The path condition of every leaf is written there as an
+                              SMT-LIB2 query, its test case is None until offline.join_results
+                              joins the models found by offline.OfflineSolver
+            param front_end_artifact: a FrontEndArtifact of a digraph of the same source code, create_visual,
+                                      loop_unroll_bound and summarize_loops. The loops are not rewritten
+                                      again and the front end is skipped
         """
+        if query_dump is not None and only_show_feasible_paths:
+            raise ValueError("only_show_feasible_paths needs the paths solved during the exploration, "
+                             "it cannot be used with a query_dump")
 
         self.node_count                 = 0
         self.create_visual              = create_visual
         self.show_unmutated_constraints = show_unmutated_constraints
         self.show_node_id               = show_node_id
         self.use_html_like_label        = use_html_like_label
+        self.loop_unroll_bound          = loop_unroll_bound
+        self.summarize_loops            = summarize_loops
+        self.loop_statistics            = None
+        #paths ended where an unrolled loop would need more iterations than were unrolled
+        self.cut_off_path_count         = 0
+        self.front_end_statistics       = None
+        self.slice_on_asserts           = slice_on_asserts
+        self.assert_slice               = None
+        self.slicing_statistics         = {'sliced_if_statements': 0, 'skipped_forks': 0}
+        self.tracer                     = tracer
+        self.query_dump                 = query_dump
+        #query id of every test case whose path condition was dumped, by index in test_cases
+        self.offline_query_ids          = {}
+        self.front_end_artifact         = front_end_artifact
         self.abstract_syntax_tree       = self.make_ast(source_code)
         self.only_show_feasible_paths   = only_show_feasible_paths
+        self.random_input_prepass       = random_input_prepass
+        self.solver_cache               = solver_cache
+        self.keep_node_states           = keep_node_states
+        self.max_node_count             = max_node_count
+        self.time_budget                = time_budget
+        self.exploration_start_time     = None
+        self.solver_backend             = get_solver_backend(solver_backend)
+        self.owns_solver_backend        = isinstance(solver_backend, basestring)
+        self.constraint_simplifier      = constraint_simplifier
+        self.unsat_core_learner         = unsat_core_learner
+        self.symbolic_inputs            = symbolic_inputs
+
+        """
+            symbolic functions maps the name of every function defined so far
+            to a functions.SymbolicFunction which instantiates its summary when called,
+            summarized loops call get_trip_count and get_last_loop_value
+        """
+        self.symbolic_functions         = {TRIP_COUNT_FUNCTION: get_trip_count,
+                                           LAST_VALUE_FUNCTION: get_last_loop_value}
+        self.function_statistics        = {'summaries': 0, 'summary_paths': 0, 'calls': 0}
+        #ast paths of the function definitions summarized so far, a checkpoint summarizes them again
+        self.function_definition_paths  = []
 
         self.edge_color         = "red"
         self.constraint_color   = "red"
         self.arrow_head         = "normal"
 
         self.test_cases         = []
+        self.frontier_item_count = 0
+
+        """
+            path conditions holds the constraints of the path which produced
+            each test case, it is index aligned with test_cases
+        """
+        self.path_conditions    = []
 
     def append_end_statement_to_source_code(self, source_code):
         """
@@ -75,10 +219,88 @@ class SourceCodeDigraph:
         source_code+= "print"
         return source_code
 
-    def make_ast(self, source_code):
+    def get_front_end_options(self):
+        """
+            the options the ast made from the source code depends on
+        """
+        return (self.create_visual, self.loop_unroll_bound, self.summarize_loops,
+                tuple(sorted(self.get_outer_function_names())))
+
+    def make_front_end_artifact(self, source_code):
+        original_source_code = source_code
         if self.create_visual:
             source_code = self.append_end_statement_to_source_code(source_code)
-        return ast.parse(source_code)
+        abstract_syntax_tree    = ast.parse(source_code)
+        loop_statistics         = transform_loops(abstract_syntax_tree, unroll_bound=self.loop_unroll_bound,
+                                                  summarize=self.summarize_loops)
+        #unsupported statements are reported here, before any path is explored
+        if self.tracer is not None:
+            #the front end makes the source code of every statement
+            self.tracer.begin("front end", "source")
+        try:
+            front_end_statistics = run_front_end(abstract_syntax_tree, self.get_outer_function_names())
+        finally:
+            if self.tracer is not None:
+                self.tracer.end()
+        return FrontEndArtifact(original_source_code, self.get_front_end_options(), abstract_syntax_tree,
+                                loop_statistics, front_end_statistics)
+
+    def make_ast(self, source_code):
+        if self.front_end_artifact is None:
+            self.front_end_artifact = self.make_front_end_artifact(source_code)
+        elif self.front_end_artifact.source_code != source_code or \
+                self.front_end_artifact.options != self.get_front_end_options():
+            raise ValueError("the front end artifact was made from another source code or with other options")
+
+        abstract_syntax_tree        = self.front_end_artifact.abstract_syntax_tree
+        self.loop_statistics        = dict(self.front_end_artifact.loop_statistics)
+        self.front_end_statistics   = dict(self.front_end_artifact.front_end_statistics)
+        self.compiled_sources       = self.front_end_artifact.compiled_sources
+        if self.slice_on_asserts:
+            self.assert_slice = get_assert_slice(abstract_syntax_tree)
+            self.slicing_statistics['sliced_if_statements'] = len([
+                node for node in ast.walk(abstract_syntax_tree)
+                if isinstance(node, ast.If) and node.statement_id not in self.assert_slice])
+        return abstract_syntax_tree
+
+    def cut_off_path(self, node_state):
+        """
+            called when a path which may be feasible runs an unrolled loop past its unroll bound
+        """
+        self.cut_off_path_count += 1
+
+    def get_outer_function_names(self):
+        """
+            names of the functions defined outside of the source code, which it may call
+        """
+        return []
+
+    def get_statement_source(self, ast_statement):
+        """
+            the front end keeps the source code of every statement,
+            statements it did not see are turned into source code here
+        """
+        if hasattr(ast_statement, 'source'):
+            return ast_statement.source
+        return self.to_source(ast_statement)
+
+    def to_source(self, ast_node):
+        if self.tracer is None:
+            return astor.to_source(ast_node)
+        self.tracer.begin("to_source", "source", {'node': type(ast_node).__name__})
+        try:
+            return astor.to_source(ast_node)
+        finally:
+            self.tracer.end()
+
+    def compile_source(self, source):
+        """
+            returns the code object of a statement, a statement met on
+            many paths is only compiled once
+        """
+        if source not in self.compiled_sources:
+            self.compiled_sources[source] = compile(source, "<halfwaytree>", "exec")
+        return self.compiled_sources[source]
 
     def add_node_to_visual_digraph(self, node_statement, node_id, node_type, is_last_statement):
         """
@@ -89,7 +311,7 @@ class SourceCodeDigraph:
         style="rounded"
         if node_type == "If":
             shape = 'diamond'
-        elif node_type in ["Assign", "Print", "Assert"]:
+        elif node_type in ["Assign", "Print", "Assert", "FunctionDef", "Return", "Pass", "Expr"]:
             shape = 'oval'
 
             if is_last_statement:
@@ -129,14 +351,17 @@ class SourceCodeDigraph:
         self.visual_digraph.add_edge(parent_node_id, node_id, **kwargs)
 
     def make_condition_symbolic(self, condition, node_variables):
+        self.place_symbolic_variables_into_local_scope(self.symbolic_functions, locals())
         self.place_symbolic_variables_into_local_scope(node_variables, locals())
-        exec("local_condition ={0}".format(condition))
+        exec(self.compile_source("local_condition ={0}".format(condition)))
         return  local_condition
 
 
-    def extract_constraints_from_conditionals(self, conditions, node_variables):
+    def extract_constraints_from_conditionals(self, conditions, node_variables, condition_sources=None):
         """
             param conditions: list
+            param condition_sources: list of the source code of each condition, the front end
+                                     keeps them on if-statements as condition_sources
             this method takes a list of conditions and extracts constraints
         """
 
@@ -164,15 +389,17 @@ class SourceCodeDigraph:
             Pretty much, these are the contraints when the if statement is false
         """
         false_constraints    = []
-        for condition in condition_values:
-            condition = astor.to_source(condition)
+        if condition_sources is None:
+            condition_sources = [self.to_source(condition) for condition in condition_values]
+
+        for condition in condition_sources:
             unmutated_constraints.append(condition)
             condition = self.make_condition_symbolic(condition, node_variables)
             true_constraints.append(condition)
-            false_constraints.append(z3.Not(condition))
+            false_constraints.append(self.solver_backend.negate(condition))
 
         if false_constraints != []:
-            false_constraints = [z3.Or(false_constraints)]
+            false_constraints = [self.solver_backend.disjunction(false_constraints)]
 
         return true_constraints, false_constraints, unmutated_constraints
 
@@ -228,10 +455,12 @@ class SourceCodeDigraph:
                 symbolically define it with z3
             """
 
-            if node.targets[0].id in variables:
+            if node.targets[0].id in variables or getattr(node, 'concrete_initializer', False) or \
+                    (self.symbolic_inputs is not None and node.targets[0].id not in self.symbolic_inputs):
                 """
                     if this variable is in scope,it's being redefined.
-                    So make it concrete
+                    So make it concrete. Loop variables and variables which
+                    are not inputs are concrete as well
                 """
                 variables[node.targets[0].id] = node.value.n
             else:
@@ -239,7 +468,7 @@ class SourceCodeDigraph:
                     if this variable is not in scope,it's being defined for the first time.
                     So make it symbolic. Also make the node_statement show as var=symbolic
                 """
-                variables[node.targets[0].id] = z3.Int(node.targets[0].id)
+                variables[node.targets[0].id] = self.solver_backend.make_integer(node.targets[0].id)
                 node_statement = "{0} = symbolic".format(node.targets[0].id)
         else:
             if node.targets[0].id not in variables:
@@ -247,11 +476,12 @@ class SourceCodeDigraph:
                     place variable in scope. This is needed when a variable is being defined
                     for the first time and set equal to other vairbales
                 """
-                variables[node.targets[0].id] = z3.Int(node.targets[0].id)
+                variables[node.targets[0].id] = self.solver_backend.make_integer(node.targets[0].id)
 
-            statement = astor.to_source(node)
+            statement = self.get_statement_source(node)
+            self.place_symbolic_variables_into_local_scope(self.symbolic_functions, locals())
             self.place_symbolic_variables_into_local_scope(variables, locals())
-            exec(statement) #symbolic execution occurs here
+            exec(self.compile_source(statement)) #symbolic execution occurs here
             self.place_local_variables_into_symbolic_scope(variables, locals())
 
         return node_statement
@@ -270,13 +500,19 @@ class SourceCodeDigraph:
                                node_type, is_last_statement, edge_message_with_parent):
         #---------------------------------create node if needed
         if self.create_visual:
-            #add node to visual digraph
-            self.add_node_to_visual_digraph(node_statement, node_id, node_type, is_last_statement)
-
-            if node_id > 0:
-                #connect node to a parent digraph
-                self.connect_node_to_parent_node_on_visual_digraph(node_id, parent_node_id,
-                                                                   edge_message_with_parent)
+            if self.tracer is not None:
+                self.tracer.begin("visual node", "visual")
+            try:
+                #add node to visual digraph
+                self.add_node_to_visual_digraph(node_statement, node_id, node_type, is_last_statement)
+
+                if node_id > 0:
+                    #connect node to a parent digraph
+                    self.connect_node_to_parent_node_on_visual_digraph(node_id, parent_node_id,
+                                                                       edge_message_with_parent)
+            finally:
+                if self.tracer is not None:
+                    self.tracer.end()
         #---------------------------------create node if needed
 
     def get_ast_body_that_ast_path_is_in(self, ast_path, ast):
@@ -351,57 +587,108 @@ class SourceCodeDigraph:
 
         return ast_body_exists
 
+    def get_next_ast_path(self, ast_path, ast):
+        """
+            returns the ast_path of the statement which runs after the statement
+            at ast_path when no if-statement body is entered. None is returned
+            when the statement at ast_path is the last one on its path
+        """
+        next_ast_path = list(ast_path)
+        if self.there_is_an_ast_statement_below_in_same_body(next_ast_path, ast):
+            next_ast_path[-1] += 1
+            return next_ast_path
+
+        if self.there_is_an_ast_statement_below_in_any_ast_body_above(next_ast_path, ast):
+            #the path was shortened to the if statement which holds the body
+            next_ast_path[-1] += 1
+            return next_ast_path
+
+        return None
+
     def add_node_from_ast_statements_inside_if_statement_body(self, ast=None, ast_path=None, node_state=None,
-                                                        node_id=None, node_children=None):
+                                                        node_id=None, pending_children=None):
         """
             code assumes current ast_path refers to an if statment
         """
         ast_path += ['b', 0]
-        node_children.append(
-            self.return_node_and_all_its_children(ast=ast, ast_path=ast_path, node_state=node_state,
-                                              parent_node_id=node_id )
-        )
+        pending_children.append((ast_path, node_state))
 
 
     def get_number_of_root_statements(self):
         return len(self.abstract_syntax_tree.body)
 
-    def add_last_node(self, ast=None, node_state=None, node_id=None, node_children=None):
+    def add_last_node(self, ast=None, node_state=None, node_id=None, pending_children=None):
 
         root_statement_index = self.get_number_of_root_statements() -1
         ast_path    = [root_statement_index]
 
-        node_children.append(
-            self.return_node_and_all_its_children(ast=ast, ast_path=ast_path, node_state=node_state,
-                                              parent_node_id=node_id )
-        )
+        pending_children.append((ast_path, node_state))
 
     def add_node_from_ast_statements_below_in_same_body(self, ast=None, ast_path=None, node_state=None,
-                                                        node_id=None, node_children=None):
+                                                        node_id=None, pending_children=None):
         if self.there_is_an_ast_statement_below_in_same_body(ast_path, ast):
             ast_path[-1] += 1
-            node_children.append(
-                self.return_node_and_all_its_children(ast=ast, ast_path=ast_path, node_state=node_state,
-                                                  parent_node_id=node_id )
-            )
+            pending_children.append((ast_path, node_state))
 
 
     def get_concrete_value_of_variable_as_string(self, variable, node_state, z3_solutions):
-        return str(z3_solutions[variable])
+        return self.solver_backend.format_value(z3_solutions[variable])
 
-    def append_solution_to_test_cases(self, solution_dictionary):
+    def append_solution_to_test_cases(self, solution_dictionary, node_state=None):
         self.test_cases.append(solution_dictionary)
 
+        if node_state is None:
+            self.path_conditions.append([])
+        else:
+            self.path_conditions.append(list(node_state['constraints']))
+
+    def first_child_is_if_statement_body(self, node, pending_children):
+        """
+            param pending_children: list of (ast_path, node_state) returned by expand_node
+        """
+        return node.type == "If" and pending_children != [] and pending_children[0][0][-2:] == ['b', 0]
+
+    def take_last_test_case(self):
+        """
+            removes the last test case, returns it with its path condition and query id
+        """
+        query_id = self.offline_query_ids.pop(len(self.test_cases) - 1, None)
+        return self.test_cases.pop(), self.path_conditions.pop(), query_id
+
+    def put_back_test_case(self, taken_test_case):
+        """
+            appends a test case taken by take_last_test_case, returns its new index
+        """
+        test_case, path_condition, query_id = taken_test_case
+        self.test_cases.append(test_case)
+        self.path_conditions.append(path_condition)
+        if query_id is not None:
+            self.offline_query_ids[len(self.test_cases) - 1] = query_id
+        return len(self.test_cases) - 1
+
     def get_solutions(self, z3_solutions, node_state):
         """
             code gets solutions for statement
             and appends it to test_cases
         """
+        solution, solution_dictionary = self.format_solutions(z3_solutions, node_state)
+
+        if solution_dictionary == {}:
+            self.append_solution_to_test_cases(True, node_state)
+        else:
+            self.append_solution_to_test_cases(solution_dictionary, node_state)
+        return solution
 
+    def format_solutions(self, z3_solutions, node_state):
+        """
+            returns the solutions as the string shown on the node and as a dictionary
+        """
         solution = ""
         solution_dictionary = {}
 
-        for variable in z3_solutions:
+        #models read back from a cache or an offline solver are in no particular order,
+        #every model is shown sorted by variable name so its label does not depend on where it came from
+        for variable in sorted(z3_solutions, key=str):
 
             variable_value = self.get_concrete_value_of_variable_as_string(variable, node_state, z3_solutions)
             variable = str(variable)
@@ -412,11 +699,46 @@ class SourceCodeDigraph:
             else:
                 solution = solution + ",\n" + variable + " = " + variable_value
 
-        if solution_dictionary == {}:
-            self.append_solution_to_test_cases(True)
+        return solution, solution_dictionary
+
+    def dump_path_condition(self, node_state):
+        """
+            writes the path condition to the query dump instead of solving it,
+            its test case is None until the model is joined by set_offline_solution
+        """
+        #the node being expanded was given the last node id
+        query_id = self.query_dump.add_query(self.node_count - 1, len(self.test_cases), node_state['constraints'])
+        self.offline_query_ids[len(self.test_cases)] = query_id
+        self.append_solution_to_test_cases(None, node_state)
+        return "query {0}, solved offline".format(query_id)
+
+    def set_offline_solution(self, node, node_id, test_case_index, isfeasible, z3_solutions):
+        """
+            param node: the Node of the leaf, or None when the tree is not kept
+            param isfeasible: boolean, None when the solver gave up on the query
+            param z3_solutions: the model found offline, as a dictionary, None unless isfeasible
+            fills in the test case and label the leaf would have had, had it been solved
+            during the exploration
+        """
+        if isfeasible is None:
+            string_solutions                    = "path unknown"
+            self.test_cases[test_case_index]    = None
+        elif not isfeasible:
+            string_solutions                    = "path unsatisfiable"
+            self.test_cases[test_case_index]    = False
         else:
-            self.append_solution_to_test_cases(solution_dictionary)
-        return solution
+            string_solutions, solution_dictionary = self.format_solutions(z3_solutions, None)
+            self.test_cases[test_case_index]    = solution_dictionary if solution_dictionary != {} else True
+            if string_solutions == "":
+                string_solutions = "any input"
+
+        node_statement = self.modify_node_statement(
+            "[font color='{0}']{1}[/font]".format(self.constraint_color, string_solutions), node_id, True)
+        if node is not None:
+            node.statement = node_statement
+        if self.create_visual:
+            #adding a node which exists updates its attributes
+            self.visual_digraph.add_node(node_id, label=node_statement)
 
 
     def is_statement_on_root_body(self, ast_path):
@@ -434,16 +756,62 @@ class SourceCodeDigraph:
         return False
 
 
+    def solve_constraints(self, constraints):
+        """
+            param constraints: list of z3 arithmetic booleans
+            returns a tuple (isfeasible, z3_solutions). z3_solutions is the
+            model of the constraints and is None when they are unsatisfiable.
+            isfeasible is None when the solver backend could not decide, the path
+            is then neither pruned as unsatisfiable nor given a test case: its
+            leaves get None in test_cases, and nothing is learned from it
+        """
+        if self.random_input_prepass is not None:
+            z3_solutions = self.random_input_prepass.find_satisfying_inputs(constraints)
+            if z3_solutions is not None:
+                #a sampled input vector satisfies the constraints, no need for z3
+                return True, z3_solutions
+
+        if self.unsat_core_learner is not None and self.unsat_core_learner.find_core(constraints) is not None:
+            #the path holds every constraint of a path condition already found unsatisfiable
+            return False, None
+
+        if self.solver_cache is not None:
+            cached_result = self.solver_cache.get(constraints, self.solver_backend.cache_namespace)
+            if cached_result is not None:
+                return cached_result
+
+        if self.tracer is not None:
+            self.tracer.begin("solver check", "solver", {'constraints': len(constraints)})
+        span_args = UNFINISHED_SPAN_ARGS
+        try:
+            isfeasible, z3_solutions = self.solver_backend.check(constraints)
+            span_args = {'feasible': isfeasible}
+        finally:
+            if self.tracer is not None:
+                self.tracer.end(span_args)
+
+        if isfeasible is False and self.unsat_core_learner is not None:
+            if self.tracer is not None:
+                self.tracer.begin("learn unsat core", "solver")
+            try:
+                self.unsat_core_learner.learn(constraints)
+            finally:
+                if self.tracer is not None:
+                    self.tracer.end()
+
+        if self.solver_cache is not None and isfeasible is not None:
+            #another run, or a longer timeout, may decide what this one could not
+            self.solver_cache.put(constraints, isfeasible, z3_solutions, self.solver_backend.cache_namespace)
+        return isfeasible, z3_solutions
+
     def calculate_concrete_variables_on_last_statement(self, node_state, ast_path, ast, node_statement):
 
         is_last_statement   = False
-        s = z3.Solver()
-        s.add(node_state['constraints'])
-
-        if s.check().r ==1:
-            isfeasible = True
+        if self.query_dump is not None:
+            #path conditions are solved offline, every path is explored as if it were feasible
+            isfeasible, z3_solutions = True, None
         else:
-            isfeasible = False
+            isfeasible, z3_solutions = self.solve_constraints(node_state['constraints'])
 
         if self.is_statement_the_last(ast_path, ast):
             #if this ast body has no statement below
@@ -455,21 +823,29 @@ class SourceCodeDigraph:
             if len(ast_path)==1:
                 #if this statement is on the root ast_body
 
-                if isfeasible:
+                if self.query_dump is not None:
+                    string_solutions = self.dump_path_condition(node_state)
+
+                elif isfeasible:
                     #if path conditions are satisfiable
-                    string_solutions = self.get_solutions(s.model(), node_state)
+                    string_solutions = self.get_solutions(z3_solutions, node_state)
 
                     if string_solutions == "":
                         #this is what happens when any input works
                         string_solutions = "any input"
 
+                elif isfeasible is None:
+                    #the solver gave up, the path is left unsolved
+                    string_solutions = "path unknown"
+                    self.append_solution_to_test_cases(None, node_state)
+
                 else:
                     #this is what happens when no input works
                     string_solutions = "path unsatisfiable"
                     #add False which means path is impossible
 
                     if not self.only_show_feasible_paths:
-                        self.append_solution_to_test_cases(False)
+                        self.append_solution_to_test_cases(False, node_state)
 
 
                 node_statement += "[font color='{0}']{1}[/font]".format(self.constraint_color, string_solutions)
@@ -479,7 +855,7 @@ class SourceCodeDigraph:
 
 
     def add_node_from_ast_statements_below_in_any_ast_body_above(self, ast=None, ast_path=None, node_state=None,
-                                                        node_id=None, node_children=None):
+                                                        node_id=None, pending_children=None):
 
         if self.there_is_an_ast_statement_below_in_same_body(ast_path, ast):
             """
@@ -490,10 +866,7 @@ class SourceCodeDigraph:
         if self.there_is_an_ast_statement_below_in_any_ast_body_above(ast_path, ast):
             #increment last index in path, to go to the next statement
             ast_path[-1] += 1
-            node_children.append(
-                self.return_node_and_all_its_children(ast=ast, ast_path=ast_path, node_state=node_state,
-                                                  parent_node_id=node_id )
-            )
+            pending_children.append((ast_path, node_state))
 
     def get_node_statement_from_constraints(self, unmutated_constraints, node_state):
         if self.show_unmutated_constraints:
@@ -526,8 +899,14 @@ class SourceCodeDigraph:
 
         true_node_state     = self.get_copy_of_node_state(node_state) #copy by value
         false_node_state    = node_state    #copy by reference
-        true_node_state['constraints']  = true_node_state['constraints']    + true_constraints
-        false_node_state['constraints'] = false_node_state['constraints']   + false_constraints
+        if self.constraint_simplifier is not None:
+            true_node_state['constraints']  = self.constraint_simplifier.add_constraints(
+                true_node_state['constraints'], true_constraints)
+            false_node_state['constraints'] = self.constraint_simplifier.add_constraints(
+                false_node_state['constraints'], false_constraints)
+        else:
+            true_node_state['constraints']  = true_node_state['constraints']    + true_constraints
+            false_node_state['constraints'] = false_node_state['constraints']   + false_constraints
 
         true_node_state['type'] = True
         #false_node_state['type']= False
@@ -574,28 +953,55 @@ class SourceCodeDigraph:
         else:
             node_state['type']=None
 
-    def return_node_and_all_its_children(self, ast=None, ast_path=None,
-                                          node_state=None, parent_node_id=None):
+    def get_initial_node_state(self):
+        return {'constraints':[], 'variables':{}, 'type': None}
+
+    def check_exploration_budget(self):
+        if self.max_node_count is not None and self.node_count >= self.max_node_count:
+            raise ExplorationBudgetExceeded("explored {0} nodes, the budget is {1}".format(
+                self.node_count, self.max_node_count))
+
+        if self.time_budget is not None and self.exploration_start_time is not None:
+            elapsed_time = time.time() - self.exploration_start_time
+            if elapsed_time > self.time_budget:
+                raise ExplorationBudgetExceeded("explored for {0:.1f} seconds, the budget is {1}".format(
+                    elapsed_time, self.time_budget))
+
+    def if_statement_is_sliced(self, ast_statement):
+        return self.assert_slice is not None and ast_statement.statement_id not in self.assert_slice
+
+    def define_function(self, ast_statement, ast_path):
         """
-            This method returns node and all its siblings.
-            It sends the state of the previous node_state down to the child node.
-            The node_state contains the parent's constraints and variable_state
+            the body is explored once here, calls instantiate its summary.
+            returns a functions.SymbolicFunction
+        """
+        from halfwaytree.functions import summarize_function
 
-            definitions:
+        symbolic_function = summarize_function(self, ast_statement)
+        self.symbolic_functions[ast_statement.name] = symbolic_function
+        self.function_definition_paths.append(list(ast_path))
+        return symbolic_function
 
+    def expand_node(self, ast=None, ast_path=None, node_state=None, parent_node_id=None):
         """
-        if ast_path == None:
-            ast_path    = [0]
-            node_state  = {'constraints':[], 'variables':{}, 'type': None}
+            This method returns the node at ast_path without its children.
+            It returns a tuple (node, node_id, pending_children) where pending_children
+            is a list of (ast_path, node_state) of the children, in the order they are explored.
+            The node_state contains the parent's constraints and variable_state
+        """
+        self.check_exploration_budget()
         ast_statement    = self.get_ast_statement_from_path(ast_path, ast)
 
         #-------------------------initialize stuff for digraph node
         node_type           = type(ast_statement).__name__
         node_statement      = ""
-        node_children       = []
+        pending_children    = []
         node_id             = self.node_count
         self.node_count += 1
         error_present       = False
+        return_present      = False
+        skipped_fork        = False
+        cut_off             = False
         #-------------------------initialize stuff for digraph node
 
         if      node_type == "Assert":
@@ -604,21 +1010,48 @@ class SourceCodeDigraph:
             error_present   = True
 
         elif      node_type == "Assign":
-            node_statement = astor.to_source(ast_statement)
+            node_statement = self.get_statement_source(ast_statement)
             node_statement = self.update_node_variable_state(ast_statement, node_state['variables'], node_statement)
 
             #if ast_statement.targets[0].id in node_state['variables']:
             #   node_statement = str(ast_statement.targets[0].id) + " = symbolic"
 
-        elif    node_type == "Print":
-            node_statement = astor.to_source(ast_statement)
+        elif    node_type in ["Print", "Pass"]:
+            node_statement = self.get_statement_source(ast_statement)
+        elif    node_type == "FunctionDef":
+            symbolic_function = self.define_function(ast_statement, ast_path)
+            node_statement = "def {0}({1}): {2} paths".format(
+                ast_statement.name, ", ".join(argument.id for argument in ast_statement.args.args),
+                len(symbolic_function.summary))
+        elif    node_type == "Expr" and is_loop_bound_exceeded(ast_statement):
+            node_statement  = "loop bound exceeded, path cut off"
+            cut_off         = True
+        elif    node_type == "Expr":
+            #a call statement, the value it returns is dropped
+            node_statement = self.get_statement_source(ast_statement)
+            self.make_condition_symbolic(self.to_source(ast_statement.value), node_state['variables'])
+        elif    node_type == "Return":
+            node_statement = self.get_statement_source(ast_statement)
+            return_value = None
+            if ast_statement.value is not None:
+                #the returned expression is evaluated the same way as a condition
+                return_value = self.make_condition_symbolic(self.to_source(ast_statement.value),
+                                                            node_state['variables'])
+            node_state['variables'][RETURN_VARIABLE] = return_value
+            return_present = True
+        elif    node_type == "If" and self.if_statement_is_sliced(ast_statement):
+            #the path goes on after the if-statement without a constraint from its test
+            node_statement  = "if {0}: skipped".format(" and ".join(ast_statement.condition_sources))
+            skipped_fork    = True
+            self.slicing_statistics['skipped_forks'] += 1
         elif    node_type == "If":
             """
                 add true branch of if statement,
                 code adds statements inside if body
             """
             true_constraints, false_constraints, unmutated_constraints = \
-                self.extract_constraints_from_conditionals(ast_statement.test, node_state['variables'])
+                self.extract_constraints_from_conditionals(ast_statement.test, node_state['variables'],
+                                                           getattr(ast_statement, 'condition_sources', None))
 
             true_node_state, false_node_state = \
                 self.build_true_and_false_node_states_from_constraints(node_state,
@@ -629,7 +1062,7 @@ class SourceCodeDigraph:
             node_statement = self.get_node_statement_from_constraints(unmutated_constraints, true_node_state)
 
             self.add_node_from_ast_statements_inside_if_statement_body(ast, list(ast_path), true_node_state,
-                                                                       node_id, node_children)
+                                                                       node_id, pending_children)
             """
                 the following line makes the node_state equal to the false_node_state to
                 represent the branch of code executed if the if-statement conditions
@@ -640,25 +1073,39 @@ class SourceCodeDigraph:
 
 
 
-        node_statement, is_last_statement, isfeasible = self.calculate_concrete_variables_on_last_statement(
-            node_state, list(ast_path), ast, node_statement)
+        number_of_test_cases = len(self.test_cases)
+        if cut_off:
+            #the path ends here without a test case, even when nothing follows the loop
+            isfeasible          = True if self.query_dump is not None else \
+                                  self.solve_constraints(node_state['constraints'])[0]
+            is_last_statement   = False
+            if isfeasible is not False:
+                self.cut_off_path(node_state)
+        else:
+            node_statement, is_last_statement, isfeasible = self.calculate_concrete_variables_on_last_statement(
+                node_state, list(ast_path), ast, node_statement)
         node_statement = self.modify_node_statement(node_statement, node_id, is_last_statement)
         edge_message_with_parent = node_state["type"]
         self.create_node_on_digraph_based_on_feasibility(isfeasible, node_id, parent_node_id,
                                                             node_type, is_last_statement,
                                                             edge_message_with_parent, node_statement
                                                         )
-        self.update_node_type(node_type, node_state)
+        if skipped_fork:
+            node_state['type'] = None
+        else:
+            self.update_node_type(node_type, node_state)
 
 
-        if error_present:
+        if error_present or return_present:
             """
-                if error is present, jump to the last node and add it as a child.
-                Note, the last node is assumed to never have an error present
+                if error is present, or a function body returns, jump to the last node
+                and add it as a child. Note, the last node is assumed to never have an error present
                 b/c it is the dummy node added by the symbolic execution engine
                 and used to show the value of the symbolic variables
             """
-            self.add_last_node(ast, node_state=node_state, node_id=node_id, node_children=node_children)
+            self.add_last_node(ast, node_state=node_state, node_id=node_id, pending_children=pending_children)
+        elif cut_off:
+            pass
         elif self.only_show_feasible_paths and not isfeasible:
             """
                 if code is only supposed to show feasible paths and this node is not feasible,
@@ -666,24 +1113,179 @@ class SourceCodeDigraph:
             """
             pass
         else:
-            self.add_node_from_ast_statements_below_in_same_body(ast, list(ast_path), node_state, node_id, node_children)
+            self.add_node_from_ast_statements_below_in_same_body(ast, list(ast_path), node_state, node_id, pending_children)
 
-            self.add_node_from_ast_statements_below_in_any_ast_body_above(ast, list(ast_path), node_state, node_id, node_children)
+            self.add_node_from_ast_statements_below_in_any_ast_body_above(ast, list(ast_path), node_state, node_id, pending_children)
 
 
 
-        return Node(node_type, node_statement, node_state, node_children, parent_node_id)
+        node = Node(node_type, node_statement, node_state if self.keep_node_states else None,
+                    [], parent_node_id)
+        if len(self.test_cases) > number_of_test_cases:
+            node.test_case_index = len(self.test_cases) - 1
 
+        return node, node_id, pending_children
 
-    def build_code_digraph(self):
+    def return_node_and_all_its_children(self, ast=None, ast_path=None,
+                                          node_state=None, parent_node_id=None):
         """
-            the digraph consists of the root node and all its siblings
+            This method returns node and all its siblings.
+            It sends the state of the previous node_state down to the child node.
         """
+        if ast_path == None:
+            ast_path    = [0]
+            node_state  = self.get_initial_node_state()
+
+        if self.tracer is not None:
+            self.tracer.begin(self.get_span_name(ast_path, ast), "subtree")
+        span_args = UNFINISHED_SPAN_ARGS
+        try:
+            node, node_id, pending_children = self.expand_node(ast, ast_path, node_state, parent_node_id)
+
+            deferred_test_case = None
+            if node.test_case_index is not None and self.first_child_is_if_statement_body(node, pending_children):
+                """
+                    the test case of an if-statement comes after the test cases of its body
+                    and before those of the statements below it, the order of an exploration
+                    which enters the body before the if-statement itself is solved
+                """
+                deferred_test_case = self.take_last_test_case()
+
+            for child_ast_path, child_node_state in pending_children:
+                node.children.append(
+                    self.return_node_and_all_its_children(ast=ast, ast_path=child_ast_path,
+                                                          node_state=child_node_state, parent_node_id=node_id)
+                )
+                if deferred_test_case is not None:
+                    node.test_case_index = self.put_back_test_case(deferred_test_case)
+                    deferred_test_case = None
+            span_args = {'node_id': node_id}
+        finally:
+            if self.tracer is not None:
+                self.tracer.end(span_args)
+        return node
+
+    def get_span_name(self, ast_path, ast):
+        """
+            names the span of a statement by its type and line, which is what
+            a flamegraph shows for the subtree explored from it
+        """
+        ast_statement = self.get_ast_statement_from_path(ast_path, ast)
+        return "{0} line {1}".format(type(ast_statement).__name__, getattr(ast_statement, 'lineno', '?'))
 
-        if self.create_visual:
-            self.visual_digraph = pgv.AGraph(strict=False, directed=True)
-            self.visual_digraph.layout(prog='dot')
-            self.visual_digraph.graph_attr['label']='State Space of Code'
-            self.visual_digraph.node_attr['shape']='rectangle' #circle, rectangle | box,
 
-        self.digraph    = self.return_node_and_all_its_children(ast=self.abstract_syntax_tree.body)
+    def make_frontier_item(self, ast_path, node_state, parent_node_id):
+        """
+            a frontier item is a statement waiting to be explored on some path,
+            together with the state of that path
+        """
+        self.frontier_item_count += 1
+        return {'item_id': self.frontier_item_count, 'ast_path': ast_path,
+                'node_state': node_state, 'parent_node_id': parent_node_id}
+
+    def explore_frontier(self, frontier, checkpoint=None):
+        """
+            param frontier: list of frontier items, the last one is explored first
+            param checkpoint: checkpoint.ExplorationCheckpoint or None
+            This does the same depth first exploration as return_node_and_all_its_children
+            but keeps the pending statements in frontier instead of on the call stack.
+            Returns the root node. Items whose parent was explored before a resumed
+            checkpoint have no parent here, they become children of a "Checkpoint" node
+        """
+        ast     = self.abstract_syntax_tree.body
+        nodes   = {}
+        roots   = []
+
+        while frontier:
+            frontier_item = frontier.pop()
+            if checkpoint is not None:
+                checkpoint.item_popped(frontier_item)
+
+            if self.tracer is not None:
+                self.tracer.begin(self.get_span_name(frontier_item['ast_path'], ast), "expand")
+            span_args = UNFINISHED_SPAN_ARGS
+            try:
+                node, node_id, pending_children = self.expand_node(ast, list(frontier_item['ast_path']),
+                                                                   frontier_item['node_state'],
+                                                                   frontier_item['parent_node_id'])
+                span_args = {'node_id': node_id}
+            finally:
+                if self.tracer is not None:
+                    self.tracer.end(span_args)
+            nodes[node_id] = node
+            if frontier_item['parent_node_id'] in nodes:
+                nodes[frontier_item['parent_node_id']].children.append(node)
+            else:
+                roots.append(node)
+
+            for child_ast_path, child_node_state in reversed(pending_children):
+                child_item = self.make_frontier_item(child_ast_path, child_node_state, node_id)
+                frontier.append(child_item)
+                if checkpoint is not None:
+                    checkpoint.item_pushed(child_item)
+
+            if checkpoint is not None:
+                checkpoint.node_expanded(self)
+
+        if len(roots) == 1:
+            return roots[0]
+        return Node("Checkpoint", "resumed from checkpoint", None, roots, None)
+
+    def close(self):
+        """
+            closes the solver backend when this digraph made it from its name, no other
+            digraph can use it. build_code_digraph calls it once the exploration is over,
+            a backend which is closed starts its worker processes again if it is used
+        """
+        if self.owns_solver_backend:
+            self.solver_backend.close()
+
+    def build_code_digraph(self, checkpoint=None, frontier=None):
+        """
+            the digraph consists of the root node and all its siblings
+            param checkpoint: checkpoint.ExplorationCheckpoint, when given the exploration
+                              periodically writes its frontier there and resumes from it
+                              if it holds an unfinished exploration
+            param frontier: frontier.SpillingFrontier, when given the pending statements are kept
+                            there, which writes them to disk past its number of items in memory.
+                            Nodes are then best built with keep_node_states=False
+        """
+        try:
+            self.exploration_start_time = time.time()
+
+            if self.create_visual:
+                if self.tracer is not None:
+                    self.tracer.begin("create visual digraph", "visual")
+                try:
+                    import pygraphviz as pgv
+
+                    self.visual_digraph = pgv.AGraph(strict=False, directed=True)
+                    self.visual_digraph.layout(prog='dot')
+                    self.visual_digraph.graph_attr['label']='State Space of Code'
+                    self.visual_digraph.node_attr['shape']='rectangle' #circle, rectangle | box,
+                finally:
+                    if self.tracer is not None:
+                        self.tracer.end()
+
+            if checkpoint is None and frontier is None:
+                self.digraph    = self.return_node_and_all_its_children(ast=self.abstract_syntax_tree.body)
+                return
+
+            frontier_items = None
+            if checkpoint is not None:
+                frontier_items = checkpoint.resume(self)
+            if frontier_items is None:
+                frontier_items = [self.make_frontier_item([0], self.get_initial_node_state(), None)]
+                if checkpoint is not None:
+                    checkpoint.item_pushed(frontier_items[0])
+
+            if frontier is not None:
+                for frontier_item in frontier_items:
+                    frontier.append(frontier_item)
+                frontier_items = frontier
+
+            self.digraph    = self.explore_frontier(frontier_items, checkpoint)
+            if checkpoint is not None:
+                checkpoint.exploration_finished(self)
+        finally:
+            self.close()
@@ -0,0 +1,576 @@
+#-------------------------------------------------------------------------------
+# Name:         distributed
+# Purpose:      Exploration shared by worker processes over TCP, with work stealing
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python -m halfwaytree.distributed coordinator SOURCE_FILE [--host h] [--port p] [--output path]
+           python -m halfwaytree.distributed worker [--host h] [--port p]
+
+    One coordinator holds the exploration of a source code, any number of workers,
+    on this host or others, connect to it and explore its paths. Every message is
+    a JSON object on a line of its own.
+
+        coordinator -> worker
+            setup       the source code, the SourceCodeDigraph options and a block of node ids
+            work        frontier items to explore
+            node_ids    the next block of node ids
+            share       asks a busy worker for half of its frontier
+            finish      the exploration is over
+
+        worker -> coordinator
+            nodes       the nodes explored since the last one, with their test cases, and
+                        the size of the frontier of the worker
+            node_ids    asks for the next block of node ids
+            shared      the frontier items given up on a share
+            idle        the frontier of the worker is empty
+            error       the traceback of an exception the worker stopped on
+
+    Frontier items are serialized by frontier.serialize_frontier_item: the ast path of
+    the statement, and the variables and constraints of the path as SMT-LIB2 terms,
+    with the position of the statement among the children of its parent.
+
+    Workers explore depth first. An idle worker is given a pending item, and when there
+    is none the busiest worker is asked to share: it gives up the bottom half of its
+    frontier, the items nearest the root, which lead to the largest subtrees.
+
+    Node ids are handed out in blocks, so the ids of the merged tree are unique and the
+    labels holding them are the ones of a single process. Every node is sent with its
+    position among the children of its parent, the merged tree orders children by it,
+    and test_cases are in the order a single process finds them.
+
+    Every worker summarizes the functions of the source code when it is set up, an
+    item it is handed may call a function whose definition another worker explored.
+"""
+
+import multiprocessing
+import collections
+import traceback
+import argparse
+import select
+import socket
+import json
+import time
+import sys
+import ast
+
+import halfwaytree.digraph as digraph
+from halfwaytree.smtlib import serialize_constraints, deserialize_constraints
+from halfwaytree.frontier import serialize_frontier_item, deserialize_frontier_item, deserialize_test_case
+
+
+class Connection:
+    """
+        A socket carrying JSON messages, one per line
+    """
+
+    def __init__(self, connected_socket):
+        self.socket     = connected_socket
+        self.chunks     = []
+        self.messages   = collections.deque()
+        self.closed     = False
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def send(self, message):
+        self.socket.sendall(json.dumps(message) + "\n")
+
+    def read(self):
+        """
+            reads what the socket holds, call it once select finds the socket readable
+        """
+        data = self.socket.recv(65536)
+        if data == "":
+            self.closed = True
+            return
+        if "\n" not in data:
+            self.chunks.append(data)
+            return
+
+        lines       = ("".join(self.chunks) + data).split("\n")
+        self.chunks = [lines.pop()]
+        self.messages.extend(json.loads(line) for line in lines if line)
+
+    def receive(self, timeout=None):
+        """
+            returns the next message, None when the timeout runs out or the connection is closed
+        """
+        while not self.messages and not self.closed:
+            readable, writable, failed = select.select([self.socket], [], [], timeout)
+            if not readable:
+                return None
+            self.read()
+        if self.messages:
+            return self.messages.popleft()
+        return None
+
+    def close(self):
+        self.socket.close()
+
+
+def serialize_work_item(frontier_item):
+    """
+        a frontier item handed between workers also holds its position among the children of its parent
+    """
+    serialized_item = serialize_frontier_item(frontier_item)
+    serialized_item['child_position'] = frontier_item['child_position']
+    return serialized_item
+
+
+def deserialize_work_item(serialized_item):
+    frontier_item = deserialize_frontier_item(serialized_item)
+    frontier_item['child_position'] = serialized_item['child_position']
+    return frontier_item
+
+
+def make_root_item():
+    """
+        the serialized frontier item of the first statement, it holds no symbolic value
+    """
+    return serialize_work_item({'item_id': 0, 'ast_path': [0], 'parent_node_id': None, 'child_position': 0,
+                                'node_state': {'constraints': [], 'variables': {}, 'type': None}})
+
+
+class Coordinator:
+    """
+        Hands out the work of an exploration to the workers connected to it and
+        merges what they explore. After run, test_cases, path_conditions, node_count
+        and digraph are those of a SourceCodeDigraph built with keep_node_states=False.
+    """
+
+    def __init__(self, source_code, host="localhost", port=0, digraph_options=None, node_id_block_size=1000):
+        """
+            param source_code: string, headless like every worker digraph, so it should end with a print
+            param port: int, 0 picks a free port, see address
+            param digraph_options: dictionary of SourceCodeDigraph keyword arguments passed to
+                                   every worker, they must be JSON serializable
+            param node_id_block_size: int, node ids handed to a worker at a time
+        """
+        self.source_code        = source_code
+        self.digraph_options    = digraph_options or {}
+        self.node_id_block_size = node_id_block_size
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(16)
+        self.address = self.server.getsockname()
+
+        """
+            workers maps the connection of every worker to its state: whether it is idle,
+            the size of its frontier and whether it was asked to share
+        """
+        self.workers        = {}
+        self.pending_items  = [make_root_item()]
+        self.started        = False
+        self.next_node_id   = 0
+        self.records        = []
+
+        self.test_cases         = []
+        self.path_conditions    = []
+        self.node_count         = 0
+        self.digraph            = None
+
+        self.statistics = {'workers': 0, 'share_requests': 0, 'steals': 0, 'stolen_items': 0,
+                           'node_id_blocks': 0, 'nodes_by_worker': [], 'seconds': 0.0}
+
+    def get_node_id_block(self):
+        first_node_id       = self.next_node_id
+        self.next_node_id  += self.node_id_block_size
+        self.statistics['node_id_blocks'] += 1
+        return {'type': 'node_ids', 'first': first_node_id, 'count': self.node_id_block_size}
+
+    def accept_worker(self):
+        connected_socket, address = self.server.accept()
+        connection = Connection(connected_socket)
+        connection.send({'type': 'setup', 'source_code': self.source_code, 'options': self.digraph_options,
+                         'node_ids': self.get_node_id_block()})
+        self.workers[connection] = {'idle': False, 'frontier_size': 0, 'share_requested': False,
+                                    'index': self.statistics['workers']}
+        self.statistics['workers'] += 1
+        self.statistics['nodes_by_worker'].append(0)
+
+    def handle_message(self, connection, message):
+        worker = self.workers[connection]
+        if message['type'] == 'nodes':
+            self.records += message['nodes']
+            worker['frontier_size'] = message['frontier_size']
+            self.statistics['nodes_by_worker'][worker['index']] += len(message['nodes'])
+
+        elif message['type'] == 'node_ids':
+            connection.send(self.get_node_id_block())
+
+        elif message['type'] == 'shared':
+            worker['share_requested'] = False
+            worker['frontier_size']   = message['frontier_size']
+            if message['items']:
+                self.statistics['steals']        += 1
+                self.statistics['stolen_items']  += len(message['items'])
+            #items are popped from the end, the items nearest the root are handed out first
+            self.pending_items += reversed(message['items'])
+
+        elif message['type'] == 'idle':
+            worker['idle']          = True
+            worker['frontier_size'] = 0
+
+        elif message['type'] == 'error':
+            raise RuntimeError("a worker failed:\n" + message['error'])
+
+    def dispatch(self):
+        """
+            gives a pending item to every idle worker, and asks the busiest
+            workers to share when there are not enough of them
+        """
+        idle_workers = [connection for connection, worker in self.workers.iteritems() if worker['idle']]
+        while idle_workers and self.pending_items:
+            connection = idle_workers.pop()
+            self.workers[connection]['idle'] = False
+            connection.send({'type': 'work', 'items': [self.pending_items.pop()]})
+            self.started = True
+
+        share_requests = len([worker for worker in self.workers.itervalues() if worker['share_requested']])
+        busy_workers = sorted([(worker['frontier_size'], connection)
+                               for connection, worker in self.workers.iteritems()
+                               if not worker['idle'] and not worker['share_requested'] and
+                               worker['frontier_size'] > 1], reverse=True)
+        for frontier_size, connection in busy_workers[:max(len(idle_workers) - share_requests, 0)]:
+            self.workers[connection]['share_requested'] = True
+            self.statistics['share_requests'] += 1
+            connection.send({'type': 'share'})
+
+    def is_finished(self):
+        return self.started and not self.pending_items and \
+            all(worker['idle'] and not worker['share_requested'] for worker in self.workers.itervalues())
+
+    def run(self):
+        """
+            serves the workers until the exploration is over, then merges what they explored
+        """
+        start_time = time.time()
+        try:
+            while not self.is_finished():
+                readable, writable, failed = select.select([self.server] + self.workers.keys(), [], [])
+                for ready in readable:
+                    if ready is self.server:
+                        self.accept_worker()
+                        continue
+
+                    ready.read()
+                    while ready.messages:
+                        self.handle_message(ready, ready.messages.popleft())
+                    if ready.closed:
+                        if not self.workers[ready]['idle']:
+                            raise RuntimeError("a worker disconnected before its work was explored")
+                        del self.workers[ready]
+                self.dispatch()
+        finally:
+            for connection in self.workers:
+                try:
+                    connection.send({'type': 'finish'})
+                except socket.error:
+                    pass
+                connection.close()
+            self.server.close()
+            self.statistics['seconds'] = time.time() - start_time
+
+        self.merge_records()
+
+    def merge_records(self):
+        """
+            builds the tree of the nodes the workers explored, and the test cases in the
+            order of a single process, see SourceCodeDigraph.return_node_and_all_its_children
+        """
+        nodes       = {}
+        roots       = []
+        test_cases  = {}
+        for node_id, parent_node_id, child_position, node_type, statement, test_case, path_condition, \
+                test_case_after_body in self.records:
+            nodes[node_id] = digraph.Node(str(node_type), statement.encode("utf-8"), None, [], parent_node_id)
+            if path_condition is not None:
+                test_cases[node_id] = (test_case, path_condition, test_case_after_body)
+
+        #siblings may be explored by different workers, in any order
+        for node_id, parent_node_id, child_position, node_type, statement, test_case, path_condition, \
+                test_case_after_body in sorted(self.records, key=lambda record: record[2]):
+            if parent_node_id is None:
+                roots.append(nodes[node_id])
+            else:
+                nodes[parent_node_id].children.append(nodes[node_id])
+
+        self.node_count = len(self.records)
+        self.digraph    = roots[0] if roots else None
+        node_ids        = dict((id(node), node_id) for node_id, node in nodes.iteritems())
+
+        #the stack holds nodes, and the ids of nodes whose test case comes after the subtree of their body
+        stack = [self.digraph] if self.digraph is not None else []
+        while stack:
+            entry = stack.pop()
+            if not isinstance(entry, digraph.Node):
+                self.add_test_case(nodes[entry], *test_cases[entry][:2])
+                continue
+
+            node_id     = node_ids[id(entry)]
+            children    = list(reversed(entry.children))
+            if node_id in test_cases:
+                test_case, path_condition, test_case_after_body = test_cases[node_id]
+                if test_case_after_body:
+                    children.insert(len(children) - 1, node_id)
+                else:
+                    self.add_test_case(entry, test_case, path_condition)
+            stack += children
+        self.records = []
+
+    def add_test_case(self, node, test_case, path_condition):
+        node.test_case_index = len(self.test_cases)
+        self.test_cases.append(deserialize_test_case(test_case))
+        self.path_conditions.append(deserialize_constraints(path_condition))
+
+    def report(self):
+        return "distributed exploration: {0} nodes by {1} workers ({2}), {3} steals of {4} items " \
+               "out of {5} share requests, {6} node id blocks, {7:.1f} s".format(
+                   self.node_count, self.statistics['workers'],
+                   ", ".join(str(node_count) for node_count in self.statistics['nodes_by_worker']),
+                   self.statistics['steals'], self.statistics['stolen_items'],
+                   self.statistics['share_requests'], self.statistics['node_id_blocks'],
+                   self.statistics['seconds'])
+
+
+class Worker:
+    """
+        Explores the frontier items a Coordinator hands out, depth first, with a
+        headless SourceCodeDigraph which does not keep node states
+    """
+
+    def __init__(self, host="localhost", port=None, batch_size=100, flush_interval=0.05):
+        """
+            param batch_size: int, explored nodes are sent once this many are waiting
+            param flush_interval: float, seconds after which waiting nodes are sent anyway,
+                                  which keeps the coordinator aware of the size of the frontier
+        """
+        self.host           = host
+        self.port           = port
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+
+        self.connection             = None
+        self.source_code_digraph    = None
+        self.frontier               = []
+        self.records                = []
+        self.last_flush_time        = time.time()
+        self.node_id_end            = 0
+        self.node_id_block_size     = 0
+        self.next_node_ids          = None
+        self.requested_node_ids     = False
+        self.idle                   = False
+        self.finished               = False
+
+        self.statistics = {'nodes': 0, 'shared_items': 0, 'received_items': 0}
+
+    def run(self):
+        self.connection = Connection(socket.create_connection((self.host, self.port)))
+        try:
+            setup   = self.receive()
+            options = dict((str(name), value) for name, value in setup['options'].iteritems())
+            options.update(create_visual=False, keep_node_states=False)
+            self.source_code_digraph = digraph.SourceCodeDigraph(setup['source_code'], **options)
+            self.summarize_functions(self.source_code_digraph.abstract_syntax_tree.body, [])
+            self.use_node_ids(setup['node_ids'])
+            self.explore()
+        except Exception:
+            try:
+                self.connection.send({'type': 'error', 'error': traceback.format_exc()})
+            except socket.error:
+                pass
+            raise
+        finally:
+            self.connection.close()
+            if self.source_code_digraph is not None:
+                #workers expand nodes without build_code_digraph, which would close the solver backend
+                self.source_code_digraph.close()
+
+    def summarize_functions(self, ast_body, ast_path):
+        """
+            summarizes the functions defined in ast_body and in the bodies of its if-statements,
+            in source order. Expanding a definition summarizes it again, as in a single process
+        """
+        for index, ast_statement in enumerate(ast_body):
+            statement_path = ast_path + [index]
+            if isinstance(ast_statement, ast.FunctionDef):
+                self.source_code_digraph.define_function(ast_statement, statement_path)
+            elif isinstance(ast_statement, ast.If):
+                self.summarize_functions(ast_statement.body, statement_path + ['b'])
+
+    def receive(self, timeout=None):
+        message = self.connection.receive(timeout)
+        if message is None and self.connection.closed:
+            raise RuntimeError("the coordinator closed the connection")
+        return message
+
+    def use_node_ids(self, node_ids):
+        self.source_code_digraph.node_count = node_ids['first']
+        self.node_id_end                    = node_ids['first'] + node_ids['count']
+        self.node_id_block_size             = node_ids['count']
+
+    def handle_message(self, message):
+        if message['type'] == 'work':
+            self.frontier += [deserialize_work_item(item) for item in message['items']]
+            self.statistics['received_items'] += len(message['items'])
+            self.idle = False
+
+        elif message['type'] == 'node_ids':
+            self.next_node_ids      = message
+            self.requested_node_ids = False
+
+        elif message['type'] == 'share':
+            #the bottom of the stack is nearest the root
+            shared_items    = self.frontier[:len(self.frontier) // 2]
+            self.frontier   = self.frontier[len(self.frontier) // 2:]
+            self.flush()
+            self.connection.send({'type': 'shared', 'frontier_size': len(self.frontier),
+                                  'items': [serialize_work_item(frontier_item) for frontier_item in shared_items]})
+            self.statistics['shared_items'] += len(shared_items)
+
+        elif message['type'] == 'finish':
+            self.finished = True
+
+    def take_node_id(self):
+        """
+            makes sure the digraph gives the next node a node id of a block handed to this worker
+        """
+        remaining_node_ids = self.node_id_end - self.source_code_digraph.node_count
+        if remaining_node_ids <= self.node_id_block_size // 2 and self.next_node_ids is None and \
+                not self.requested_node_ids:
+            #the next block is asked for early, so it is there when this one runs out
+            self.connection.send({'type': 'node_ids'})
+            self.requested_node_ids = True
+
+        if remaining_node_ids <= 0:
+            while self.next_node_ids is None:
+                self.handle_message(self.receive())
+            self.use_node_ids(self.next_node_ids)
+            self.next_node_ids = None
+
+    def flush(self):
+        if self.records:
+            self.connection.send({'type': 'nodes', 'nodes': self.records, 'frontier_size': len(self.frontier)})
+            self.records = []
+        self.last_flush_time = time.time()
+
+    def expand(self, frontier_item):
+        source_code_digraph = self.source_code_digraph
+        self.take_node_id()
+        node, node_id, pending_children = source_code_digraph.expand_node(
+            source_code_digraph.abstract_syntax_tree.body, list(frontier_item['ast_path']),
+            frontier_item['node_state'], frontier_item['parent_node_id'])
+
+        test_case, path_condition, test_case_after_body = None, None, False
+        if node.test_case_index is not None:
+            test_case               = source_code_digraph.test_cases[node.test_case_index]
+            path_condition          = serialize_constraints(source_code_digraph.path_conditions[node.test_case_index])
+            test_case_after_body    = source_code_digraph.first_child_is_if_statement_body(node, pending_children)
+        #test cases are sent with their node, the worker does not keep them
+        source_code_digraph.test_cases      = []
+        source_code_digraph.path_conditions = []
+
+        self.records.append([node_id, frontier_item['parent_node_id'], frontier_item['child_position'],
+                             node.type, node.statement, test_case, path_condition, test_case_after_body])
+        for child_position in reversed(range(len(pending_children))):
+            child_ast_path, child_node_state    = pending_children[child_position]
+            child_item                          = source_code_digraph.make_frontier_item(child_ast_path,
+                                                                                         child_node_state, node_id)
+            child_item['child_position']        = child_position
+            self.frontier.append(child_item)
+        self.statistics['nodes'] += 1
+
+    def explore(self):
+        while not self.finished:
+            if not self.frontier:
+                self.flush()
+                if not self.idle:
+                    self.connection.send({'type': 'idle'})
+                    self.idle = True
+                self.handle_message(self.receive())
+                continue
+
+            #messages are answered between two nodes, without waiting for them
+            message = self.receive(0)
+            if message is not None:
+                self.handle_message(message)
+                continue
+
+            self.expand(self.frontier.pop())
+            if len(self.records) >= self.batch_size or time.time() - self.last_flush_time > self.flush_interval:
+                self.flush()
+
+    def report(self):
+        return "worker: {0} nodes explored, {1} items received, {2} shared".format(
+            self.statistics['nodes'], self.statistics['received_items'], self.statistics['shared_items'])
+
+
+def run_worker(host, port):
+    Worker(host, port).run()
+
+
+def explore_on_localhost(source_code, worker_count=2, **digraph_options):
+    """
+        runs a Coordinator in this process and worker_count Worker processes on localhost
+        returns the Coordinator, after its exploration
+    """
+    coordinator = Coordinator(source_code, digraph_options=digraph_options)
+    host, port  = coordinator.address
+    processes   = [multiprocessing.Process(target=run_worker, args=(host, port)) for index in range(worker_count)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    try:
+        coordinator.run()
+    finally:
+        for process in processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+    return coordinator
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m halfwaytree.distributed",
+                                     description="Exploration shared by workers connected over TCP")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("source_file", nargs="?", help="the source code the coordinator explores")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7321)
+    parser.add_argument("--output", default=None, help="JSON file of the test cases, standard output by default")
+    options = parser.parse_args(arguments)
+
+    if options.role == "worker":
+        worker = Worker(options.host, options.port)
+        worker.run()
+        sys.stderr.write(worker.report() + "\n")
+        return
+
+    if options.source_file is None:
+        parser.error("the coordinator needs a source file")
+    with open(options.source_file) as source_file:
+        coordinator = Coordinator(source_file.read(), host=options.host, port=options.port)
+    coordinator.run()
+
+    result = json.dumps({'node_count': coordinator.node_count, 'test_cases': coordinator.test_cases})
+    if options.output is None:
+        sys.stdout.write(result + "\n")
+    else:
+        with open(options.output, 'w') as output_file:
+            output_file.write(result + "\n")
+    sys.stderr.write(coordinator.report() + "\n")
+
+
+if __name__ == "__main__":
+    main()
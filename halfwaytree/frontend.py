@@ -0,0 +1,418 @@
+#-------------------------------------------------------------------------------
+# Name:         frontend
+# Purpose:      Validates and normalizes the ast before it is explored
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import __builtin__
+import operator
+import ast
+
+import halfwaytree.astor as astor
+from halfwaytree.astor import TreeWalk
+
+#statements the symbolic execution engine runs, loops are rewritten before the front end
+SUPPORTED_STATEMENTS = ["Assign", "AugAssign", "If", "Print", "Assert", "FunctionDef", "Return", "Pass", "Expr"]
+
+#every other node the ast may hold, expressions, operators and the pieces they are made of
+SUPPORTED_NODES = SUPPORTED_STATEMENTS + [
+    "Module", "arguments", "keyword",
+    "Num", "Str", "Name", "BinOp", "UnaryOp", "BoolOp", "Compare", "Call",
+    "Load", "Store", "Param",
+    "Add", "Sub", "Mult", "Div", "Mod", "Pow", "FloorDiv", "LShift", "RShift", "BitOr", "BitXor", "BitAnd",
+    "USub", "UAdd", "Invert", "And",
+    "Eq", "NotEq", "Lt", "LtE", "Gt", "GtE"]
+
+BINARY_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.Div: operator.div, ast.Mod: operator.mod, ast.FloorDiv: operator.floordiv,
+                    ast.Pow: operator.pow, ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+                    ast.BitOr: operator.or_, ast.BitXor: operator.xor, ast.BitAnd: operator.and_}
+
+UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Invert: operator.invert}
+
+#an unrolled loop calls it where a path would need more iterations than were unrolled, the path ends there
+LOOP_BOUND_FUNCTION = "__loop_bound_exceeded__"
+
+#names of loops.get_trip_count and loops.get_last_loop_value in the scope symbolic statements run in
+TRIP_COUNT_FUNCTION = "__trip_count__"
+LAST_VALUE_FUNCTION = "__last_loop_value__"
+
+#names a function body reads without defining them, besides the functions defined above it
+BUILTIN_NAMES = set(dir(__builtin__)) | set([LOOP_BOUND_FUNCTION, TRIP_COUNT_FUNCTION, LAST_VALUE_FUNCTION])
+
+#the comparison which is true when a comparison of the key is false
+NEGATED_COMPARISONS = {ast.Eq: ast.NotEq, ast.NotEq: ast.Eq, ast.Lt: ast.GtE, ast.GtE: ast.Lt,
+                       ast.Gt: ast.LtE, ast.LtE: ast.Gt}
+
+
+class UnsupportedConstruct(Exception):
+    """
+        raised before any path is explored when the source code holds a construct
+        the engine does not run, the message tells which one and its line
+    """
+    pass
+
+
+def get_names(expressions):
+    """
+        returns the set of variable and function names read by a list of expressions
+    """
+    return set(node.id for expression in expressions if expression is not None
+               for node in ast.walk(expression) if isinstance(node, ast.Name))
+
+
+def get_condition_values(test):
+    """
+        returns the list of conditions of an if-statement test, which the front end
+        made a single condition or a flat and-chain of conditions
+    """
+    if isinstance(test, ast.BoolOp):
+        return test.values
+    return [test]
+
+
+def is_docstring(statement):
+    return isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Str)
+
+
+def is_assert_false(statement):
+    """
+        returns True for an assert which always fails, such as assert False or assert 0
+    """
+    test = statement.test
+    return isinstance(statement, ast.Assert) and (isinstance(test, ast.Name) and test.id == "False" or
+                                                  isinstance(test, ast.Num) and test.n == 0)
+
+
+def negate_comparison(comparison):
+    return ast.copy_location(ast.Compare(left=comparison.left, ops=[NEGATED_COMPARISONS[type(comparison.ops[0])]()],
+                                         comparators=comparison.comparators), comparison)
+
+
+def is_loop_bound_exceeded(statement):
+    return isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call) and \
+        isinstance(statement.value.func, ast.Name) and statement.value.func.id == LOOP_BOUND_FUNCTION
+
+
+class FrontEnd(TreeWalk):
+    """
+        One walk over the ast, after loops are rewritten, which:
+            raises UnsupportedConstruct on the first construct the engine does not
+            support, before any path is explored. Calls are the only expression
+            statements supported, of a function defined above them, at the top
+            level of the module. If-statements
+            have no else or elif, every condition of a test is a comparison, and
+            function bodies only read their parameters and local variables
+            rewrites x += 1 as x = x + 1 and drops docstrings
+            rewrites assert a < b and c == d as one if-statement per condition,
+            if a >= b: assert False, and if c != d: assert False. The engine runs
+            every assert as assert False, the error is reached on its path
+            turns nested and-chains and comparison chains of if-statement tests into
+            one flat and-chain, the engine makes a constraint of each condition
+            folds arithmetic on integer literals, except a whole right hand side:
+            x = 2 + 3 keeps x concrete, while x = 5 would make x a symbolic input
+
+        Every statement is given, as attributes:
+            statement_id: int, numbered in source order, the same for the same source code
+            reads: frozenset of the names it reads, for an if-statement those of its test
+            writes: frozenset of the names it assigns
+            source: string, its source code. If-statements have condition_sources instead,
+            the source code of each condition of their test
+    """
+
+    def init_front_end(self):
+        self.statement_count    = 0
+        #names of the functions defined so far, which call statements may call
+        self.function_names     = set()
+        self.statistics         = {'statements': 0, 'folded_constants': 0, 'split_conditions': 0,
+                                   'rewritten_statements': 0}
+
+    def get_line_number(self):
+        for node, name, subnodes, index in reversed(self.nodestack):
+            if hasattr(node, 'lineno'):
+                return node.lineno
+        return None
+
+    def pre_unsupported(self):
+        node_type = type(self.cur_node).__name__
+        if node_type == "Or":
+            message = "or is not supported, use nested if-statements"
+        elif node_type == "Not":
+            message = "not is not supported, negate the comparison instead"
+        else:
+            message = "{0} is not supported".format(node_type)
+        raise UnsupportedConstruct("{0}, line {1}".format(message, self.get_line_number()))
+
+    #----------------------------------------------------------------statements
+    def next_statement_id(self):
+        self.statement_count += 1
+        return self.statement_count - 1
+
+    def pre_statement(self):
+        self.cur_node.statement_id = self.next_statement_id()
+
+    pre_Assign = pre_Print = pre_Assert = pre_Return = pre_Pass = pre_statement
+
+    def pre_If(self):
+        self.pre_statement()
+        if self.cur_node.orelse:
+            raise UnsupportedConstruct("else and elif are not supported, use an if-statement with the negated "
+                                       "test instead, line {0}".format(self.cur_node.lineno))
+
+    def check_conditions(self):
+        """
+            raises UnsupportedConstruct unless every condition of the test of the current statement
+            is a comparison, the engine makes a constraint of each and negates it on the false branch
+        """
+        for condition in get_condition_values(self.cur_node.test):
+            if not isinstance(condition, ast.Compare):
+                raise UnsupportedConstruct("conditions which are not comparisons are not supported, compare "
+                                           "{0} with a value instead, line {1}".format(
+                                               astor.to_source(condition), self.cur_node.lineno))
+
+    def pre_FunctionDef(self):
+        self.pre_statement()
+        if not isinstance(self.nodestack[-3][0], ast.Module):
+            #the engine keeps one definition per name for every path
+            raise UnsupportedConstruct("functions are only supported when defined at the top level of the "
+                                       "module, line {0}".format(self.cur_node.lineno))
+        #the body may call the function, which raises when the call is run
+        self.function_names.add(self.cur_node.name)
+
+    def pre_AugAssign(self):
+        self.pre_statement()
+        if not isinstance(self.cur_node.target, ast.Name):
+            self.pre_unsupported()
+
+    def is_function_call(self, expression):
+        return isinstance(expression, ast.Call) and isinstance(expression.func, ast.Name) and \
+            expression.func.id in self.function_names
+
+    def pre_Expr(self):
+        if self.is_function_call(self.cur_node.value) or is_loop_bound_exceeded(self.cur_node):
+            #a call statement is run for its side effects, its arguments are walked
+            self.pre_statement()
+            return
+        if not is_docstring(self.cur_node):
+            raise UnsupportedConstruct("expression statements are only supported for calls of a function "
+                                       "defined above, line {0}".format(self.cur_node.lineno))
+        self.pre_statement()
+        #docstrings are dropped, their string is not walked
+        return True
+
+    def post_statement(self):
+        statement = self.cur_node
+        self.statistics['statements'] += 1
+        reads, writes = [], []
+
+        if isinstance(statement, ast.Assign):
+            if len(statement.targets) != 1 or not isinstance(statement.targets[0], ast.Name):
+                raise UnsupportedConstruct("only assignments to one variable are supported, line {0}".format(
+                    statement.lineno))
+            reads, writes = [statement.value], [statement.targets[0].id]
+        elif isinstance(statement, ast.If):
+            reads = [statement.test]
+            statement.condition_sources = [astor.to_source(condition)
+                                           for condition in get_condition_values(statement.test)]
+        elif isinstance(statement, ast.Print):
+            reads = statement.values
+        elif isinstance(statement, (ast.Assert, ast.Return)):
+            reads = [getattr(statement, 'test', None) or getattr(statement, 'value', None)]
+        elif isinstance(statement, ast.Expr):
+            reads = [statement.value]
+        elif isinstance(statement, ast.FunctionDef):
+            writes = [statement.name]
+
+        statement.reads     = frozenset(get_names(reads))
+        statement.writes    = frozenset(writes)
+        if not isinstance(statement, ast.If):
+            statement.source = astor.to_source(statement)
+
+    #docstrings are not walked, so post_Expr only sees call statements
+    post_Assign = post_Print = post_Return = post_Pass = post_Expr = post_statement
+
+    def post_If(self):
+        self.check_conditions()
+        self.post_statement()
+
+    def post_Assert(self):
+        if not is_assert_false(self.cur_node):
+            #post_body_name splits it into if-statements
+            self.check_conditions()
+        self.post_statement()
+
+    def post_FunctionDef(self):
+        function_definition = self.cur_node
+        self.post_statement()
+
+        statements  = [node for node in ast.walk(function_definition)
+                       if node is not function_definition and hasattr(node, 'reads')]
+        defined     = set(argument.id for argument in function_definition.args.args)
+        defined.update(name for statement in statements for name in statement.writes)
+        read        = set(name for statement in statements for name in statement.reads)
+
+        global_names = sorted(read - defined - self.function_names - BUILTIN_NAMES)
+        if global_names:
+            raise UnsupportedConstruct("{0}() reads {1}, function bodies only read their parameters and local "
+                                       "variables, pass it as an argument instead, line {2}".format(
+                                           function_definition.name, ", ".join(global_names),
+                                           function_definition.lineno))
+
+    def post_AugAssign(self):
+        statement   = self.cur_node
+        assignment  = ast.Assign(targets=[ast.Name(id=statement.target.id, ctx=ast.Store())],
+                                 value=ast.BinOp(left=ast.Name(id=statement.target.id, ctx=ast.Load()),
+                                                 op=statement.op, right=statement.value))
+        assignment.statement_id = statement.statement_id
+        ast.copy_location(assignment, statement)
+        ast.fix_missing_locations(assignment)
+
+        self.statistics['rewritten_statements'] += 1
+        self.replace(assignment)
+        self.cur_node = assignment
+        self.post_statement()
+
+    def split_assert(self, assert_statement):
+        """
+            returns one if-statement per condition of the assert, which runs assert False
+            when the condition is false
+        """
+        if_statements = []
+        for condition in get_condition_values(assert_statement.test):
+            failing_assert = ast.copy_location(ast.Assert(test=ast.Name(id="False", ctx=ast.Load()),
+                                                          msg=assert_statement.msg), assert_statement)
+            if_statement = ast.copy_location(ast.If(test=negate_comparison(condition), body=[failing_assert],
+                                                    orelse=[]), assert_statement)
+            ast.fix_missing_locations(if_statement)
+
+            #the first if-statement keeps the statement_id of the assert
+            if_statement.statement_id = assert_statement.statement_id if if_statements == [] else \
+                self.next_statement_id()
+            failing_assert.statement_id = self.next_statement_id()
+            for statement in [failing_assert, if_statement]:
+                self.cur_node = statement
+                self.post_statement()
+            if_statements.append(if_statement)
+
+        self.statistics['rewritten_statements'] += 1
+        return if_statements
+
+    def post_body_name(self):
+        body = self.cur_node
+        if any(isinstance(statement, ast.Assert) and not is_assert_false(statement) for statement in body):
+            statements = []
+            for statement in body:
+                if isinstance(statement, ast.Assert) and not is_assert_false(statement):
+                    statements += self.split_assert(statement)
+                else:
+                    statements.append(statement)
+            body[:] = statements
+
+        if not any(is_docstring(statement) for statement in body):
+            return
+
+        statements = [statement for statement in body if not is_docstring(statement)]
+        if statements == []:
+            #a body with only a docstring still needs a statement
+            pass_statement = ast.copy_location(ast.Pass(), body[0])
+            pass_statement.statement_id = body[0].statement_id
+            self.cur_node = pass_statement
+            self.post_statement()
+            statements = [pass_statement]
+        self.statistics['rewritten_statements'] += 1
+        body[:] = statements
+
+    #----------------------------------------------------------------expressions
+    def is_assigned_value(self):
+        """
+            returns True when the current node is the whole right hand side of an assignment
+        """
+        return isinstance(self.parent, ast.Assign) and self.cur_name == 'value'
+
+    def is_condition(self):
+        """
+            returns True when the current node is an if-statement test or a condition of one
+        """
+        parent = self.parent
+        if isinstance(parent, (ast.If, ast.Assert)) and self.cur_name == 'test':
+            return True
+        return isinstance(parent, list) and len(self.nodestack) >= 3 and \
+            isinstance(self.nodestack[-3][0], ast.BoolOp)
+
+    def pre_BoolOp(self):
+        if not self.is_condition():
+            raise UnsupportedConstruct("and is only supported in if-statement tests, line {0}".format(
+                self.get_line_number()))
+
+    def post_BoolOp(self):
+        values = []
+        for value in self.cur_node.values:
+            if isinstance(value, ast.BoolOp):
+                values += value.values
+                self.statistics['split_conditions'] += 1
+            else:
+                values.append(value)
+        self.cur_node.values = values
+
+    def post_Compare(self):
+        compare = self.cur_node
+        if len(compare.ops) == 1 or not self.is_condition():
+            return
+
+        #a < b < c is the and-chain a < b and b < c
+        operands = [compare.left] + compare.comparators
+        conditions = [ast.copy_location(ast.Compare(left=left, ops=[comparison_operator], comparators=[right]),
+                                        compare)
+                      for left, comparison_operator, right in zip(operands, compare.ops, operands[1:])]
+        self.statistics['split_conditions'] += 1
+        self.replace(ast.copy_location(ast.BoolOp(op=ast.And(), values=conditions), compare))
+
+    def fold(self, value):
+        self.statistics['folded_constants'] += 1
+        self.replace(ast.copy_location(ast.Num(n=value), self.cur_node))
+
+    def post_BinOp(self):
+        expression = self.cur_node
+        if self.is_assigned_value() or not (isinstance(expression.left, ast.Num) and
+                                            isinstance(expression.right, ast.Num)):
+            return
+        left, right = expression.left.n, expression.right.n
+        if not isinstance(left, (int, long)) or not isinstance(right, (int, long)):
+            return
+        if isinstance(expression.op, (ast.Div, ast.Mod, ast.FloorDiv)) and right == 0:
+            #the error is raised when the statement runs
+            return
+        if isinstance(expression.op, (ast.Pow, ast.LShift, ast.RShift)) and not 0 <= right <= 64:
+            return
+        self.fold(BINARY_OPERATORS[type(expression.op)](left, right))
+
+    def post_UnaryOp(self):
+        expression = self.cur_node
+        if self.is_assigned_value() or not isinstance(expression.operand, ast.Num):
+            return
+        self.fold(UNARY_OPERATORS[type(expression.op)](expression.operand.n))
+
+
+for node_name in dir(ast):
+    node_class = getattr(ast, node_name)
+    if isinstance(node_class, type) and issubclass(node_class, ast.AST) and node_name not in SUPPORTED_NODES and \
+            not hasattr(FrontEnd, 'pre_' + node_name):
+        setattr(FrontEnd, 'pre_' + node_name, FrontEnd.pre_unsupported.im_func)
+
+
+def run_front_end(abstract_syntax_tree, function_names=()):
+    """
+        validates and normalizes abstract_syntax_tree in place, see FrontEnd
+        param function_names: names of the functions defined before the source code, which it may call
+        returns the statistics of the FrontEnd
+    """
+    front_end = FrontEnd()
+    front_end.function_names.update(function_names)
+    front_end.walk(abstract_syntax_tree)
+    return front_end.statistics
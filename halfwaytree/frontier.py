@@ -0,0 +1,152 @@
+#-------------------------------------------------------------------------------
+# Name:         frontier
+# Purpose:      Exploration frontier which spills pending paths to disk
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import shutil
+import heapq
+import json
+import os
+
+from halfwaytree.smtlib import serialize_node_state, deserialize_node_state
+
+
+def serialize_frontier_item(frontier_item):
+    """
+        returns a JSON serializable dictionary, the node state is held as SMT-LIB2 terms
+    """
+    return {'item_id': frontier_item['item_id'],
+            'ast_path': frontier_item['ast_path'],
+            'node_state': serialize_node_state(frontier_item['node_state']),
+            'parent_node_id': frontier_item['parent_node_id']}
+
+
+def deserialize_frontier_item(serialized_item):
+    return {'item_id': serialized_item['item_id'],
+            'ast_path': [str(item) if not isinstance(item, int) else item
+                         for item in serialized_item['ast_path']],
+            'node_state': deserialize_node_state(serialized_item['node_state']),
+            'parent_node_id': serialized_item['parent_node_id']}
+
+
+def deserialize_test_case(test_case):
+    """
+        JSON gives back unicode, test cases hold str like the ones made by get_solutions
+    """
+    if isinstance(test_case, dict):
+        return dict((str(variable), str(value)) for variable, value in test_case.iteritems())
+    return test_case
+
+
+def get_item_id(frontier_item):
+    return frontier_item['item_id']
+
+
+class SpillingFrontier:
+    """
+        A frontier for SourceCodeDigraph.explore_frontier which holds at most
+        max_items frontier items in memory. Past that, the lowest priority half
+        is written to a segment file, and segments are read back once the items
+        in memory have a lower priority than the best one they hold.
+
+        By default the priority is the item id, items pushed last are explored
+        first, so the exploration is the usual depth first one: only the bottom
+        of the stack is spilled, and a segment is read back once everything
+        above it was explored.
+    """
+
+    def __init__(self, max_items=10000, directory=None, priority=get_item_id):
+        """
+            param max_items: int, frontier items kept in memory
+            param directory: string, where segments are written, a temporary directory by default
+            param priority: function of a frontier item, higher priorities are explored first
+        """
+        self.max_items          = max_items
+        self.priority           = priority
+        self.owns_directory     = directory is None
+        self.directory          = tempfile.mkdtemp(prefix="halfwaytree-frontier-") if directory is None \
+                                  else directory
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        #heap of (-priority, item_id, frontier item), the best item comes first
+        self.items              = []
+        #heap of (-best priority, segment path, item count)
+        self.segments           = []
+        self.segment_count      = 0
+        self.spilled_item_count = 0
+
+        self.statistics = {'spilled_items': 0, 'loaded_items': 0, 'segments': 0, 'max_items_in_memory': 0}
+
+    def __len__(self):
+        return len(self.items) + self.spilled_item_count
+
+    def append(self, frontier_item):
+        heapq.heappush(self.items, (-self.priority(frontier_item), frontier_item['item_id'], frontier_item))
+        self.statistics['max_items_in_memory'] = max(self.statistics['max_items_in_memory'], len(self.items))
+        if len(self.items) > self.max_items:
+            self.spill()
+
+    def pop(self):
+        while self.segments and (not self.items or self.segments[0][0] < self.items[0][0]):
+            self.load_segment()
+        return heapq.heappop(self.items)[2]
+
+    def spill(self):
+        """
+            writes the lowest priority half of the items in memory to a new segment
+        """
+        self.items.sort()
+        keep_count          = max(self.max_items // 2, 1)
+        spilled_items       = self.items[keep_count:]
+        self.items          = self.items[:keep_count]
+        heapq.heapify(self.items)
+
+        self.segment_count += 1
+        segment_path = os.path.join(self.directory, "frontier-{0:08d}.jsonl".format(self.segment_count))
+        with open(segment_path, 'w') as segment_file:
+            for negative_priority, item_id, frontier_item in spilled_items:
+                segment_file.write(json.dumps([negative_priority, serialize_frontier_item(frontier_item)]) + "\n")
+
+        heapq.heappush(self.segments, (spilled_items[0][0], segment_path, len(spilled_items)))
+        self.spilled_item_count             += len(spilled_items)
+        self.statistics['spilled_items']    += len(spilled_items)
+        self.statistics['segments']         += 1
+
+    def load_segment(self):
+        best_priority, segment_path, item_count = heapq.heappop(self.segments)
+        with open(segment_path) as segment_file:
+            for line in segment_file:
+                negative_priority, serialized_item = json.loads(line)
+                frontier_item = deserialize_frontier_item(serialized_item)
+                heapq.heappush(self.items, (negative_priority, frontier_item['item_id'], frontier_item))
+        os.remove(segment_path)
+
+        self.spilled_item_count             -= item_count
+        self.statistics['loaded_items']     += item_count
+        if len(self.items) > self.max_items:
+            self.spill()
+
+    def close(self):
+        """
+            removes the segments left, and the directory when it was made by the frontier
+        """
+        for best_priority, segment_path, item_count in self.segments:
+            os.remove(segment_path)
+        self.segments           = []
+        self.spilled_item_count = 0
+        if self.owns_directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+    def report(self):
+        return "frontier: {0} items spilled in {1} segments, {2} loaded back, at most {3} in memory".format(
+            self.statistics['spilled_items'], self.statistics['segments'], self.statistics['loaded_items'],
+            self.statistics['max_items_in_memory'])
@@ -0,0 +1,208 @@
+#-------------------------------------------------------------------------------
+# Name:         functions
+# Purpose:      Summaries of function definitions for compositional analysis
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import ast
+
+import halfwaytree.astor as astor
+import halfwaytree.digraph as digraph
+from halfwaytree.frontend import UnsupportedConstruct
+from halfwaytree.lazy import LazyModule
+
+z3 = LazyModule("z3")
+
+
+class SymbolicFunction:
+    """
+        Stands in for a function in the scope symbolic statements are run in.
+        A call does not run the body again: the summary of the function, a list
+        of (path condition, return value) pairs over its parameters, is turned
+        into one if-then-else expression and the arguments are substituted in.
+        So the cost of a call does not depend on the paths of the body.
+    """
+
+    def __init__(self, name, parameters, defaults, summary, statistics):
+        """
+            param parameters: list of (parameter name, z3 constant standing for it in the summary)
+            param defaults: dictionary of parameter names to their default values
+            param summary: list of (constraints, return value), the feasible paths of the body,
+                           which return a value on every path or on none
+            param statistics: dictionary counting the calls, shared with the digraph
+        """
+        self.name       = name
+        self.parameters = parameters
+        self.defaults   = defaults
+        self.summary    = summary
+        self.statistics = statistics
+
+    def get_arguments(self, arguments, keyword_arguments):
+        if len(arguments) > len(self.parameters):
+            raise TypeError("{0}() takes {1} arguments ({2} given)".format(self.name, len(self.parameters),
+                                                                          len(arguments)))
+        values = dict(self.defaults)
+        values.update(keyword_arguments)
+        for (name, constant), argument in zip(self.parameters, arguments):
+            values[name] = argument
+
+        missing = [name for name, constant in self.parameters if name not in values]
+        if missing:
+            raise TypeError("{0}() is missing the arguments {1}".format(self.name, ", ".join(missing)))
+        return values
+
+    def get_value_of_sort(self, value, sort):
+        if isinstance(value, (int, long)):
+            if sort.kind() == z3.Z3_BV_SORT:
+                return z3.BitVecVal(value, sort.size())
+            return z3.IntVal(value)
+        return value
+
+    def substitute(self, value, substitutions):
+        if z3.is_expr(value):
+            return z3.substitute(value, *substitutions)
+        return value
+
+    def __call__(self, *arguments, **keyword_arguments):
+        self.statistics['calls'] += 1
+        values          = self.get_arguments(arguments, keyword_arguments)
+        substitutions   = [(constant, self.get_value_of_sort(values[name], constant.sort()))
+                           for name, constant in self.parameters]
+
+        return_values = [return_value for constraints, return_value in self.summary]
+        if all(return_value is None for return_value in return_values):
+            return None
+
+        #the paths of the body cover every input, so the last one needs no condition
+        result = self.substitute(return_values[-1], substitutions)
+        for constraints, return_value in reversed(self.summary[:-1]):
+            condition   = z3.And([self.substitute(constraint, substitutions) for constraint in constraints])
+            result      = z3.If(condition, self.substitute(return_value, substitutions), result)
+
+        if z3.is_expr(result):
+            result = z3.simplify(result)
+            if z3.is_int_value(result):
+                #every argument was concrete
+                return result.as_long()
+        return result
+
+
+class RecursiveFunction:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, *arguments, **keyword_arguments):
+        raise UnsupportedConstruct("{0}() calls itself, recursive functions are not supported".format(self.name))
+
+
+class FunctionSummaryDigraph(digraph.SourceCodeDigraph):
+    """
+        Explores the body of a function once, with symbolic parameters, and keeps
+        the path condition and return value of every feasible path.
+        Integers the body assigns to new variables are concrete, only the
+        parameters are inputs of the function.
+    """
+
+    def __init__(self, function_definition, functions, **kwargs):
+        """
+            param function_definition: ast.FunctionDef
+            param functions: dictionary of the functions the body can call
+            kwargs are passed to SourceCodeDigraph, create_visual is always False
+        """
+        self.function_definition = function_definition
+        self.outer_functions     = functions
+        if any(isinstance(node, ast.Assert) for node in ast.walk(function_definition)):
+            raise UnsupportedConstruct("assert inside {0}() is not supported".format(function_definition.name))
+
+        #the print statement marks where every path of the body ends, returns jump there
+        source_code = "\n".join(astor.to_source(statement) for statement in function_definition.body)
+        source_code += "\nprint\n"
+
+        kwargs['create_visual'] = False
+        digraph.SourceCodeDigraph.__init__(self, source_code, **kwargs)
+        self.symbolic_functions = functions
+        self.summary            = []
+
+    def get_outer_function_names(self):
+        return self.outer_functions.keys()
+
+    def get_parameters(self):
+        return [(argument.id, self.solver_backend.make_integer("{0}.{1}".format(self.function_definition.name,
+                                                                               argument.id)))
+                for argument in self.function_definition.args.args]
+
+    def get_initial_node_state(self):
+        node_state = digraph.SourceCodeDigraph.get_initial_node_state(self)
+        for name, constant in self.get_parameters():
+            node_state['variables'][name] = constant
+        return node_state
+
+    def update_node_variable_state(self, node, variables, node_statement):
+        if hasattr(node.value, 'n') and self.variable_is_type(node.value.n, "int") and \
+                node.targets[0].id not in variables:
+            variables[node.targets[0].id] = node.value.n
+            return node_statement
+        return digraph.SourceCodeDigraph.update_node_variable_state(self, node, variables, node_statement)
+
+    def cut_off_path(self, node_state):
+        #the paths of the summary would not cover every input
+        raise UnsupportedConstruct("a loop in {0}() may run more times than it is unrolled".format(
+            self.function_definition.name))
+
+    def calculate_concrete_variables_on_last_statement(self, node_state, ast_path, ast, node_statement):
+        node_statement, is_last_statement, isfeasible = \
+            digraph.SourceCodeDigraph.calculate_concrete_variables_on_last_statement(
+                self, node_state, ast_path, ast, node_statement)
+
+        if is_last_statement and isfeasible is None:
+            raise UnsupportedConstruct("the solver gave up on a path of {0}(), its summary would miss it".format(
+                self.function_definition.name))
+        if is_last_statement and isfeasible:
+            self.summary.append((list(node_state['constraints']),
+                                 node_state['variables'].get(digraph.RETURN_VARIABLE)))
+        return node_statement, is_last_statement, isfeasible
+
+
+def summarize_function(source_code_digraph, function_definition):
+    """
+        param source_code_digraph: the SourceCodeDigraph the function is defined in
+        param function_definition: ast.FunctionDef
+        returns a SymbolicFunction
+    """
+    name        = function_definition.name
+    arguments   = function_definition.args
+    if arguments.vararg is not None or arguments.kwarg is not None:
+        raise UnsupportedConstruct("{0}() takes *args or **kwargs, which are not supported".format(name))
+
+    defaults = {}
+    for argument, default in zip(arguments.args[len(arguments.args) - len(arguments.defaults):],
+                                 arguments.defaults):
+        defaults[argument.id] = ast.literal_eval(default)
+
+    functions           = dict(source_code_digraph.symbolic_functions)
+    functions[name]     = RecursiveFunction(name)
+    summary_digraph     = FunctionSummaryDigraph(function_definition, functions,
+                                                 solver_backend=source_code_digraph.solver_backend,
+                                                 constraint_simplifier=source_code_digraph.constraint_simplifier,
+                                                 loop_unroll_bound=source_code_digraph.loop_unroll_bound,
+                                                 summarize_loops=source_code_digraph.summarize_loops,
+                                                 tracer=source_code_digraph.tracer,
+                                                 keep_node_states=False)
+    summary_digraph.build_code_digraph()
+
+    return_values = [return_value for constraints, return_value in summary_digraph.summary]
+    if any(return_value is None for return_value in return_values) and \
+            not all(return_value is None for return_value in return_values):
+        raise UnsupportedConstruct("{0}() only returns a value on some of its paths, line {1}".format(
+            name, function_definition.lineno))
+
+    source_code_digraph.function_statistics['summaries']        += 1
+    source_code_digraph.function_statistics['summary_paths']    += len(summary_digraph.summary)
+    return SymbolicFunction(name, summary_digraph.get_parameters(), defaults, summary_digraph.summary,
+                            source_code_digraph.function_statistics)
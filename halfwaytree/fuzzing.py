@@ -0,0 +1,276 @@
+#-------------------------------------------------------------------------------
+# Name:         fuzzing
+# Purpose:      Vectorized random input pre-pass for symbolic execution
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import numpy
+import z3
+
+
+class UnsupportedExpression(Exception):
+    """
+        raised when a z3 expression has no NumPy equivalent,
+        such constraints are always left to the solver
+    """
+    pass
+
+
+def compile_binary_operation(operation, arguments):
+    def evaluate(columns):
+        result = arguments[0](columns)
+        for argument in arguments[1:]:
+            result = operation(result, argument(columns))
+        return result
+    return evaluate
+
+
+def euclidean_modulo(dividend, divisor):
+    """
+        z3 div and mod are euclidean: the remainder is never negative
+    """
+    return numpy.mod(dividend, numpy.abs(divisor))
+
+
+def euclidean_division(dividend, divisor):
+    return (dividend - euclidean_modulo(dividend, divisor)) // divisor
+
+
+def compile_division(operation, arguments):
+    """
+        division by zero is uninterpreted in z3, so those rows are marked
+        by the caller as never satisfying the constraint
+    """
+    dividend, divisor = arguments
+
+    def evaluate(columns):
+        divisor_values  = divisor(columns)
+        safe_divisor    = numpy.where(divisor_values == 0, 1, divisor_values)
+        return operation(dividend(columns), safe_divisor)
+    return evaluate
+
+
+def compile_constraint_to_numpy(expression, variable_names, constants):
+    """
+        param expression: z3 expression over integer variables
+        param variable_names: set which is filled with the names of the variables found
+        param constants: set which is filled with the integer constants found
+        returns a function taking a dictionary of columns and returning a column
+    """
+    if z3.is_int_value(expression):
+        value = expression.as_long()
+        constants.add(value)
+        return lambda columns: value
+
+    if z3.is_true(expression):
+        return lambda columns: True
+
+    if z3.is_false(expression):
+        return lambda columns: False
+
+    if z3.is_const(expression) and z3.is_int(expression):
+        name = str(expression)
+        variable_names.add(name)
+        return lambda columns: columns[name]
+
+    arguments = [compile_constraint_to_numpy(child, variable_names, constants)
+                 for child in expression.children()]
+    kind = expression.decl().kind()
+
+    if kind == z3.Z3_OP_ADD:
+        return compile_binary_operation(numpy.add, arguments)
+    if kind == z3.Z3_OP_SUB:
+        return compile_binary_operation(numpy.subtract, arguments)
+    if kind == z3.Z3_OP_MUL:
+        return compile_binary_operation(numpy.multiply, arguments)
+    if kind == z3.Z3_OP_IDIV:
+        return compile_division(euclidean_division, arguments)
+    if kind == z3.Z3_OP_MOD:
+        return compile_division(euclidean_modulo, arguments)
+    if kind == z3.Z3_OP_UMINUS:
+        return lambda columns: numpy.negative(arguments[0](columns))
+    if kind == z3.Z3_OP_LE:
+        return compile_binary_operation(numpy.less_equal, arguments)
+    if kind == z3.Z3_OP_LT:
+        return compile_binary_operation(numpy.less, arguments)
+    if kind == z3.Z3_OP_GE:
+        return compile_binary_operation(numpy.greater_equal, arguments)
+    if kind == z3.Z3_OP_GT:
+        return compile_binary_operation(numpy.greater, arguments)
+    if kind == z3.Z3_OP_EQ:
+        return compile_binary_operation(numpy.equal, arguments)
+    if kind == z3.Z3_OP_DISTINCT and len(arguments) == 2:
+        return compile_binary_operation(numpy.not_equal, arguments)
+    if kind == z3.Z3_OP_AND:
+        return compile_binary_operation(numpy.logical_and, arguments)
+    if kind == z3.Z3_OP_OR:
+        return compile_binary_operation(numpy.logical_or, arguments)
+    if kind == z3.Z3_OP_NOT:
+        return lambda columns: numpy.logical_not(arguments[0](columns))
+    if kind == z3.Z3_OP_ITE:
+        return lambda columns: numpy.where(arguments[0](columns), arguments[1](columns),
+                                           arguments[2](columns))
+
+    raise UnsupportedExpression(str(expression))
+
+
+def get_divisors(expression):
+    """
+        returns the divisors found inside the expression,
+        rows where any of them is zero can not satisfy the expression
+    """
+    divisors = []
+    if z3.is_app(expression):
+        if expression.decl().kind() in [z3.Z3_OP_IDIV, z3.Z3_OP_MOD]:
+            divisors.append(expression.arg(1))
+        for child in expression.children():
+            divisors += get_divisors(child)
+    return divisors
+
+
+class RandomInputPrepass:
+    """
+        Evaluates path conditions on one batch of random integer inputs
+        before the solver is asked. Every constraint is compiled once and its
+        result over the batch is cached, so a path condition costs one
+        logical-and per constraint.
+    """
+
+    def __init__(self, sample_count=4096, value_range=1000, seed=0):
+        """
+            param sample_count: int, number of random input vectors in the batch
+            param value_range: int, inputs are drawn from [-value_range, value_range]
+            param seed: int
+        """
+        self.sample_count       = sample_count
+        self.value_range        = value_range
+        self.random_state       = numpy.random.RandomState(seed)
+
+        self.columns            = {}
+        self.constants          = set([-1, 0, 1])
+        self.constraint_masks   = {}
+
+        self.statistics = {'queries': 0, 'hits': 0, 'misses': 0, 'unsupported': 0}
+
+    def make_column(self, variable_name):
+        """
+            a quarter of every column is drawn from the constants seen in the
+            constraints so far (and their neighbours) so equalities can be hit
+        """
+        column = self.random_state.randint(-self.value_range, self.value_range+1,
+                                           size=self.sample_count).astype(numpy.int64)
+
+        interesting_values = set()
+        for constant in self.constants:
+            interesting_values.update([constant-1, constant, constant+1])
+        interesting_values = numpy.array(sorted(interesting_values), dtype=numpy.int64)
+
+        interesting_rows = self.random_state.randint(0, 4, size=self.sample_count) == 0
+        column[interesting_rows] = self.random_state.choice(interesting_values,
+                                                            size=interesting_rows.sum())
+        return column
+
+    def get_columns(self, variable_names):
+        for variable_name in variable_names:
+            if variable_name not in self.columns:
+                self.columns[variable_name] = self.make_column(variable_name)
+        return self.columns
+
+    def get_constraint_mask(self, constraint):
+        """
+            param constraint: z3 arithmetic boolean
+            returns a boolean column, True where the sampled inputs satisfy the constraint
+        """
+        key = constraint.get_id()
+        if key in self.constraint_masks:
+            return self.constraint_masks[key][1]
+
+        variable_names  = set()
+        function        = compile_constraint_to_numpy(constraint, variable_names, self.constants)
+        columns         = self.get_columns(variable_names)
+
+        divisors_compiled = [compile_constraint_to_numpy(divisor, set(), set())
+                             for divisor in get_divisors(constraint)]
+
+        old_settings = numpy.seterr(all='ignore')
+        try:
+            mask = numpy.broadcast_to(function(columns), (self.sample_count,)).copy()
+            for divisor in divisors_compiled:
+                mask &= numpy.broadcast_to(divisor(columns) != 0, (self.sample_count,))
+        finally:
+            numpy.seterr(**old_settings)
+
+        #the constraint is stored so its id is not reused by another expression
+        self.constraint_masks[key] = (constraint, mask, variable_names)
+        return mask
+
+    def get_variable_names(self, constraints):
+        variable_names = set()
+        for constraint in constraints:
+            variable_names |= self.constraint_masks[constraint.get_id()][2]
+        return variable_names
+
+    def satisfies_constraints(self, constraints, solution):
+        """
+            the sampled values are checked against z3 itself, so an
+            int64 overflow in NumPy can never produce a wrong test case
+        """
+        substitutions = [(z3.Int(name), z3.IntVal(value)) for name, value in solution.iteritems()]
+        for constraint in constraints:
+            if not z3.is_true(z3.simplify(z3.substitute(constraint, *substitutions))):
+                return False
+        return True
+
+    def find_satisfying_inputs(self, constraints):
+        """
+            param constraints: list of z3 arithmetic booleans
+            returns a dictionary of variable names to ints which satisfies every
+            constraint, or None when no sampled input vector does
+        """
+        self.statistics['queries'] += 1
+
+        if any(constraint is False for constraint in constraints):
+            #conditions on concrete values are python booleans
+            self.statistics['misses'] += 1
+            return None
+        constraints = [constraint for constraint in constraints if constraint is not True]
+
+        try:
+            mask = numpy.ones(self.sample_count, dtype=bool)
+            for constraint in constraints:
+                mask &= self.get_constraint_mask(constraint)
+        except UnsupportedExpression:
+            self.statistics['unsupported'] += 1
+            return None
+
+        satisfying_rows = numpy.flatnonzero(mask)
+        if len(satisfying_rows) > 0:
+            row         = satisfying_rows[0]
+            solution    = dict((name, int(self.columns[name][row]))
+                               for name in self.get_variable_names(constraints))
+
+            if self.satisfies_constraints(constraints, solution):
+                self.statistics['hits'] += 1
+                return solution
+
+        self.statistics['misses'] += 1
+        return None
+
+    def get_hit_rate(self):
+        if self.statistics['queries'] == 0:
+            return 0.0
+        return float(self.statistics['hits']) / self.statistics['queries']
+
+    def report(self):
+        """
+            returns a string with the hit rate and the solver calls saved
+        """
+        return "random input pre-pass: {0} queries, {1} hits ({2:.1%}), {3} solver calls saved".format(
+            self.statistics['queries'], self.statistics['hits'], self.get_hit_rate(),
+            self.statistics['hits'])
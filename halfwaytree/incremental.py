@@ -0,0 +1,203 @@
+#-------------------------------------------------------------------------------
+# Name:         incremental
+# Purpose:      Incremental symbolic execution of edited source code
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import hashlib
+
+import halfwaytree.astor as astor
+import halfwaytree.digraph as digraph
+from halfwaytree.smtlib import constraints_to_smt2, expression_to_smt2
+
+
+class IncrementalSourceCodeDigraph(digraph.SourceCodeDigraph):
+    """
+        A headless SourceCodeDigraph which reuses the exploration of a previous
+        version of the source code.
+
+        The subtree below a node only depends on the node's state and on the
+        statements which can still run after it. So a node whose state and
+        remaining statements are unchanged takes the previous subtree, and its
+        test cases, as they are. Statements before the first edited one are
+        run again, but their path conditions are answered from the solver
+        results of the previous exploration, so the solver only works from the
+        first affected statement on each path.
+    """
+
+    def __init__(self, source_code, previous_digraph=None, **kwargs):
+        """
+            param source_code: string
+            param previous_digraph: IncrementalSourceCodeDigraph of the previous version, after
+                                    build_code_digraph was called. It is left unchanged
+            kwargs are passed to SourceCodeDigraph, create_visual is always False
+        """
+        kwargs['create_visual'] = False
+        digraph.SourceCodeDigraph.__init__(self, source_code, **kwargs)
+
+        """
+            exploration index maps a subtree key to
+            (node, first node id, node count, first test case index, last test case index)
+        """
+        self.exploration_index  = {}
+        self.solved_constraints = {}
+        self.suffix_digests     = self.get_suffix_digests()
+
+        if previous_digraph is None:
+            self.previous_digraph = None
+        else:
+            self.previous_digraph = previous_digraph
+            self.solved_constraints.update(previous_digraph.solved_constraints)
+
+        self.incremental_statistics = {'reused_subtrees': 0, 'reused_nodes': 0,
+                                       'explored_nodes': 0, 'reused_solutions': 0}
+
+    def get_statement_fingerprint(self, ast_statement):
+        """
+            if statements are fingerprinted by their test only,
+            the statements in their body have their own fingerprint
+        """
+        if type(ast_statement).__name__ == "If":
+            return "if " + astor.to_source(ast_statement.test)
+        return astor.to_source(ast_statement)
+
+    def get_statements_in_order(self, ast_body, ast_path, statements):
+        """
+            fills statements with (ast_path, depth, fingerprint, is_function_definition)
+            in the order the statements appear in the source code
+        """
+        for index, ast_statement in enumerate(ast_body):
+            statement_path = ast_path + [index]
+            statements.append((tuple(statement_path), len(statement_path),
+                               self.get_statement_fingerprint(ast_statement),
+                               type(ast_statement).__name__ == "FunctionDef"))
+
+            if type(ast_statement).__name__ == "If":
+                self.get_statements_in_order(ast_statement.body, statement_path + ['b'], statements)
+        return statements
+
+    def get_definition_digests(self, statements):
+        """
+            returns a dictionary of ast_path to a digest of the functions defined above the
+            statement at that path. Its subtree calls their summaries, which are not in the
+            node state, so editing the body of a function changes every statement below it
+        """
+        digest              = hashlib.sha1("").hexdigest()
+        definition_digests  = {}
+        for ast_path, depth, fingerprint, is_function_definition in statements:
+            definition_digests[ast_path] = digest
+            if is_function_definition:
+                digest = hashlib.sha1("{0}\n{1}".format(fingerprint, digest)).hexdigest()
+        return definition_digests
+
+    def get_suffix_digests(self):
+        """
+            returns a dictionary of ast_path to a digest of the statement at that path, of
+            every statement after it and of the functions defined before it. Those are all
+            the statements its subtree can run. Depths are hashed instead of paths, so
+            inserting a statement above, other than a function, does not change the digest
+            of the statements below
+        """
+        statements          = self.get_statements_in_order(self.abstract_syntax_tree.body, [], [])
+        definition_digests  = self.get_definition_digests(statements)
+        last_statement      = self.abstract_syntax_tree.body[-1]
+
+        #asserts jump to the last root statement, so it belongs to every suffix
+        digest          = hashlib.sha1(self.get_statement_fingerprint(last_statement)).hexdigest()
+        suffix_digests  = {}
+        for ast_path, depth, fingerprint, is_function_definition in reversed(statements):
+            digest = hashlib.sha1("{0}\n{1}\n{2}".format(depth, fingerprint, digest)).hexdigest()
+            suffix_digests[ast_path] = hashlib.sha1(digest + definition_digests[ast_path]).hexdigest()
+        return suffix_digests
+
+    def get_node_state_key(self, node_state):
+        variables = ["{0}={1}".format(name, expression_to_smt2(value) if not isinstance(value, (int, long))
+                                      else value)
+                     for name, value in sorted(node_state['variables'].iteritems())]
+        constraints = [expression_to_smt2(constraint) for constraint in node_state['constraints']]
+        return hashlib.sha1(repr((variables, constraints, node_state['type']))).hexdigest()
+
+    def get_subtree_key(self, ast_path, node_state):
+        return self.suffix_digests[tuple(ast_path)] + self.get_node_state_key(node_state)
+
+    def solve_constraints(self, constraints):
+        key = constraints_to_smt2(constraints)
+        if key in self.solved_constraints:
+            self.incremental_statistics['reused_solutions'] += 1
+            return self.solved_constraints[key]
+
+        isfeasible, z3_solutions = digraph.SourceCodeDigraph.solve_constraints(self, constraints)
+        self.solved_constraints[key] = (isfeasible, z3_solutions)
+        return isfeasible, z3_solutions
+
+    def copy_previous_subtree(self, node, old_node_id, new_parent_node_id, node_id_offset,
+                              test_case_offset):
+        """
+            returns a copy of the previous subtree with node ids moved to this exploration.
+            node ids are given in depth first order, so the id of every node is known
+            while walking. returns (copy, next old node id)
+        """
+        node_statement = node.statement
+        if self.show_node_id:
+            node_statement = node_statement.replace("Node {0}:".format(old_node_id),
+                                                    "Node {0}:".format(old_node_id + node_id_offset), 1)
+
+        node_copy       = digraph.Node(node.type, node_statement, node.state, [], new_parent_node_id)
+        if node.test_case_index is not None:
+            node_copy.test_case_index = node.test_case_index + test_case_offset
+
+        next_node_id    = old_node_id + 1
+        for child in node.children:
+            child_copy, next_node_id = self.copy_previous_subtree(child, next_node_id,
+                                                                  old_node_id + node_id_offset,
+                                                                  node_id_offset, test_case_offset)
+            node_copy.children.append(child_copy)
+
+        return node_copy, next_node_id
+
+    def reuse_previous_subtree(self, subtree_key, parent_node_id):
+        node, first_node_id, node_count, first_test_case, last_test_case = \
+            self.previous_digraph.exploration_index[subtree_key]
+
+        node_id_offset      = self.node_count - first_node_id
+        test_case_offset    = len(self.test_cases) - first_test_case
+        node_copy, unused   = self.copy_previous_subtree(node, first_node_id, parent_node_id, node_id_offset,
+                                                         test_case_offset)
+
+        self.exploration_index[subtree_key] = (node_copy, self.node_count, node_count,
+                                               len(self.test_cases), len(self.test_cases) +
+                                               last_test_case - first_test_case)
+        self.node_count += node_count
+        self.test_cases += self.previous_digraph.test_cases[first_test_case:last_test_case]
+        self.path_conditions += self.previous_digraph.path_conditions[first_test_case:last_test_case]
+
+        self.incremental_statistics['reused_subtrees']  += 1
+        self.incremental_statistics['reused_nodes']     += node_count
+        return node_copy
+
+    def return_node_and_all_its_children(self, ast=None, ast_path=None,
+                                         node_state=None, parent_node_id=None):
+        if ast_path == None:
+            ast_path    = [0]
+            node_state  = {'constraints':[], 'variables':{}, 'type': None}
+
+        #the key is taken before the subtree mutates node_state
+        subtree_key = self.get_subtree_key(ast_path, node_state)
+        if self.previous_digraph is not None and subtree_key in self.previous_digraph.exploration_index:
+            return self.reuse_previous_subtree(subtree_key, parent_node_id)
+
+        first_node_id   = self.node_count
+        first_test_case = len(self.test_cases)
+        node            = digraph.SourceCodeDigraph.return_node_and_all_its_children(
+            self, ast=ast, ast_path=ast_path, node_state=node_state, parent_node_id=parent_node_id)
+
+        self.incremental_statistics['explored_nodes'] += 1
+        self.exploration_index[subtree_key] = (node, first_node_id, self.node_count - first_node_id,
+                                               first_test_case, len(self.test_cases))
+        return node
@@ -0,0 +1,51 @@
+#-------------------------------------------------------------------------------
+# Name:         lazy
+# Purpose:      Modules which are only imported when first used
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import importlib
+import sys
+
+
+class LazyModule(object):
+    """
+        Stands in for a module until one of its attributes is used, then imports it.
+        The attributes of the module are copied onto the stand in at that point,
+        so later uses are plain attribute lookups with no extra cost.
+    """
+
+    def __init__(self, module_name):
+        self.__dict__['_module_name']   = module_name
+        self.__dict__['_module']        = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_module_name'])
+            self.__dict__['_module'] = module
+            self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, name):
+        #only called for attributes which are not copied yet
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+        self.__dict__[name] = value
+
+    def __repr__(self):
+        if self.__dict__['_module'] is None:
+            return "<lazy module '{0}', not imported yet>".format(self.__dict__['_module_name'])
+        return repr(self.__dict__['_module'])
+
+
+def is_imported(module_name):
+    return module_name in sys.modules
@@ -0,0 +1,289 @@
+#-------------------------------------------------------------------------------
+# Name:         loops
+# Purpose:      Rewrites loops into statements the symbolic execution engine runs
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import copy
+import ast
+
+from halfwaytree.frontend import UnsupportedConstruct, LOOP_BOUND_FUNCTION, TRIP_COUNT_FUNCTION, LAST_VALUE_FUNCTION
+from halfwaytree.lazy import LazyModule
+
+z3 = LazyModule("z3")
+
+#for loops over a range of constants running at most this many times are unrolled completely
+CONCRETE_UNROLL_LIMIT = 100
+
+
+def get_trip_count(counter, bound, step, operator):
+    """
+        returns how many times a loop "while counter operator bound: counter = counter + step" runs,
+        a z3 expression when counter or bound are symbolic
+        param operator: string, one of < <= > >=
+    """
+    if operator in ("<", "<="):
+        distance, step_size = bound - counter, step
+    else:
+        distance, step_size = counter - bound, -step
+
+    if operator in ("<", ">"):
+        runs        = distance > 0
+        trip_count  = (distance + step_size - 1) / step_size
+    else:
+        runs        = distance >= 0
+        trip_count  = distance / step_size + 1
+
+    if z3.is_expr(runs):
+        return z3.If(runs, trip_count, 0)
+    if runs:
+        return trip_count
+    return 0
+
+
+def get_last_loop_value(value, step, trip_count):
+    """
+        returns the value of the variable of a for loop once the loop is over: the
+        loop steps it past the last value range gave, so it goes one step back when
+        the loop ran
+    """
+    if z3.is_expr(trip_count):
+        return z3.If(trip_count > 0, value - step, value)
+    if trip_count > 0:
+        return value - step
+    return value
+
+
+class LoopTransformer(ast.NodeTransformer):
+    """
+        Replaces while and for loops by statements the engine already runs.
+
+        A loop which only steps induction variables, such as
+            while i < n:
+                i = i + 1
+                total = total + 3
+        is summarized: its trip count is computed once and every induction
+        variable moves by its step times the trip count. Exploring it costs the
+        same whatever the number of iterations, and adds no paths.
+
+        Any other loop is unrolled into unroll_bound nested if-statements. A path
+        which would run it more than unroll_bound times ends where the test of the
+        next iteration holds, in a call of LOOP_BOUND_FUNCTION, so no path goes on
+        after the loop without its test being false.
+
+        for loops must go over range(). The loop variable is set to its start
+        concretely and stepped like in a while loop, then stepped back once the
+        loop ran, so it ends on the last value range gave like in python. When
+        the range is made of constants, the body is repeated once per value
+        instead, and a range with no value leaves the loop variable as it was.
+        When a range which is not made of constants turns out empty, the loop
+        variable is its start, where python leaves it as it was.
+        break, continue and else clauses of loops are not supported.
+    """
+
+    def __init__(self, unroll_bound=4, summarize=True):
+        """
+            param unroll_bound: int, number of iterations unrolled for loops which are not summarized
+            param summarize: boolean, when False every loop is unrolled
+        """
+        self.unroll_bound   = unroll_bound
+        self.summarize      = summarize
+        self.loop_count     = 0
+        self.statistics     = {'unrolled': 0, 'summarized': 0}
+
+    def check_supported(self, loop):
+        if loop.orelse:
+            raise UnsupportedConstruct("else clauses of loops are not supported, line {0}".format(loop.lineno))
+        for node in ast.walk(loop):
+            if isinstance(node, (ast.Break, ast.Continue)):
+                raise UnsupportedConstruct("break and continue are not supported, line {0}".format(node.lineno))
+
+    def get_induction_steps(self, body):
+        """
+            returns a dictionary of variable names to their step when every statement
+            of body is "name = name + constant" or "name = name - constant", None otherwise
+        """
+        steps = {}
+        for statement in body:
+            if not (isinstance(statement, ast.Assign) and len(statement.targets) == 1 and
+                    isinstance(statement.targets[0], ast.Name) and isinstance(statement.value, ast.BinOp)):
+                return None
+
+            name            = statement.targets[0].id
+            left, right     = statement.value.left, statement.value.right
+            operator        = statement.value.op
+            if isinstance(operator, ast.Add) and isinstance(left, ast.Num) and isinstance(right, ast.Name):
+                left, right = right, left
+            if not (isinstance(left, ast.Name) and left.id == name and isinstance(right, ast.Num) and
+                    isinstance(right.n, (int, long)) and isinstance(operator, (ast.Add, ast.Sub))):
+                return None
+            if name in steps:
+                return None
+            steps[name] = right.n if isinstance(operator, ast.Add) else -right.n
+        return steps
+
+    def get_counter_comparison(self, test):
+        """
+            returns (counter name, bound expression, operator) of a test such as i < n, or None
+        """
+        operators = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+        flipped   = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+        if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and type(test.ops[0]) in operators):
+            return None
+
+        operator = operators[type(test.ops[0])]
+        if isinstance(test.left, ast.Name):
+            return test.left.id, test.comparators[0], operator
+        if isinstance(test.comparators[0], ast.Name):
+            return test.comparators[0].id, test.left, flipped[operator]
+        return None
+
+    def summarize_loop(self, loop):
+        """
+            returns the statements replacing an induction loop, or None when loop is not one
+        """
+        steps       = self.get_induction_steps(loop.body)
+        comparison  = self.get_counter_comparison(loop.test)
+        if steps is None or comparison is None:
+            return None
+
+        counter, bound, operator = comparison
+        if counter not in steps or steps[counter] == 0:
+            return None
+        if (operator in ("<", "<=")) != (steps[counter] > 0):
+            #the counter moves away from the bound, the loop never ends once it starts
+            return None
+        if any(isinstance(node, ast.Name) and node.id in steps for node in ast.walk(bound)):
+            return None
+
+        self.loop_count += 1
+        trip_count_name = "__loop_{0}_trips".format(self.loop_count)
+        trip_count      = ast.Assign(targets=[ast.Name(id=trip_count_name, ctx=ast.Store())],
+                                     value=ast.Call(func=ast.Name(id=TRIP_COUNT_FUNCTION, ctx=ast.Load()),
+                                                    args=[ast.Name(id=counter, ctx=ast.Load()), bound,
+                                                          ast.Num(n=steps[counter]), ast.Str(s=operator)],
+                                                    keywords=[], starargs=None, kwargs=None))
+        statements = [trip_count]
+        for statement in loop.body:
+            name = statement.targets[0].id
+            statements.append(ast.Assign(
+                targets=[ast.Name(id=name, ctx=ast.Store())],
+                value=ast.BinOp(left=ast.Name(id=name, ctx=ast.Load()), op=ast.Add(),
+                                right=ast.BinOp(left=ast.Num(n=steps[name]), op=ast.Mult(),
+                                                right=ast.Name(id=trip_count_name, ctx=ast.Load())))))
+        self.statistics['summarized'] += 1
+        return statements
+
+    def unroll_loop(self, loop):
+        bound_exceeded = ast.Expr(value=ast.Call(func=ast.Name(id=LOOP_BOUND_FUNCTION, ctx=ast.Load()),
+                                                 args=[], keywords=[], starargs=None, kwargs=None))
+        statement = [ast.If(test=copy.deepcopy(loop.test), body=[bound_exceeded], orelse=[])]
+        for iteration in range(self.unroll_bound):
+            statement = [ast.If(test=copy.deepcopy(loop.test), body=copy.deepcopy(loop.body) + statement,
+                                orelse=[])]
+        self.statistics['unrolled'] += 1
+        return statement
+
+    def repeat_loop_body(self, loop, trip_count):
+        statements = []
+        for iteration in range(trip_count):
+            statements += copy.deepcopy(loop.body)
+        self.statistics['unrolled'] += 1
+        return statements
+
+    def make_step_back(self, name, step, trip_count_name=None):
+        """
+            returns the assignment stepping the variable of a for loop back to the last
+            value range gave, through get_last_loop_value when the loop may not have run
+        """
+        if trip_count_name is None:
+            value = ast.BinOp(left=ast.Name(id=name, ctx=ast.Load()), op=ast.Sub(), right=ast.Num(n=step))
+        else:
+            value = ast.Call(func=ast.Name(id=LAST_VALUE_FUNCTION, ctx=ast.Load()),
+                             args=[ast.Name(id=name, ctx=ast.Load()), ast.Num(n=step),
+                                   ast.Name(id=trip_count_name, ctx=ast.Load())],
+                             keywords=[], starargs=None, kwargs=None)
+        return ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+
+    def rewrite_loop(self, loop, trip_count=None, loop_variable=None):
+        """
+            param trip_count: int, the number of times loop runs when it is known
+            param loop_variable: (name, step) of the variable of a for loop
+        """
+        statements = None
+        if self.summarize:
+            statements = self.summarize_loop(loop)
+            if statements is not None and loop_variable is not None:
+                statements.append(self.make_step_back(*loop_variable, trip_count_name=statements[0].targets[0].id))
+        if statements is None and trip_count is not None and trip_count <= CONCRETE_UNROLL_LIMIT:
+            statements = self.repeat_loop_body(loop, trip_count)
+            if loop_variable is not None:
+                statements.append(self.make_step_back(*loop_variable))
+        if statements is None:
+            statements = self.unroll_loop(loop)
+            if loop_variable is not None:
+                #the body of the first iteration only runs when the loop does
+                statements[0].body.append(self.make_step_back(*loop_variable))
+        return [ast.copy_location(statement, loop) for statement in statements]
+
+    def visit_While(self, loop):
+        self.check_supported(loop)
+        self.generic_visit(loop)
+        return self.rewrite_loop(loop)
+
+    def visit_For(self, loop):
+        self.check_supported(loop)
+        self.generic_visit(loop)
+
+        iterator = loop.iter
+        if not (isinstance(iterator, ast.Call) and isinstance(iterator.func, ast.Name) and
+                iterator.func.id in ("range", "xrange") and 1 <= len(iterator.args) <= 3 and
+                isinstance(loop.target, ast.Name)):
+            raise UnsupportedConstruct("only for loops over range() are supported, line {0}".format(loop.lineno))
+
+        arguments = iterator.args
+        if len(arguments) == 1:
+            start, stop, step = ast.Num(n=0), arguments[0], ast.Num(n=1)
+        else:
+            start, stop, step = arguments[0], arguments[1], ast.Num(n=1)
+        if len(arguments) == 3:
+            step = arguments[2]
+        if not (isinstance(step, ast.Num) and isinstance(step.n, (int, long)) and step.n != 0):
+            raise UnsupportedConstruct("the step of range() must be a nonzero integer, line {0}".format(loop.lineno))
+
+        name = loop.target.id
+        initializer = ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=start)
+        #a loop variable starts at its value, it is never a symbolic input
+        initializer.concrete_initializer = True
+
+        increment = ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())],
+                               value=ast.BinOp(left=ast.Name(id=name, ctx=ast.Load()), op=ast.Add(), right=step))
+        test = ast.Compare(left=ast.Name(id=name, ctx=ast.Load()), ops=[ast.Lt() if step.n > 0 else ast.Gt()],
+                           comparators=[stop])
+        while_loop = ast.copy_location(ast.While(test=test, body=loop.body + [increment], orelse=[]), loop)
+
+        trip_count = None
+        if all(isinstance(argument, ast.Num) and isinstance(argument.n, (int, long)) for argument in arguments):
+            trip_count = len(xrange(*[argument.n for argument in arguments]))
+            if trip_count == 0:
+                #the body never runs, the loop variable is left as it was
+                self.statistics['unrolled'] += 1
+                return [ast.copy_location(ast.Pass(), loop)]
+        return [ast.copy_location(initializer, loop)] + self.rewrite_loop(while_loop, trip_count, (name, step.n))
+
+
+def transform_loops(abstract_syntax_tree, unroll_bound=4, summarize=True):
+    """
+        rewrites the loops of abstract_syntax_tree in place
+        returns the statistics of the LoopTransformer
+    """
+    loop_transformer = LoopTransformer(unroll_bound=unroll_bound, summarize=summarize)
+    loop_transformer.visit(abstract_syntax_tree)
+    ast.fix_missing_locations(abstract_syntax_tree)
+    return loop_transformer.statistics
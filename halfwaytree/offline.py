@@ -0,0 +1,251 @@
+#-------------------------------------------------------------------------------
+# Name:         offline
+# Purpose:      Dumps path conditions as SMT-LIB2 queries and solves them offline
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    Offline solving keeps path enumeration and solving apart:
+
+        1. a SourceCodeDigraph given a QueryDump explores every path without
+           solving, and writes the path condition of every leaf as a query
+        2. python -m halfwaytree.offline QUERIES solves the queries in parallel,
+           at any time and on any machine, and writes one result per query
+        3. join_results puts the models into the test_cases and the node labels
+           of the SourceCodeDigraph, which are then the same as if its paths had
+           been solved during the exploration
+
+    Queries are written either to one batch file, a JSON Lines stream holding the
+    SMT-LIB2 text of every query, or to a directory holding a query-N.smt2 file
+    per query, which any SMT solver can run on its own, and queries.jsonl which
+    indexes them. Results tell how long each query took, so slow queries can be
+    found and run again while profiling.
+
+    The path condition is written as built. BitVectorBackend(overflow="forbid") adds its
+    overflow conditions when it checks a path, they are not in the queries.
+"""
+
+import multiprocessing
+import argparse
+import json
+import time
+import sys
+import os
+
+from halfwaytree.smtlib import constraints_to_smt2
+from halfwaytree.solvers import check_smt2_with_configuration
+from halfwaytree.treefile import get_nodes_in_depth_first_order
+
+QUERY_FILE_NAME = "query-{0:08d}.smt2"
+INDEX_FILE_NAME = "queries.jsonl"
+
+
+class QueryDump:
+    """
+        Where a SourceCodeDigraph given it as query_dump writes the path
+        conditions of its leaves
+    """
+
+    def __init__(self, path, separate_files=False):
+        """
+            param path: string, the batch file, or the directory of the query files
+            param separate_files: boolean, when True every query is written to a file of its own
+        """
+        self.path           = path
+        self.separate_files = separate_files
+        if separate_files:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            self.index_file = open(os.path.join(path, INDEX_FILE_NAME), 'w')
+        else:
+            self.index_file = open(path, 'w')
+
+        self.statistics = {'queries': 0, 'bytes': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def add_query(self, node_id, test_case_index, constraints):
+        """
+            param node_id: int, the leaf the path condition leads to
+            param test_case_index: int, index in test_cases of the test case of the leaf
+            returns the query id
+        """
+        query_id    = self.statistics['queries']
+        smt2_text   = constraints_to_smt2(constraints)
+        query       = {'query_id': query_id, 'node_id': node_id, 'test_case_index': test_case_index}
+
+        if self.separate_files:
+            query['file'] = QUERY_FILE_NAME.format(query_id)
+            with open(os.path.join(self.path, query['file']), 'w') as query_file:
+                query_file.write("; query {0}, node {1}\n".format(query_id, node_id))
+                query_file.write(smt2_text)
+        else:
+            query['smt2'] = smt2_text
+        self.index_file.write(json.dumps(query) + "\n")
+
+        self.statistics['queries']  += 1
+        self.statistics['bytes']    += len(smt2_text)
+        return query_id
+
+    def close(self):
+        if not self.index_file.closed:
+            self.index_file.close()
+
+    def report(self):
+        return "query dump: {0} queries, {1} bytes of SMT-LIB2".format(self.statistics['queries'],
+                                                                       self.statistics['bytes'])
+
+
+def read_queries(path):
+    """
+        param path: a batch file, or a directory written by a QueryDump with separate files
+        yields the queries, each a dictionary holding its SMT-LIB2 text as smt2
+    """
+    directory = None
+    if os.path.isdir(path):
+        directory   = path
+        path        = os.path.join(path, INDEX_FILE_NAME)
+
+    with open(path) as index_file:
+        for line in index_file:
+            query = json.loads(line)
+            if 'file' in query:
+                with open(os.path.join(directory, query['file'])) as query_file:
+                    query['smt2'] = query_file.read()
+            yield query
+
+
+def solve_query(job):
+    """
+        runs in a worker of the solving pool
+    """
+    query, configuration = job
+    start_time      = time.time()
+    status, model   = check_smt2_with_configuration(query['smt2'], configuration)
+    return {'query_id': query['query_id'], 'node_id': query['node_id'],
+            'test_case_index': query['test_case_index'], 'status': status, 'model': model,
+            'seconds': time.time() - start_time}
+
+
+class OfflineSolver:
+    """
+        Solves the queries of a QueryDump in a pool of worker processes and yields
+        a result per query, in the order they finish. A query the solver gives up
+        on, after its timeout, is unknown and its test case is left as None, the
+        same as a check timing out during an exploration.
+    """
+
+    def __init__(self, processes=None, tactic=None, timeout=None, slowest_count=5):
+        """
+            param processes: int, size of the solving pool, the number of cpus by default
+            param tactic: string or list of strings, see solvers.Z3Backend
+            param timeout: int, milliseconds z3 may spend on one query
+            param slowest_count: int, slowest queries named by report
+        """
+        self.processes      = processes
+        self.configuration  = {'tactic': tactic, 'timeout': timeout}
+        self.slowest_count  = slowest_count
+        self.slowest        = []
+
+        self.statistics = {'sat': 0, 'unsat': 0, 'unknown': 0, 'solver_seconds': 0.0, 'seconds': 0.0}
+
+    def run(self, queries):
+        """
+            param queries: iterable of queries, see read_queries
+        """
+        start_time  = time.time()
+        pool        = multiprocessing.Pool(self.processes)
+        try:
+            jobs = ((query, self.configuration) for query in queries)
+            for result in pool.imap_unordered(solve_query, jobs):
+                self.statistics[result['status']]   += 1
+                self.statistics['solver_seconds']   += result['seconds']
+                self.slowest.append((result['seconds'], result['query_id']))
+                self.slowest = sorted(self.slowest, reverse=True)[:self.slowest_count]
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            self.statistics['seconds'] = time.time() - start_time
+
+    def write_json_lines(self, queries, output_file):
+        for result in self.run(queries):
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+
+    def report(self):
+        return "offline solving: {0} sat, {1} unsat, {2} unknown, {3:.1f} s of solving in {4:.1f} s, " \
+               "slowest queries {5}".format(
+                   self.statistics['sat'], self.statistics['unsat'], self.statistics['unknown'],
+                   self.statistics['solver_seconds'], self.statistics['seconds'],
+                   ", ".join("{0} ({1:.3f} s)".format(query_id, seconds) for seconds, query_id in self.slowest))
+
+
+def read_results(path):
+    with open(path) as results_file:
+        return [json.loads(line) for line in results_file]
+
+
+def join_results(source_code_digraph, results):
+    """
+        param source_code_digraph: the SourceCodeDigraph which wrote the queries, after build_code_digraph
+        param results: iterable of the results of OfflineSolver
+        returns the number of test cases joined
+    """
+    leaves = {}
+    if getattr(source_code_digraph, 'digraph', None) is not None:
+        for node, parent_position in get_nodes_in_depth_first_order(source_code_digraph.digraph):
+            if node.test_case_index is not None:
+                leaves[node.test_case_index] = node
+
+    #an if-statement's test case is moved after those of its body once they are found
+    test_case_indexes = dict((query_id, test_case_index) for test_case_index, query_id
+                             in getattr(source_code_digraph, 'offline_query_ids', {}).iteritems())
+
+    joined_count = 0
+    for result in results:
+        test_case_index = test_case_indexes.get(result['query_id'], result['test_case_index'])
+        isfeasible      = {'sat': True, 'unsat': False}.get(result['status'])
+        z3_solutions    = result['model'] if isfeasible else None
+        source_code_digraph.set_offline_solution(leaves.get(test_case_index), result['node_id'],
+                                                 test_case_index, isfeasible, z3_solutions)
+        joined_count += 1
+    return joined_count
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m halfwaytree.offline",
+                                     description="Solves the SMT-LIB2 queries written by a QueryDump in parallel")
+    parser.add_argument("queries", help="batch file, or directory of query files")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--tactic", nargs="+", default=None, help="z3 tactics chained into the solver")
+    parser.add_argument("--timeout", type=int, default=None, help="milliseconds per query")
+    parser.add_argument("--output", default=None, help="JSON Lines file, standard output by default")
+    options = parser.parse_args(arguments)
+
+    tactic = options.tactic
+    if tactic is not None and len(tactic) == 1:
+        tactic = tactic[0]
+    offline_solver = OfflineSolver(processes=options.processes, tactic=tactic, timeout=options.timeout)
+
+    if options.output is None:
+        offline_solver.write_json_lines(read_queries(options.queries), sys.stdout)
+    else:
+        with open(options.output, 'w') as output_file:
+            offline_solver.write_json_lines(read_queries(options.queries), output_file)
+
+    sys.stderr.write(offline_solver.report() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#-------------------------------------------------------------------------------
+# Name:         service
+# Purpose:      Symbolic execution as a local service speaking JSON
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python -m halfwaytree.service [--socket path] [--max-running-jobs n]
+
+    Reads one JSON request per line, from standard input or from every
+    connection to the unix socket, and writes one JSON line per event:
+
+        {"id": 1, "method": "analyze", "source_code": "x = 0\\n...", "timeout": 10, "max_node_count": 1000}
+            -> {"id": 1, "event": "test_case", "test_case": {"x": "3"}}     one per test case found
+            -> {"id": 1, "event": "finished", "status": "ok", "node_count": 5, "seconds": 0.1}
+
+        {"id": 2, "method": "cancel", "job": 1}
+            -> {"id": 2, "event": "cancelled", "job": 1}
+            -> {"id": 1, "event": "finished", "status": "cancelled", ...}
+
+    The status of a finished job is ok, budget_exceeded, timeout, cancelled or error.
+"""
+
+import multiprocessing
+import SocketServer
+import threading
+import traceback
+import argparse
+import Queue
+import json
+import time
+import sys
+import os
+
+#workers are forked from this process, importing z3 here spares each of them importing it
+import z3
+
+import halfwaytree.digraph as digraph
+
+
+class StreamingSourceCodeDigraph(digraph.SourceCodeDigraph):
+    """
+        A headless SourceCodeDigraph which puts every test case on a queue
+        as soon as it is found
+    """
+
+    def __init__(self, source_code, event_queue, **kwargs):
+        kwargs['create_visual'] = False
+        digraph.SourceCodeDigraph.__init__(self, source_code, **kwargs)
+        self.event_queue = event_queue
+
+    def append_solution_to_test_cases(self, solution_dictionary, node_state=None):
+        digraph.SourceCodeDigraph.append_solution_to_test_cases(self, solution_dictionary, node_state)
+        self.event_queue.put({'event': 'test_case', 'test_case': solution_dictionary})
+
+
+def run_analysis_job(event_queue, source_code, max_node_count):
+    """
+        runs in the process of the job, the last event it puts on the queue is finished
+    """
+    finished = {'event': 'finished'}
+    source_code_digraph = None
+    try:
+        source_code_digraph = StreamingSourceCodeDigraph(source_code, event_queue, keep_node_states=False,
+                                                         max_node_count=max_node_count)
+        source_code_digraph.build_code_digraph()
+        finished['status'] = 'ok'
+    except digraph.ExplorationBudgetExceeded as error:
+        finished['status']  = 'budget_exceeded'
+        finished['error']   = str(error)
+    except Exception:
+        finished['status']  = 'error'
+        finished['error']   = traceback.format_exc()
+
+    if source_code_digraph is not None:
+        finished['node_count'] = source_code_digraph.node_count
+    event_queue.put(finished)
+
+
+class AnalysisJob:
+    """
+        One source code analyzed in a process of its own. z3 holds the GIL for
+        as long as it solves, so jobs are never run in the thread which serves
+        requests. Cancelling or timing out a job terminates its process.
+    """
+
+    def __init__(self, job_id, source_code, running_jobs, timeout=None, max_node_count=None):
+        """
+            param job_id: identifies the job in events
+            param running_jobs: threading.Semaphore bounding the jobs which run at the same time
+            param timeout: float, seconds the job may run once started
+            param max_node_count: int, node budget of the exploration
+        """
+        self.job_id         = job_id
+        self.source_code    = source_code
+        self.running_jobs   = running_jobs
+        self.timeout        = timeout
+        self.max_node_count = max_node_count
+
+        self.process        = None
+        self.cancelled      = threading.Event()
+        self.poll_interval  = 0.05
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def start_process(self):
+        self.event_queue    = multiprocessing.Queue()
+        self.process        = multiprocessing.Process(target=run_analysis_job,
+                                                      args=(self.event_queue, self.source_code,
+                                                            self.max_node_count))
+        self.process.daemon = True
+        self.process.start()
+
+    def stop_process(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+    def get_stop_status(self, start_time):
+        if self.cancelled.is_set():
+            return 'cancelled'
+        if self.timeout is not None and time.time() - start_time > self.timeout:
+            return 'timeout'
+        return None
+
+    def events(self):
+        """
+            yields a dictionary per test case found, then one finished event.
+            It waits for a free slot in running_jobs before the job starts
+        """
+        while not self.running_jobs.acquire(False):
+            if self.cancelled.is_set():
+                yield {'event': 'finished', 'status': 'cancelled', 'seconds': 0.0}
+                return
+            time.sleep(self.poll_interval)
+
+        start_time = time.time()
+        try:
+            self.start_process()
+            while True:
+                try:
+                    event = self.event_queue.get(timeout=self.poll_interval)
+                except Queue.Empty:
+                    event = None
+
+                if event is not None:
+                    if event['event'] == 'finished':
+                        event['seconds'] = time.time() - start_time
+                    yield event
+                    if event['event'] == 'finished':
+                        return
+
+                #checked after every event too, a job finding test cases quickly never leaves the queue empty
+                stop_status = self.get_stop_status(start_time)
+                if stop_status is not None:
+                    yield {'event': 'finished', 'status': stop_status, 'seconds': time.time() - start_time}
+                    return
+
+                if event is None and not self.process.is_alive() and self.event_queue.empty():
+                    yield {'event': 'finished', 'status': 'error', 'seconds': time.time() - start_time,
+                           'error': "the job process exited with code {0}".format(self.process.exitcode)}
+                    return
+        finally:
+            self.stop_process()
+            self.running_jobs.release()
+
+
+class AnalysisService:
+    """
+        Runs analysis jobs on request and streams their events back.
+        Requests and events are dictionaries, see the module documentation.
+    """
+
+    def __init__(self, max_running_jobs=None):
+        """
+            param max_running_jobs: int, jobs started after this many are running
+                                    wait for one to finish. The number of cpus by default
+        """
+        if max_running_jobs is None:
+            max_running_jobs = multiprocessing.cpu_count()
+
+        self.running_jobs   = threading.Semaphore(max_running_jobs)
+        self.jobs           = {}
+        self.jobs_lock      = threading.Lock()
+
+    def submit(self, job_id, source_code, timeout=None, max_node_count=None):
+        job = AnalysisJob(job_id, source_code, self.running_jobs, timeout=timeout, max_node_count=max_node_count)
+        with self.jobs_lock:
+            if job_id in self.jobs:
+                raise ValueError("job {0} is already running".format(job_id))
+            self.jobs[job_id] = job
+        return job
+
+    def cancel(self, job_id):
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError("there is no job {0}".format(job_id))
+        job.cancel()
+
+    def stream_job_events(self, job, send):
+        try:
+            for event in job.events():
+                event['id'] = job.job_id
+                send(event)
+        finally:
+            with self.jobs_lock:
+                del self.jobs[job.job_id]
+
+    def handle_request(self, request, send):
+        """
+            param request: dictionary
+            param send: function taking an event dictionary, called from other threads too.
+            returns the thread streaming the events of an analyze request, None otherwise
+        """
+        request_id = request.get('id')
+        try:
+            if request.get('method') == 'analyze':
+                job = self.submit(request_id, request['source_code'], timeout=request.get('timeout'),
+                                  max_node_count=request.get('max_node_count'))
+                thread = threading.Thread(target=self.stream_job_events, args=(job, send))
+                thread.daemon = True
+                thread.start()
+                return thread
+
+            elif request.get('method') == 'cancel':
+                self.cancel(request['job'])
+                send({'id': request_id, 'event': 'cancelled', 'job': request['job']})
+
+            else:
+                raise ValueError("unknown method {0}".format(request.get('method')))
+
+        except (KeyError, ValueError) as error:
+            send({'id': request_id, 'event': 'error', 'error': str(error)})
+        return None
+
+    def serve_lines(self, input_file, output_file):
+        """
+            serves the requests read from input_file until it ends,
+            then waits for the jobs it started
+        """
+        output_lock = threading.Lock()
+
+        def send(event):
+            with output_lock:
+                output_file.write(json.dumps(event) + "\n")
+                output_file.flush()
+
+        threads = []
+        for line in iter(input_file.readline, ""):
+            if line.strip() == "":
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                send({'id': None, 'event': 'error', 'error': "requests must be one JSON object per line"})
+                continue
+
+            thread = self.handle_request(request, send)
+            if thread is not None:
+                threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+    def serve_stdio(self):
+        self.serve_lines(sys.stdin, sys.stdout)
+
+    def serve_unix_socket(self, path):
+        """
+            serves every connection to the unix socket at path in a thread of its own
+        """
+        service = self
+
+        class RequestHandler(SocketServer.StreamRequestHandler):
+            def handle(self):
+                service.serve_lines(self.rfile, self.wfile)
+
+        if os.path.exists(path):
+            os.remove(path)
+        server = SocketServer.ThreadingUnixStreamServer(path, RequestHandler)
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.remove(path)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="python -m halfwaytree.service",
+                                     description="Symbolic execution service speaking JSON lines")
+    parser.add_argument("--socket", default=None, help="unix socket path, standard input and output by default")
+    parser.add_argument("--max-running-jobs", type=int, default=None)
+    options = parser.parse_args(arguments)
+
+    service = AnalysisService(max_running_jobs=options.max_running_jobs)
+    if options.socket is None:
+        service.serve_stdio()
+    else:
+        service.serve_unix_socket(options.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#-------------------------------------------------------------------------------
+# Name:         simplifier
+# Purpose:      Rewrites path conditions before they reach the solver
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+from halfwaytree.lazy import LazyModule
+
+z3 = LazyModule("z3")
+
+
+def get_expression_size(expression, visited=None):
+    """
+        returns the number of distinct sub-terms of a z3 expression,
+        python booleans have size 1
+    """
+    if not z3.is_expr(expression):
+        return 1
+    if visited is None:
+        visited = set()
+
+    size    = 0
+    pending = [expression]
+    while pending:
+        expression = pending.pop()
+        if expression.get_id() in visited:
+            continue
+        visited.add(expression.get_id())
+        size += 1
+        pending.extend(expression.children())
+    return size
+
+
+def get_constraints_size(constraints):
+    visited = set()
+    return sum(get_expression_size(constraint, visited) for constraint in constraints)
+
+
+class ConstraintSimplifier:
+    """
+        Rewrites the constraints added to a path condition:
+            every new constraint is simplified by z3, which also folds concrete sub-terms
+            constraints which simplify to true are dropped
+            constraints already on the path are dropped
+            a bound on a term (x <= 3, x > 5, x == 2 ...) is dropped when the bounds
+            already on the path imply it, and replaces the bounds on the path it makes redundant
+
+        Simplified constraints are cached, so a condition met on many paths is only simplified once.
+    """
+
+    def __init__(self):
+        self.simplified_constraints = {}
+        self.bounds                 = {}
+
+        self.statistics = {'constraints': 0, 'cache_hits': 0, 'dropped_true': 0, 'dropped_duplicates': 0,
+                           'dropped_implied_bounds': 0, 'replaced_bounds': 0,
+                           'size_before': 0, 'size_after': 0}
+
+    def simplify(self, constraint):
+        """
+            param constraint: z3 boolean or python boolean
+            returns the simplified constraint, as a python boolean when it is constant
+        """
+        if constraint is True or constraint is False:
+            return constraint
+
+        key = constraint.get_id()
+        if key in self.simplified_constraints:
+            self.statistics['cache_hits'] += 1
+            return self.simplified_constraints[key][1]
+
+        simplified_constraint = z3.simplify(constraint)
+        if z3.is_true(simplified_constraint):
+            simplified_constraint = True
+        elif z3.is_false(simplified_constraint):
+            simplified_constraint = False
+
+        #the constraint is kept alive with its result, so its id is never given to another expression
+        self.simplified_constraints[key] = (constraint, simplified_constraint)
+        return simplified_constraint
+
+    def get_bound(self, constraint):
+        """
+            returns (term, lower bound, upper bound) of a constraint bounding an integer term
+            by a constant, either bound is None when it is open. returns None for other constraints
+        """
+        if constraint is True or constraint is False:
+            return None
+
+        key = constraint.get_id()
+        if key not in self.bounds:
+            self.bounds[key] = (constraint, self.make_bound(constraint))
+        return self.bounds[key][1]
+
+    def make_bound(self, constraint):
+        negated = z3.is_not(constraint)
+        if negated:
+            constraint = constraint.arg(0)
+
+        if not (z3.is_le(constraint) or z3.is_ge(constraint) or z3.is_eq(constraint)):
+            return None
+        if z3.is_eq(constraint) and negated:
+            return None
+
+        left, right = constraint.arg(0), constraint.arg(1)
+        is_upper    = z3.is_le(constraint)
+        if z3.is_int_value(right) and not z3.is_int_value(left) and z3.is_int(left):
+            term, value = left, right.as_long()
+        elif z3.is_int_value(left) and not z3.is_int_value(right) and z3.is_int(right):
+            #3 <= x bounds x from below
+            term, value = right, left.as_long()
+            is_upper    = not is_upper
+        else:
+            return None
+
+        if z3.is_eq(constraint):
+            return term, value, value
+        if negated:
+            #not (x <= 3) is x >= 4, not (x >= 3) is x <= 2
+            if is_upper:
+                return term, value + 1, None
+            return term, None, value - 1
+        if is_upper:
+            return term, None, value
+        return term, value, None
+
+    def is_bound_implied(self, bound, other_bound):
+        """
+            returns True when other_bound, on the same term, implies bound
+        """
+        term, lower, upper = bound
+        other_term, other_lower, other_upper = other_bound
+        if lower is not None and (other_lower is None or other_lower < lower):
+            return False
+        if upper is not None and (other_upper is None or other_upper > upper):
+            return False
+        return True
+
+    def add_constraints(self, constraints, new_constraints):
+        """
+            param constraints: list, the path condition so far, it is left unchanged
+            param new_constraints: list of constraints added to the path
+            returns the new path condition
+        """
+        constraints         = list(constraints)
+        added_constraints   = []
+        self.statistics['size_before'] += get_constraints_size(new_constraints)
+
+        for new_constraint in new_constraints:
+            self.statistics['constraints'] += 1
+            constraint = self.simplify(new_constraint)
+
+            if constraint is True:
+                self.statistics['dropped_true'] += 1
+                continue
+            if constraint is False:
+                constraints.append(False)
+                added_constraints.append(False)
+                continue
+            if any(z3.is_expr(other) and other.eq(constraint) for other in constraints):
+                self.statistics['dropped_duplicates'] += 1
+                continue
+
+            bound = self.get_bound(constraint)
+            if bound is not None:
+                same_term_bounds = [(other, self.get_bound(other)) for other in constraints
+                                    if z3.is_expr(other) and self.get_bound(other) is not None and
+                                    self.get_bound(other)[0].eq(bound[0])]
+                if any(self.is_bound_implied(bound, other_bound) for other, other_bound in same_term_bounds):
+                    self.statistics['dropped_implied_bounds'] += 1
+                    continue
+
+                redundant_constraints = [other for other, other_bound in same_term_bounds
+                                         if self.is_bound_implied(other_bound, bound)]
+                if redundant_constraints:
+                    self.statistics['replaced_bounds'] += len(redundant_constraints)
+                    constraints = [other for other in constraints
+                                   if not any(other is redundant for redundant in redundant_constraints)]
+
+            constraints.append(constraint)
+            added_constraints.append(constraint)
+
+        self.statistics['size_after'] += get_constraints_size(added_constraints)
+        return constraints
+
+    def report(self):
+        return "simplifier: {0} constraints, {1} dropped as true, {2} duplicates, {3} implied bounds, " \
+               "{4} bounds replaced, {5} cache hits, size {6} -> {7}".format(
+                   self.statistics['constraints'], self.statistics['dropped_true'],
+                   self.statistics['dropped_duplicates'], self.statistics['dropped_implied_bounds'],
+                   self.statistics['replaced_bounds'], self.statistics['cache_hits'],
+                   self.statistics['size_before'], self.statistics['size_after'])
@@ -0,0 +1,55 @@
+#-------------------------------------------------------------------------------
+# Name:         slicing
+# Purpose:      Cone of influence of the assert statements of a source code
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import ast
+
+
+def get_statements_with_enclosing_ifs(ast_body, enclosing_ifs, statements):
+    """
+        fills statements with (statement, list of the if-statements it is inside of),
+        the bodies of function definitions are left out, summaries explore them on their own
+    """
+    for ast_statement in ast_body:
+        statements.append((ast_statement, enclosing_ifs))
+        if isinstance(ast_statement, ast.If):
+            get_statements_with_enclosing_ifs(ast_statement.body, enclosing_ifs + [ast_statement], statements)
+    return statements
+
+
+def get_assert_slice(abstract_syntax_tree):
+    """
+        returns the set of the statement ids in the backward slice of the assert statements,
+        the statements which can change whether an assert is reached:
+            asserts and returns, which end a path early
+            assignments to a variable read by a statement of the slice
+            if-statements holding a statement of the slice, their test is read
+
+        The ast must have gone through the front end, which gives every statement
+        its statement_id, reads and writes.
+    """
+    statements          = get_statements_with_enclosing_ifs(abstract_syntax_tree.body, [], [])
+    relevant_variables  = set()
+    relevant_ids        = set()
+
+    slice_size = None
+    while slice_size != len(relevant_ids):
+        #a variable joining the slice can bring in assignments made before it was met
+        slice_size = len(relevant_ids)
+        for ast_statement, enclosing_ifs in statements:
+            if not (isinstance(ast_statement, (ast.Assert, ast.Return)) or
+                    ast_statement.writes & relevant_variables):
+                continue
+            for relevant_statement in [ast_statement] + enclosing_ifs:
+                if relevant_statement.statement_id not in relevant_ids:
+                    relevant_ids.add(relevant_statement.statement_id)
+                    relevant_variables.update(relevant_statement.reads)
+    return relevant_ids
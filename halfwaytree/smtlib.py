@@ -0,0 +1,165 @@
+#-------------------------------------------------------------------------------
+# Name:         smtlib
+# Purpose:      SMT-LIB2 serialization of path conditions
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+from halfwaytree.lazy import LazyModule
+
+z3 = LazyModule("z3")
+
+
+def get_declarations(constraints):
+    """
+        param constraints: list of z3 arithmetic booleans
+        returns a dictionary of variable names to the z3 constants found in the constraints
+    """
+    declarations    = {}
+    visited         = set()
+    pending         = [constraint for constraint in constraints if z3.is_expr(constraint)]
+
+    while pending:
+        expression = pending.pop()
+        if expression.get_id() in visited:
+            continue
+        visited.add(expression.get_id())
+
+        if z3.is_const(expression) and expression.decl().kind() == z3.Z3_OP_UNINTERPRETED:
+            declarations[str(expression)] = expression
+        pending.extend(expression.children())
+
+    return declarations
+
+
+def expression_to_smt2(expression):
+    """
+        conditions on concrete values are python booleans, z3 is given their literal
+    """
+    if expression is True:
+        return "true"
+    if expression is False:
+        return "false"
+    return expression.sexpr()
+
+
+def constraints_to_smt2(constraints):
+    """
+        param constraints: list of z3 arithmetic booleans
+        returns the SMT-LIB2 script asserting every constraint. Declarations are sorted
+        and sexpr names shared sub-terms structurally, so equal constraint lists always
+        give the same text, in this run or any other
+    """
+    declarations    = get_declarations(constraints)
+    lines           = []
+    for name in sorted(declarations):
+        lines.append("(declare-fun {0} () {1})".format(name, declarations[name].sort().sexpr()))
+
+    for constraint in constraints:
+        lines.append("(assert {0})".format(expression_to_smt2(constraint)))
+
+    lines.append("(check-sat)")
+    return "\n".join(lines) + "\n"
+
+
+def model_to_dictionary(z3_solutions):
+    """
+        param z3_solutions: a z3 model or a dictionary
+        returns a dictionary of variable names to value strings which
+        can be stored and later handed to SourceCodeDigraph.get_solutions
+    """
+    return dict((str(variable), str(z3_solutions[variable])) for variable in z3_solutions)
+
+
+def make_declaration(name, sort_text):
+    """
+        param sort_text: the SMT-LIB2 sort, such as Int or (_ BitVec 32)
+    """
+    if sort_text.startswith("(_ BitVec"):
+        return z3.BitVec(name, int(sort_text.split()[2].rstrip(")")))
+    return z3.Int(name)
+
+
+def make_declarations(sorts):
+    """
+        param sorts: dictionary of variable names to SMT-LIB2 sorts,
+                     names read back from JSON are unicode and z3 wants str
+    """
+    return dict((str(name), make_declaration(str(name), sort_text)) for name, sort_text in sorts.iteritems())
+
+
+def parse_expression(text, declarations):
+    """
+        param text: SMT-LIB2 term of any sort
+        param declarations: dictionary of variable names to z3 constants
+    """
+    assertion = z3.parse_smt2_string("(assert (= {0} {0}))".format(text), decls=declarations)[0]
+    return assertion.arg(0)
+
+
+def serialize_value(value):
+    if value is None:
+        #the return value of a function which returned nothing
+        return {'none': True}
+    if value is True or value is False:
+        return {'bool': value}
+    if isinstance(value, (int, long)):
+        return {'int': value}
+    return {'smt2': value.sexpr()}
+
+
+def deserialize_value(serialized_value, declarations):
+    if 'none' in serialized_value:
+        return None
+    if 'bool' in serialized_value:
+        return serialized_value['bool']
+    if 'int' in serialized_value:
+        return serialized_value['int']
+    return parse_expression(serialized_value['smt2'], declarations)
+
+
+def serialize_constraints(constraints):
+    """
+        returns a JSON serializable dictionary holding the constraints as SMT-LIB2 terms
+    """
+    declarations = get_declarations(constraints)
+    return {'declarations': dict((name, variable.sort().sexpr())
+                                 for name, variable in declarations.iteritems()),
+            'constraints': [serialize_value(constraint) for constraint in constraints]}
+
+
+def deserialize_constraints(serialized_constraints):
+    declarations = make_declarations(serialized_constraints['declarations'])
+    return [deserialize_value(constraint, declarations)
+            for constraint in serialized_constraints['constraints']]
+
+
+def serialize_node_state(node_state):
+    """
+        param node_state: dictionary with the variables, constraints and type of a path
+        returns a JSON serializable dictionary, variables and constraints are SMT-LIB2 terms
+    """
+    values          = node_state['variables'].values() + node_state['constraints']
+    declarations    = get_declarations([value for value in values if z3.is_expr(value)])
+
+    return {'declarations': dict((name, variable.sort().sexpr())
+                                 for name, variable in declarations.iteritems()),
+            'variables': dict((name, serialize_value(value))
+                              for name, value in node_state['variables'].iteritems()),
+            'constraints': [serialize_value(constraint) for constraint in node_state['constraints']],
+            'type': node_state['type']}
+
+
+def deserialize_node_state(serialized_node_state):
+    declarations = make_declarations(serialized_node_state['declarations'])
+
+    return {'variables': dict((str(name), deserialize_value(value, declarations))
+                              for name, value in serialized_node_state['variables'].iteritems()),
+            'constraints': [deserialize_value(constraint, declarations)
+                            for constraint in serialized_node_state['constraints']],
+            'type': serialized_node_state['type']}
@@ -0,0 +1,437 @@
+#-------------------------------------------------------------------------------
+# Name:         solvers
+# Purpose:      Solver backends used by the symbolic execution engine
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import multiprocessing
+import importlib
+import select
+import time
+
+from halfwaytree.lazy import LazyModule
+from halfwaytree.smtlib import constraints_to_smt2, model_to_dictionary
+
+z3 = LazyModule("z3")
+
+
+class SolverBackend:
+    """
+        What SourceCodeDigraph needs from a solver: making the symbolic
+        variables, negating and joining branch conditions, checking path
+        conditions and writing values of a model as test case strings.
+    """
+
+    name = None
+
+    """
+        results of backends which read constraints differently are kept apart
+        in a solver cache by their namespace
+    """
+    cache_namespace = None
+
+    def make_integer(self, name):
+        raise NotImplementedError
+
+    def negate(self, condition):
+        raise NotImplementedError
+
+    def disjunction(self, conditions):
+        raise NotImplementedError
+
+    def check(self, constraints):
+        """
+            param constraints: list of conditions made with this backend, or python booleans
+            returns a tuple (isfeasible, z3_solutions). z3_solutions is the model of the
+            constraints, or a dictionary of variable names to values, and is None when
+            they are unsatisfiable. isfeasible is None when the backend could not decide,
+            such as when it ran out of time
+        """
+        raise NotImplementedError
+
+    def format_value(self, value):
+        """
+            returns the test case string of a value taken from a model
+        """
+        return str(value)
+
+    def close(self):
+        pass
+
+    def report(self):
+        return "solver backend: {0}".format(self.name)
+
+
+class Z3Backend(SolverBackend):
+    """
+        Solves each path condition with one z3 solver in this process
+    """
+
+    name = "z3"
+
+    def __init__(self, tactic=None, timeout=None):
+        """
+            param tactic: string or list of strings, z3 tactics chained into the solver.
+                          The default z3 solver is used when None
+            param timeout: int, milliseconds z3 may spend on one check. A check which
+                           runs out of time is unknown
+        """
+        self.tactic     = tactic
+        self.timeout    = timeout
+
+        self.statistics = {'checks': 0, 'unknown': 0}
+
+    def make_integer(self, name):
+        return z3.Int(name)
+
+    def negate(self, condition):
+        return z3.Not(condition)
+
+    def disjunction(self, conditions):
+        return z3.Or(conditions)
+
+    def make_solver(self):
+        if self.tactic is None:
+            solver = z3.Solver()
+        elif isinstance(self.tactic, basestring):
+            solver = z3.Tactic(self.tactic).solver()
+        else:
+            solver = z3.Then(*self.tactic).solver()
+
+        if self.timeout is not None:
+            solver.set("timeout", self.timeout)
+        return solver
+
+    def check(self, constraints):
+        self.statistics['checks'] += 1
+        s = self.make_solver()
+        s.add(constraints)
+
+        result = s.check()
+        if result == z3.sat:
+            return True, s.model()
+        if result == z3.unsat:
+            return False, None
+        self.statistics['unknown'] += 1
+        return None, None
+
+    def report(self):
+        return "solver backend: {0}, {1} checks, {2} unknown".format(self.name, self.statistics['checks'],
+                                                                     self.statistics['unknown'])
+
+
+class BitVectorBackend(Z3Backend):
+    """
+        Encodes variables as fixed-width bit-vectors instead of unbounded integers.
+        Nonlinear integer arithmetic is undecidable, over bit-vectors z3 decides it
+        by bit-blasting, which is much faster on multiplication and division heavy code.
+
+        The arithmetic of the encoding is that of a two's complement machine integer:
+            comparisons are signed
+            / is signed division rounding toward zero, python 2 rounds toward minus infinity
+            % is signed modulo, its sign follows the divisor like in python
+            integer literals are taken modulo 2**width
+
+        overflow says what happens when +, -, *, / or unary minus go past the width:
+            "forbid"    paths are only feasible when no operation overflows, so they
+                        agree with the integer encoding whenever the values fit the width.
+                        This is the default
+            "wrap"      the result wraps around, like C integers. Paths which are only
+                        feasible through an overflow are kept, with test cases causing it.
+                        Python integers never wrap, so such test cases do not take the
+                        path they were solved for: this is unsound for python code, and
+                        only meant for code modelling machine integers
+
+        Values in test cases are written as signed integers.
+    """
+
+    name = "bit-vector"
+
+    def __init__(self, width=32, overflow="forbid", tactic=None, timeout=None):
+        """
+            param width: int, number of bits of every variable
+            param overflow: string, "forbid" or "wrap"
+        """
+        if overflow not in ("wrap", "forbid"):
+            raise ValueError("overflow must be wrap or forbid, not {0}".format(overflow))
+
+        Z3Backend.__init__(self, tactic=tactic, timeout=timeout)
+        self.width      = width
+        self.overflow   = overflow
+        if overflow == "forbid":
+            self.cache_namespace = "bit-vector forbid overflow"
+
+    def make_integer(self, name):
+        return z3.BitVec(name, self.width)
+
+    def get_overflow_conditions_of_operation(self, expression):
+        kind        = expression.decl().kind()
+        arguments   = expression.children()
+        if kind == z3.Z3_OP_BNEG:
+            return [z3.BVSNegNoOverflow(arguments[0])]
+        if kind == z3.Z3_OP_BSDIV:
+            return [z3.BVSDivNoOverflow(arguments[0], arguments[1])]
+
+        if kind == z3.Z3_OP_BADD:
+            make_conditions = lambda a, b: [z3.BVAddNoOverflow(a, b, True), z3.BVAddNoUnderflow(a, b)]
+            operator        = lambda a, b: a + b
+        elif kind == z3.Z3_OP_BSUB:
+            make_conditions = lambda a, b: [z3.BVSubNoOverflow(a, b), z3.BVSubNoUnderflow(a, b, True)]
+            operator        = lambda a, b: a - b
+        elif kind == z3.Z3_OP_BMUL:
+            make_conditions = lambda a, b: [z3.BVMulNoOverflow(a, b, True), z3.BVMulNoUnderflow(a, b)]
+            operator        = lambda a, b: a * b
+        else:
+            return []
+
+        #operations on more than two arguments are checked one step at a time
+        conditions  = []
+        result      = arguments[0]
+        for argument in arguments[1:]:
+            conditions += make_conditions(result, argument)
+            result      = operator(result, argument)
+        return conditions
+
+    def get_overflow_conditions(self, constraints):
+        """
+            returns conditions which hold when no operation in the constraints overflows
+        """
+        conditions  = []
+        visited     = set()
+        pending     = [constraint for constraint in constraints if z3.is_expr(constraint)]
+        while pending:
+            expression = pending.pop()
+            if expression.get_id() in visited:
+                continue
+            visited.add(expression.get_id())
+
+            if z3.is_app(expression) and z3.is_bv(expression):
+                conditions += self.get_overflow_conditions_of_operation(expression)
+            pending.extend(expression.children())
+        return conditions
+
+    def check(self, constraints):
+        if self.overflow == "forbid":
+            constraints = list(constraints) + self.get_overflow_conditions(constraints)
+        return Z3Backend.check(self, constraints)
+
+    def format_value(self, value):
+        """
+            values come from a z3 model, or as unsigned strings from a solver cache
+        """
+        value = int(str(value))
+        if value >= 2**(self.width - 1):
+            value -= 2**self.width
+        return str(value)
+
+
+"""
+    Configurations raced by PortfolioBackend. A bounded configuration only looks
+    for solutions in a bounded domain (nla2bv turns integers into bit-vectors),
+    so when it finds none the path condition may still be satisfiable
+"""
+DEFAULT_PORTFOLIO = [{'name': 'default'},
+                     {'name': 'nonlinear', 'tactic': ['simplify', 'qfnia']},
+                     {'name': 'bit-vector', 'tactic': ['simplify', 'nla2bv', 'smt'], 'bounded': True}]
+
+
+def check_smt2_with_configuration(smt2_text, configuration):
+    """
+        returns ('sat', model dictionary), ('unsat', None) or ('unknown', None)
+    """
+    backend     = Z3Backend(tactic=configuration.get('tactic'), timeout=configuration.get('timeout'))
+    solver      = backend.make_solver()
+    solver.add(z3.parse_smt2_string(smt2_text))
+    result      = solver.check()
+
+    if result == z3.sat:
+        return 'sat', model_to_dictionary(solver.model())
+    if result == z3.unsat and not configuration.get('bounded', False):
+        return 'unsat', None
+    return 'unknown', None
+
+
+def run_portfolio_worker(connection, configuration):
+    """
+        runs in a worker process, answers every SMT-LIB2 query sent until it gets None
+    """
+    while True:
+        query = connection.recv()
+        if query is None:
+            break
+        query_id, smt2_text = query
+        connection.send((query_id,) + check_smt2_with_configuration(smt2_text, configuration))
+
+
+class PortfolioWorker:
+    def __init__(self, configuration):
+        self.configuration  = configuration
+        self.process        = None
+        self.connection     = None
+
+    def start(self):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_portfolio_worker,
+                                               args=(child_connection, self.configuration))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.connection.close()
+            self.process    = None
+            self.connection = None
+
+    def send(self, query_id, smt2_text):
+        if self.process is None:
+            self.start()
+        self.connection.send((query_id, smt2_text))
+
+
+class PortfolioBackend(Z3Backend):
+    """
+        Races several solver configurations on every path condition, each in a
+        worker process of its own, and takes the first conclusive answer.
+        Workers still busy with a path condition which was already answered are
+        terminated and started again for the next one, so a slow strategy never
+        holds up the others.
+    """
+
+    name = "portfolio"
+
+    def __init__(self, configurations=None, timeout=None, grace_period=0.01):
+        """
+            param configurations: list of dictionaries with a name and optionally
+                                  tactic, timeout (milliseconds) and bounded. DEFAULT_PORTFOLIO by default
+            param timeout: float, seconds to wait for a conclusive answer, after which
+                           the path condition is unknown
+            param grace_period: float, seconds the other workers get to finish after the
+                                first conclusive answer. Most path conditions are easy for
+                                every configuration, restarting a worker costs more than waiting
+        """
+        Z3Backend.__init__(self)
+        if configurations is None:
+            configurations = DEFAULT_PORTFOLIO
+
+        self.configurations = configurations
+        self.race_timeout   = timeout
+        self.grace_period   = grace_period
+        self.workers        = [PortfolioWorker(configuration) for configuration in configurations]
+        self.query_count    = 0
+
+        self.statistics     = {'checks': 0, 'unknown': 0, 'restarts': 0,
+                               'wins': dict((configuration['name'], 0) for configuration in configurations)}
+
+    def get_remaining_time(self, start_time, answer_time):
+        if answer_time is not None:
+            return max(0.0, self.grace_period - (time.time() - answer_time))
+        if self.race_timeout is None:
+            return None
+        return max(0.0, self.race_timeout - (time.time() - start_time))
+
+    def race(self, smt2_text):
+        """
+            returns (configuration name, status, model) of the first conclusive
+            answer, or (None, 'unknown', None) when there is none
+        """
+        self.query_count += 1
+        for worker in self.workers:
+            worker.send(self.query_count, smt2_text)
+
+        start_time  = time.time()
+        busy        = dict((worker.connection, worker) for worker in self.workers)
+        answer      = (None, 'unknown', None)
+        answer_time = None
+        while busy:
+            remaining_time = self.get_remaining_time(start_time, answer_time)
+            if remaining_time == 0.0:
+                break
+
+            ready_connections = select.select(busy.keys(), [], [], remaining_time)[0]
+            for connection in ready_connections:
+                worker = busy.pop(connection)
+                try:
+                    query_id, status, model = connection.recv()
+                except EOFError:
+                    #the worker died, it is started again for the next path condition
+                    worker.stop()
+                    continue
+
+                if status != 'unknown' and answer[0] is None:
+                    answer      = (worker.configuration['name'], status, model)
+                    answer_time = time.time()
+
+        for worker in busy.values():
+            worker.stop()
+            self.statistics['restarts'] += 1
+        return answer
+
+    def check(self, constraints):
+        self.statistics['checks'] += 1
+        if any(constraint is False for constraint in constraints):
+            return False, None
+
+        name, status, model = self.race(constraints_to_smt2(constraints))
+        if name is None:
+            self.statistics['unknown'] += 1
+            return None, None
+
+        self.statistics['wins'][name] += 1
+        if status == 'sat':
+            return True, model
+        return False, None
+
+    def close(self):
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.connection.send(None)
+            worker.stop()
+
+    def report(self):
+        wins = ", ".join("{0} {1}".format(name, self.statistics['wins'][name])
+                         for name in sorted(self.statistics['wins']))
+        return "portfolio: {0} checks, wins: {1}, {2} unknown, {3} worker restarts".format(
+            self.statistics['checks'], wins, self.statistics['unknown'], self.statistics['restarts'])
+
+
+"""
+    solver backends by name, as module.class paths. A module is only
+    imported when one of its backends is asked for
+"""
+SOLVER_BACKENDS = {'z3': "halfwaytree.solvers.Z3Backend",
+                   'bit-vector': "halfwaytree.solvers.BitVectorBackend",
+                   'portfolio': "halfwaytree.solvers.PortfolioBackend"}
+
+
+def register_solver_backend(name, class_path):
+    """
+        param class_path: string, such as mypackage.mysolver.MyBackend
+    """
+    SOLVER_BACKENDS[name] = class_path
+
+
+def get_solver_backend(solver_backend=None, **kwargs):
+    """
+        param solver_backend: a SolverBackend, the name of a registered backend, or None for z3
+        kwargs are given to the backend class when it is made from a name
+    """
+    if solver_backend is None:
+        solver_backend = "z3"
+    if not isinstance(solver_backend, basestring):
+        return solver_backend
+
+    if solver_backend not in SOLVER_BACKENDS:
+        raise ValueError("unknown solver backend {0}, the known ones are {1}".format(
+            solver_backend, ", ".join(sorted(SOLVER_BACKENDS))))
+
+    module_name, class_name = SOLVER_BACKENDS[solver_backend].rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)(**kwargs)
@@ -0,0 +1,139 @@
+#-------------------------------------------------------------------------------
+# Name:         tracing
+# Purpose:      Span tracing of an exploration, as Chrome trace events or flamegraph stacks
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import threading
+import json
+import time
+import os
+
+
+class Tracer:
+    """
+        Records nested spans, the time taken by a piece of work together with the
+        spans open when it started. A SourceCodeDigraph given a tracer opens spans
+        around every subtree it explores, every solver check, the source code it
+        makes from the ast and the calls to the visual digraph. Without a tracer
+        each of those places only compares the tracer to None.
+
+        The spans are exported as:
+            Chrome trace events, write_chrome_trace, which chrome://tracing and
+            ui.perfetto.dev show as a timeline
+            collapsed stacks, write_collapsed_stacks, the input of flamegraph.pl,
+            one line per stack of span names with the microseconds spent in it
+    """
+
+    def __init__(self, clock=time.time, keep_events=True):
+        """
+            param clock: function returning the time in seconds
+            param keep_events: boolean, when False only the collapsed stacks and statistics
+                               are kept, which take memory per distinct stack instead of per span
+        """
+        self.clock          = clock
+        self.keep_events    = keep_events
+        self.start_time     = clock()
+        self.process_id     = os.getpid()
+
+        #open spans, each a list [name, category, args, start time, time spent in child spans]
+        self.stack          = []
+        self.stack_names    = []
+
+        #(name, category, args, start time, duration, depth) of every finished span
+        self.events         = []
+        #microseconds spent in each stack of span names, outside of its child spans
+        self.collapsed_stacks = {}
+
+        self.statistics = {'spans': 0, 'seconds_by_category': {}}
+
+    def begin(self, name, category, args=None):
+        """
+            param name: string, the frame of the span on a flamegraph
+            param category: string, such as "solver" or "visual"
+            param args: dictionary shown with the span on the timeline
+        """
+        self.stack.append([name, category, args, self.clock(), 0.0])
+        self.stack_names.append(name.replace(";", ","))
+
+    def end(self, args=None):
+        """
+            ends the last span begun
+            param args: dictionary added to the args of the span, such as its result
+        """
+        end_time = self.clock()
+        name, category, span_args, start_time, child_duration = self.stack.pop()
+        duration = end_time - start_time
+
+        if args is not None:
+            span_args = dict(span_args or {}, **args)
+        if self.keep_events:
+            self.events.append((name, category, span_args, start_time, duration, len(self.stack)))
+
+        stack_key = ";".join(self.stack_names)
+        self.stack_names.pop()
+        self.collapsed_stacks[stack_key] = self.collapsed_stacks.get(stack_key, 0) + \
+            (duration - child_duration) * 1000000
+        if self.stack:
+            self.stack[-1][4] += duration
+
+        #spans nest within the same category, only the time outside of child spans is added
+        seconds_by_category = self.statistics['seconds_by_category']
+        seconds_by_category[category] = seconds_by_category.get(category, 0.0) + duration - child_duration
+        self.statistics['spans'] += 1
+
+    def end_open_spans(self):
+        """
+            ends the spans left open, by an exploration still running or by code
+            which begins spans without ending them, the exports call it first
+        """
+        while self.stack:
+            self.end({'unfinished': True})
+
+    def get_chrome_trace(self):
+        """
+            returns the trace as a dictionary in the Chrome trace event format
+        """
+        self.end_open_spans()
+        thread_id       = threading.current_thread().ident
+        trace_events    = []
+        for name, category, args, start_time, duration, depth in self.events:
+            trace_event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.process_id, 'tid': thread_id,
+                           'ts': (start_time - self.start_time) * 1000000, 'dur': duration * 1000000}
+            if args:
+                trace_event['args'] = args
+            trace_events.append(trace_event)
+
+        #parents end after their children, the viewer nests spans best when they come first
+        trace_events.sort(key=lambda trace_event: (trace_event['ts'], -trace_event['dur']))
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, file_path):
+        with open(file_path, 'w') as trace_file:
+            json.dump(self.get_chrome_trace(), trace_file)
+
+    def get_collapsed_stacks(self):
+        """
+            returns the lines of the collapsed stacks, sorted by stack
+        """
+        self.end_open_spans()
+        return ["{0} {1}".format(stack_key, int(round(microseconds)))
+                for stack_key, microseconds in sorted(self.collapsed_stacks.iteritems())
+                if round(microseconds) > 0]
+
+    def write_collapsed_stacks(self, file_path):
+        with open(file_path, 'w') as stacks_file:
+            for line in self.get_collapsed_stacks():
+                stacks_file.write(line + "\n")
+
+    def report(self):
+        seconds_by_category = self.statistics['seconds_by_category']
+        return "tracing: {0} spans, {1}".format(self.statistics['spans'], ", ".join(
+            "{0} {1:.3f} s".format(category, seconds_by_category[category])
+            for category in sorted(seconds_by_category)))
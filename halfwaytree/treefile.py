@@ -0,0 +1,257 @@
+#-------------------------------------------------------------------------------
+# Name:         treefile
+# Purpose:      Compact columnar file format for execution trees
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import struct
+import array
+import mmap
+import json
+
+"""
+    A tree file holds the nodes in depth first order, the position of a node in
+    the file is its node id there. It matches the node id given by the engine,
+    except for trees resumed from a checkpoint, which get an extra root.
+    Every column is a flat array of fixed size values:
+
+        header
+        metadata        JSON with the node type names
+        types           uint8 per node, index into the node type names
+        parents         int32 per node, position of the parent node, -1 for the root
+        labels          uint32 per node, index into the label strings
+        test cases      int32 per node, index into the solutions, -1 when the node has none
+        label offsets   uint64 per label string, plus one for the end
+        label strings   utf-8 text of every distinct label
+        solution offsets uint64 per solution, plus one for the end
+        solutions       JSON text of every test case
+
+    All values are little-endian.
+"""
+
+MAGIC           = "HWT1"
+VERSION         = 1
+HEADER          = struct.Struct("<4sIIIII8Q")
+
+NO_PARENT       = -1
+NO_TEST_CASE    = -1
+
+
+def get_nodes_in_depth_first_order(root_node):
+    """
+        returns a list of (node, parent position). Walks with its own stack,
+        so deep trees do not hit the recursion limit
+    """
+    nodes   = []
+    pending = [(root_node, NO_PARENT)]
+    while pending:
+        node, parent_position = pending.pop()
+        position = len(nodes)
+        nodes.append((node, parent_position))
+        for child in reversed(node.children):
+            pending.append((child, position))
+    return nodes
+
+
+def encode_text(text):
+    if isinstance(text, unicode):
+        return text.encode('utf-8')
+    return str(text)
+
+
+def make_string_table(strings):
+    """
+        returns (offsets bytes, blob), the string at index i is blob[offsets[i]:offsets[i+1]].
+        array has no 64 bit type code on python 2, so the offsets are packed with struct
+    """
+    offsets = [0]
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+    return struct.pack("<{0}Q".format(len(offsets)), *offsets), "".join(strings)
+
+
+def get_array_bytes(values):
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+
+def write_tree_file(source_code_digraph, path):
+    """
+        param source_code_digraph: a SourceCodeDigraph after build_code_digraph was called
+        param path: string
+    """
+    type_names      = []
+    type_indexes    = {}
+    label_strings   = []
+    label_indexes   = {}
+    solutions       = []
+
+    types           = array.array('B')
+    parents         = array.array('i')
+    labels          = array.array('I')
+    test_cases      = array.array('i')
+
+    for node, parent_position in get_nodes_in_depth_first_order(source_code_digraph.digraph):
+        if node.type not in type_indexes:
+            type_indexes[node.type] = len(type_names)
+            type_names.append(node.type)
+
+        label = encode_text(node.statement)
+        if label not in label_indexes:
+            label_indexes[label] = len(label_strings)
+            label_strings.append(label)
+
+        types.append(type_indexes[node.type])
+        parents.append(parent_position)
+        labels.append(label_indexes[label])
+
+        if node.test_case_index is None:
+            test_cases.append(NO_TEST_CASE)
+        else:
+            test_cases.append(len(solutions))
+            solutions.append(json.dumps(source_code_digraph.test_cases[node.test_case_index]))
+
+    label_offsets, label_blob       = make_string_table(label_strings)
+    solution_offsets, solution_blob = make_string_table(solutions)
+    metadata                        = json.dumps({'types': type_names})
+
+    sections    = [get_array_bytes(types), get_array_bytes(parents), get_array_bytes(labels),
+                   get_array_bytes(test_cases), label_offsets, label_blob,
+                   solution_offsets, solution_blob]
+    offsets     = []
+    position    = HEADER.size + len(metadata)
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    with open(path, 'wb') as tree_file:
+        tree_file.write(HEADER.pack(MAGIC, VERSION, len(types), len(label_strings),
+                                    len(solutions), len(metadata), *offsets))
+        tree_file.write(metadata)
+        for section in sections:
+            tree_file.write(section)
+
+
+class TreeFileReader:
+    """
+        Reads a tree file through a memory map. Only the values a query
+        touches are read, so the whole tree is never loaded.
+    """
+
+    def __init__(self, path):
+        """
+            param path: string, a file written by write_tree_file
+        """
+        self.tree_file  = open(path, 'rb')
+        self.memory_map = mmap.mmap(self.tree_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self.memory_map, 0)
+        if header[0] != MAGIC:
+            raise ValueError("{0} is not a tree file".format(path))
+        if header[1] != VERSION:
+            raise ValueError("{0} has tree file version {1}, expected {2}".format(path, header[1], VERSION))
+
+        self.node_count, self.label_count, self.solution_count, metadata_size = header[2:6]
+        self.types_offset, self.parents_offset, self.labels_offset, self.test_cases_offset, \
+            self.label_offsets_offset, self.label_blob_offset, \
+            self.solution_offsets_offset, self.solution_blob_offset = header[6:]
+
+        metadata        = json.loads(self.memory_map[HEADER.size:HEADER.size + metadata_size])
+        self.type_names = [str(type_name) for type_name in metadata['types']]
+
+    def close(self):
+        self.memory_map.close()
+        self.tree_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def check_node_id(self, node_id):
+        if not 0 <= node_id < self.node_count:
+            raise IndexError("node {0} is not in the tree, it has {1} nodes".format(node_id,
+                                                                                   self.node_count))
+
+    def read_value(self, value_format, column_offset, index):
+        position = column_offset + index*struct.calcsize(value_format)
+        return struct.unpack_from(value_format, self.memory_map, position)[0]
+
+    def read_string(self, offsets_offset, blob_offset, index):
+        start   = self.read_value("<Q", offsets_offset, index)
+        end     = self.read_value("<Q", offsets_offset, index + 1)
+        return self.memory_map[blob_offset + start:blob_offset + end]
+
+    def get_type(self, node_id):
+        self.check_node_id(node_id)
+        return self.type_names[self.read_value("<B", self.types_offset, node_id)]
+
+    def get_parent(self, node_id):
+        """
+            returns the node id of the parent, None for the root
+        """
+        self.check_node_id(node_id)
+        parent_node_id = self.read_value("<i", self.parents_offset, node_id)
+        if parent_node_id == NO_PARENT:
+            return None
+        return parent_node_id
+
+    def get_label(self, node_id):
+        self.check_node_id(node_id)
+        label_index = self.read_value("<I", self.labels_offset, node_id)
+        return self.read_string(self.label_offsets_offset, self.label_blob_offset, label_index)
+
+    def get_nodes_of_type(self, node_type):
+        """
+            scans the types column only, one byte per node
+        """
+        if node_type not in self.type_names:
+            return []
+
+        type_byte   = chr(self.type_names.index(node_type))
+        end         = self.types_offset + self.node_count
+        node_ids    = []
+        position    = self.memory_map.find(type_byte, self.types_offset, end)
+        while position != -1:
+            node_ids.append(position - self.types_offset)
+            position = self.memory_map.find(type_byte, position + 1, end)
+        return node_ids
+
+    def get_error_nodes(self):
+        return self.get_nodes_of_type("Assert")
+
+    def get_path_to_node(self, node_id):
+        """
+            returns the node ids from the root down to node_id
+        """
+        path = []
+        while node_id is not None:
+            path.append(node_id)
+            node_id = self.get_parent(node_id)
+        path.reverse()
+        return path
+
+    def get_test_case(self, node_id):
+        """
+            returns the test case produced at node_id, None when the node has none.
+            Test cases are produced at the leaves of feasible paths
+        """
+        self.check_node_id(node_id)
+        solution_index = self.read_value("<i", self.test_cases_offset, node_id)
+        if solution_index == NO_TEST_CASE:
+            return None
+
+        test_case = json.loads(self.read_string(self.solution_offsets_offset,
+                                                self.solution_blob_offset, solution_index))
+        if isinstance(test_case, dict):
+            return dict((str(variable), str(value)) for variable, value in test_case.iteritems())
+        return test_case
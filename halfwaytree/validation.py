@@ -0,0 +1,255 @@
+#-------------------------------------------------------------------------------
+# Name:         validation
+# Purpose:      Batch replay of generated test cases against their path conditions
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import numpy
+import z3
+
+from halfwaytree.fuzzing import compile_binary_operation, compile_division, UnsupportedExpression
+
+#z3 operators of the integer and bit-vector encodings, evaluated the way the
+#python operator they were made from evaluates its operands
+PYTHON_OPERATIONS = {
+    z3.Z3_OP_ADD: numpy.add, z3.Z3_OP_SUB: numpy.subtract, z3.Z3_OP_MUL: numpy.multiply,
+    z3.Z3_OP_BADD: numpy.add, z3.Z3_OP_BSUB: numpy.subtract, z3.Z3_OP_BMUL: numpy.multiply,
+    z3.Z3_OP_LE: numpy.less_equal, z3.Z3_OP_LT: numpy.less,
+    z3.Z3_OP_GE: numpy.greater_equal, z3.Z3_OP_GT: numpy.greater,
+    z3.Z3_OP_SLEQ: numpy.less_equal, z3.Z3_OP_SLT: numpy.less,
+    z3.Z3_OP_SGEQ: numpy.greater_equal, z3.Z3_OP_SGT: numpy.greater,
+    z3.Z3_OP_EQ: numpy.equal, z3.Z3_OP_AND: numpy.logical_and, z3.Z3_OP_OR: numpy.logical_or}
+
+#z3 div and mod are euclidean and bvsdiv truncates, python floors the quotient
+PYTHON_DIVISIONS = {z3.Z3_OP_IDIV: numpy.floor_divide, z3.Z3_OP_MOD: numpy.mod,
+                    z3.Z3_OP_BSDIV: numpy.floor_divide, z3.Z3_OP_BSMOD: numpy.mod}
+
+
+def get_value_of_sort(value, sort):
+    if sort.kind() == z3.Z3_BV_SORT:
+        return z3.BitVecVal(value, sort.size())
+    return z3.IntVal(value)
+
+
+def get_variables_of_expression(expression, variables):
+    """
+        param variables: dictionary which is filled with variable names to z3 constants
+    """
+    if z3.is_const(expression) and expression.decl().kind() == z3.Z3_OP_UNINTERPRETED:
+        variables[str(expression)] = expression
+    for child in expression.children():
+        get_variables_of_expression(child, variables)
+    return variables
+
+
+def compile_constraint_to_python(expression, variable_names, divisors):
+    """
+        param expression: z3 expression of the integer or bit-vector encoding
+        param variable_names: set which is filled with the names of the variables found
+        param divisors: list which is filled with a function per divisor found, rows where
+                        one is zero would raise ZeroDivisionError in python
+        returns a function taking a dictionary of columns and returning a column. Columns
+        hold python integers, so values are never wrapped around as in a bit-vector
+    """
+    if z3.is_int_value(expression):
+        value = expression.as_long()
+        return lambda columns: value
+
+    if z3.is_bv_value(expression):
+        value = expression.as_signed_long()
+        return lambda columns: value
+
+    if z3.is_true(expression):
+        return lambda columns: True
+
+    if z3.is_false(expression):
+        return lambda columns: False
+
+    if z3.is_const(expression) and expression.decl().kind() == z3.Z3_OP_UNINTERPRETED and \
+            (z3.is_int(expression) or z3.is_bv(expression)):
+        name = str(expression)
+        variable_names.add(name)
+        return lambda columns: columns[name]
+
+    arguments = [compile_constraint_to_python(child, variable_names, divisors)
+                 for child in expression.children()]
+    kind = expression.decl().kind()
+
+    if kind in PYTHON_OPERATIONS:
+        return compile_binary_operation(PYTHON_OPERATIONS[kind], arguments)
+    if kind in PYTHON_DIVISIONS:
+        divisors.append(arguments[1])
+        return compile_division(PYTHON_DIVISIONS[kind], arguments)
+    if kind in (z3.Z3_OP_UMINUS, z3.Z3_OP_BNEG):
+        return lambda columns: numpy.negative(arguments[0](columns))
+    if kind == z3.Z3_OP_DISTINCT and len(arguments) == 2:
+        return compile_binary_operation(numpy.not_equal, arguments)
+    if kind == z3.Z3_OP_NOT:
+        return lambda columns: numpy.logical_not(arguments[0](columns))
+    if kind == z3.Z3_OP_ITE:
+        return lambda columns: numpy.where(arguments[0](columns), arguments[1](columns),
+                                           arguments[2](columns))
+
+    raise UnsupportedExpression(str(expression))
+
+
+class TestCaseValidator:
+    """
+        Checks that the values of every test case satisfy the path condition
+        recorded for it. Each distinct constraint is evaluated once over the
+        values of all test cases at the same time.
+
+        Constraints are replayed with python semantics rather than those of the
+        solver: integers never overflow, division and modulo floor, and a
+        division by zero fails the path as the ZeroDivisionError would. So a
+        test case the encoding got wrong, such as one relying on a bit-vector
+        wrapping around, is reported. Test cases which were never solved, None
+        for a path the solver gave up on or not yet solved offline, are not
+        replayed and are counted in unsolved_rows.
+    """
+
+    def __init__(self, test_cases, path_conditions):
+        """
+            param test_cases: list, the test_cases of a SourceCodeDigraph
+            param path_conditions: list of lists of z3 arithmetic booleans, index aligned with test_cases
+        """
+        if len(test_cases) != len(path_conditions):
+            raise ValueError("every test case needs the path condition which produced it")
+
+        self.test_cases         = test_cases
+        self.path_conditions    = path_conditions
+        self.replayed_rows      = [index for index, test_case in enumerate(test_cases)
+                                   if test_case is not False and test_case is not None]
+        self.unsolved_rows      = [index for index, test_case in enumerate(test_cases) if test_case is None]
+        self.columns            = self.make_columns()
+
+    def get_test_case_values(self, test_case):
+        if test_case is True:
+            #any input works, so the default values are as good as any
+            return {}
+        return dict((name, int(value)) for name, value in test_case.iteritems())
+
+    def make_columns(self):
+        """
+            returns a dictionary of variable names to arrays holding the value of that
+            variable in every replayed test case. Variables a test case does not
+            mention are unconstrained on its path and default to 0
+        """
+        variable_names = set()
+        for index in self.replayed_rows:
+            variable_names.update(self.get_test_case_values(self.test_cases[index]).keys())
+
+        columns = dict((name, self.make_column()) for name in variable_names)
+
+        for row, index in enumerate(self.replayed_rows):
+            for name, value in self.get_test_case_values(self.test_cases[index]).iteritems():
+                columns[name][row] = value
+        return columns
+
+    def make_column(self):
+        #python integers, which numpy adds and divides with the python operators
+        column = numpy.empty(len(self.replayed_rows), dtype=object)
+        column.fill(0)
+        return column
+
+    def get_columns(self, variable_names):
+        for name in variable_names:
+            if name not in self.columns:
+                self.columns[name] = self.make_column()
+        return self.columns
+
+    def evaluate_constraint_with_z3(self, constraint, rows):
+        """
+            fallback for constraints that can not be compiled to NumPy, such as
+            bit-wise operators, which are evaluated with the semantics of z3
+        """
+        variables   = get_variables_of_expression(constraint, {})
+        columns     = self.get_columns(variables.keys())
+        results     = numpy.zeros(len(self.replayed_rows), dtype=bool)
+        for row in rows:
+            substitutions = [(variable, get_value_of_sort(int(columns[name][row]), variable.sort()))
+                             for name, variable in variables.iteritems()]
+            results[row] = z3.is_true(z3.simplify(z3.substitute(constraint, *substitutions)))
+        return results
+
+    def evaluate_constraint(self, constraint, rows):
+        """
+            param constraint: z3 arithmetic boolean or python boolean
+            returns a boolean array with the value of the constraint in every replayed test case
+        """
+        size = len(self.replayed_rows)
+        if constraint is True or constraint is False:
+            return numpy.repeat(constraint, size)
+
+        variable_names, divisors = set(), []
+        try:
+            function = compile_constraint_to_python(constraint, variable_names, divisors)
+        except UnsupportedExpression:
+            return self.evaluate_constraint_with_z3(constraint, rows)
+
+        columns = self.get_columns(variable_names)
+        results = numpy.broadcast_to(function(columns), (size,)).astype(bool)
+        for divisor in divisors:
+            #python raises ZeroDivisionError there, so the test case never takes the path
+            results &= numpy.broadcast_to(divisor(columns) != 0, (size,)).astype(bool)
+        return results
+
+    def get_rows_of_constraints(self):
+        """
+            returns a list of (constraint, rows) where rows are the replayed test cases
+            whose path condition holds that constraint
+        """
+        rows_of_constraints = {}
+        for row, index in enumerate(self.replayed_rows):
+            for constraint in self.path_conditions[index]:
+                key = ('python', constraint) if isinstance(constraint, bool) else constraint.get_id()
+                if key not in rows_of_constraints:
+                    rows_of_constraints[key] = (constraint, [])
+                rows_of_constraints[key][1].append(row)
+        return rows_of_constraints.values()
+
+    def validate(self):
+        """
+            returns a list of mismatches, one dictionary per test case whose values do
+            not satisfy its path condition. An empty list means every test case is correct
+        """
+        failed_constraints = dict((row, []) for row in range(len(self.replayed_rows)))
+
+        for constraint, rows in self.get_rows_of_constraints():
+            results = self.evaluate_constraint(constraint, rows)
+            for row in rows:
+                if not results[row]:
+                    failed_constraints[row].append(str(constraint))
+
+        mismatches = []
+        for row, index in enumerate(self.replayed_rows):
+            if failed_constraints[row]:
+                mismatches.append({'test_case_index': index,
+                                   'test_case': self.test_cases[index],
+                                   'failed_constraints': failed_constraints[row]})
+        return mismatches
+
+    def report(self):
+        mismatches  = self.validate()
+        lines       = ["replayed {0} test cases, {1} mismatches, {2} unsolved".format(
+            len(self.replayed_rows), len(mismatches), len(self.unsolved_rows))]
+        for mismatch in mismatches:
+            lines.append("test case {0} {1} fails: {2}".format(mismatch['test_case_index'],
+                                                               mismatch['test_case'],
+                                                               ", ".join(mismatch['failed_constraints'])))
+        return "\n".join(lines)
+
+
+def validate_source_code_digraph(source_code_digraph):
+    """
+        param source_code_digraph: a SourceCodeDigraph after build_code_digraph was called
+        returns the mismatches found by TestCaseValidator.validate
+    """
+    validator = TestCaseValidator(source_code_digraph.test_cases, source_code_digraph.path_conditions)
+    return validator.validate()
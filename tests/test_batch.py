@@ -0,0 +1,143 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree batch tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import StringIO
+import tempfile
+import unittest
+import shutil
+import json
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.batch as batch
+from halfwaytree.astor.misc import CodeToAst
+from test_regression import explore
+from test_source_codes import source_codes
+
+MODULE_SOURCE_CODE = "def f(a, b):\n    if a > b:\n        return 1\n    return 0\n"
+
+#g calls f, so the source code of g defines f first
+CALLING_MODULE_SOURCE_CODE = MODULE_SOURCE_CODE + "def g(c):\n    if f(c, 3) == 1:\n        return 2\n    return c\n"
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_module(self, name, source_code):
+        file_path = os.path.join(self.directory, name)
+        with open(file_path, 'w') as module_file:
+            module_file.write(source_code)
+        return file_path
+
+    def test_the_front_end_artifact_of_a_file_is_cached_until_it_changes(self):
+        file_path = self.write_module("module.py", MODULE_SOURCE_CODE)
+        name, source_code, symbolic_inputs, source_file_path = batch.get_function_sources_from_paths([file_path])[0]
+
+        artifact = batch.get_front_end_artifact(file_path, source_code, False)
+        explored = explore(source_code, symbolic_inputs=symbolic_inputs, front_end_artifact=artifact)
+        self.assertEqual(explored.test_cases, explore(source_code, symbolic_inputs=symbolic_inputs).test_cases)
+        self.assertTrue(explored.compiled_sources is artifact.compiled_sources)
+        self.assertTrue(batch.get_front_end_artifact(file_path, source_code, False) is artifact)
+
+        with open(file_path, 'a') as module_file:
+            module_file.write("\n")
+        self.assertFalse(batch.get_front_end_artifact(file_path, source_code, False) is artifact)
+
+    def test_the_module_cache_evicts_the_least_recently_used_module(self):
+        first_path  = self.write_module("first.py", MODULE_SOURCE_CODE)
+        second_path = self.write_module("second.py", MODULE_SOURCE_CODE)
+        code_to_ast = CodeToAst(max_bytes=1)
+
+        first_module = code_to_ast.get_module(first_path)
+        self.assertTrue(code_to_ast.get_module(first_path) is first_module)
+        #the most recently used module is always kept, so first.py goes
+        code_to_ast.get_module(second_path)
+        self.assertEqual(code_to_ast.cache.keys(), [second_path])
+        self.assertFalse(code_to_ast.get_module(first_path) is first_module)
+        self.assertEqual(code_to_ast.statistics, {'hits': 1, 'misses': 3, 'invalidations': 0, 'evictions': 2})
+
+    def test_every_source_code_is_analyzed_with_its_own_budget(self):
+        sources = batch.get_sources_from_list([source_codes[1], source_codes[4], "x = 0\nif x:\n    print x\nprint\n"])
+        batch_runner = batch.BatchRunner(processes=2, max_node_count=10)
+        results = dict((result['name'], result) for result in batch_runner.run(sources))
+
+        self.assertEqual(sorted(results.keys()), ["source_code0", "source_code1", "source_code2"])
+        self.assertEqual(results["source_code0"]['status'], 'ok')
+        self.assertEqual(results["source_code0"]['test_cases'], explore(source_codes[1]).test_cases)
+        #source_codes[4] explores 23 nodes
+        self.assertEqual(results["source_code1"]['status'], 'budget_exceeded')
+        self.assertTrue("UnsupportedConstruct" in results["source_code2"]['error'])
+        self.assertEqual([batch_runner.statistics[status] for status in ['ok', 'budget_exceeded', 'error']],
+                         [1, 1, 1])
+
+    def test_results_are_written_as_json_lines(self):
+        output_file = StringIO.StringIO()
+        batch.BatchRunner(processes=2).write_json_lines(batch.get_sources_from_list(source_codes[:3]), output_file)
+
+        results = [json.loads(line) for line in output_file.getvalue().splitlines()]
+        self.assertEqual(sorted((result['name'], result['node_count']) for result in results),
+                         [("source_code{0}".format(index), explore(source_code).node_count)
+                          for index, source_code in enumerate(source_codes[:3])])
+
+    def run_command_line(self, arguments):
+        """
+            returns the results main wrote to its output file, its report to standard error is dropped
+        """
+        output_path = os.path.join(self.directory, "results.jsonl")
+        stderr      = sys.stderr
+        sys.stderr  = StringIO.StringIO()
+        try:
+            batch.main(arguments + ["--output", output_path])
+        finally:
+            sys.stderr = stderr
+        with open(output_path) as output_file:
+            return [json.loads(line) for line in output_file]
+
+    def test_every_top_level_function_is_analyzed_on_its_own(self):
+        file_path   = self.write_module("module.py", CALLING_MODULE_SOURCE_CODE)
+        results     = self.run_command_line(["--functions", "--processes", "2", file_path])
+
+        sources = batch.get_function_sources_from_paths([file_path])
+        self.assertEqual([name for name, source_code, symbolic_inputs, source_file_path in sources],
+                         [file_path + ":f", file_path + ":g"])
+        self.assertTrue(sources[1][1].startswith("def f(a, b):"))
+        results = dict((result['name'], result) for result in results)
+        for name, source_code, symbolic_inputs, source_file_path in sources:
+            self.assertEqual(results[name]['status'], 'ok')
+            self.assertEqual(results[name]['test_cases'],
+                             explore(source_code, symbolic_inputs=symbolic_inputs).test_cases)
+
+    def test_the_command_line_analyzes_files_and_source_lists(self):
+        file_path   = self.write_module("module.py", source_codes[1])
+        list_path   = self.write_module("source_list.py", "source_codes = {0!r}\n".format(source_codes[:2]))
+        results     = self.run_command_line([file_path, "--source-list", list_path, "--processes", "2"])
+
+        self.assertEqual(sorted(result['name'] for result in results), [file_path, "source_code0", "source_code1"])
+        stderr      = sys.stderr
+        sys.stderr  = StringIO.StringIO()
+        try:
+            self.assertRaises(SystemExit, batch.main, [])
+        finally:
+            sys.stderr = stderr
+
+
+if __name__ == "__main__":
+    unittest.main()
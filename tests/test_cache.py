@@ -0,0 +1,100 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree solver cache tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import unittest
+import shutil
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.cache import SolverResultCache
+from halfwaytree.solvers import Z3Backend
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+
+class SolverResultCacheTest(ExplorationTestCase):
+
+    def setUp(self):
+        self.directory  = tempfile.mkdtemp()
+        self.path       = os.path.join(self.directory, "solver-cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_a_later_run_reads_every_result_from_disk(self):
+        source_code = source_codes[4]
+        first_cache = SolverResultCache(self.path)
+        first       = explore(source_code, solver_cache=first_cache)
+        first_cache.close()
+
+        second_cache    = SolverResultCache(self.path)
+        second          = explore(source_code, solver_cache=second_cache)
+        second_cache.close()
+
+        self.assertEqual(first_cache.statistics['misses'], first_cache.statistics['stores'])
+        self.assertEqual(second_cache.statistics['misses'], 0)
+        self.assertEqual(second_cache.statistics['disk_hits'], first_cache.statistics['stores'])
+        self.assertEqual(second.test_cases, first.test_cases)
+        self.assertSameExploration(source_code, second, explore(source_code))
+
+    def test_unknown_results_are_not_stored(self):
+        solver_cache = SolverResultCache(self.path)
+        try:
+            solver_backend = Z3Backend(tactic="skip")
+            explore(source_codes[1], solver_cache=solver_cache, solver_backend=solver_backend)
+            self.assertTrue(solver_backend.statistics['unknown'] > 0)
+            self.assertEqual(solver_cache.statistics['stores'],
+                             solver_backend.statistics['checks'] - solver_backend.statistics['unknown'])
+
+            x = z3.Int('x')
+            solver_cache.put([x > 1, x < 0], None, None)
+            self.assertEqual(solver_cache.get([x > 1, x < 0]), None)
+
+            #a backend which decides the paths solves them instead of reading them as unsatisfiable
+            source_code_digraph = explore(source_codes[1], solver_cache=solver_cache)
+            self.assertSameExploration(source_codes[1], source_code_digraph, explore(source_codes[1]))
+        finally:
+            solver_cache.close()
+
+    def test_namespaces_keep_results_apart(self):
+        solver_cache    = SolverResultCache(self.path)
+        x               = z3.Int('x')
+        try:
+            solver_cache.put([x > 1], False, None, namespace="one")
+            self.assertEqual(solver_cache.get([x > 1], namespace="one"), (False, None))
+            self.assertEqual(solver_cache.get([x > 1], namespace="two"), None)
+        finally:
+            solver_cache.close()
+
+    def test_the_least_recently_used_results_are_evicted(self):
+        solver_cache = SolverResultCache(self.path, max_size_bytes=200, memory_entries=1)
+        try:
+            for value in range(10):
+                solver_cache.put([z3.Int('x') > value], False, None)
+            solver_cache.evict()
+
+            self.assertTrue(solver_cache.statistics['evictions'] > 0)
+            self.assertTrue(solver_cache.get_stored_size() <= 200)
+            self.assertEqual(solver_cache.get([z3.Int('x') > 9]), (False, None))
+        finally:
+            solver_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree checkpoint tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import unittest
+import shutil
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.checkpoint import ExplorationCheckpoint
+from halfwaytree.solvers import Z3Backend
+from test_regression import ExplorationTestCase, explore, get_branches, FUNCTION_SOURCE_CODE
+from test_source_codes import source_codes
+
+
+class Killed(Exception):
+    pass
+
+
+class DyingCheckpoint(ExplorationCheckpoint):
+    """
+        stops the exploration as if its process was killed
+    """
+
+    def __init__(self, directory, interval, killed_after):
+        """
+            param killed_after: int, the number of nodes expanded before the process is killed
+        """
+        ExplorationCheckpoint.__init__(self, directory, interval)
+        self.killed_after = killed_after
+
+    def node_expanded(self, source_code_digraph):
+        ExplorationCheckpoint.node_expanded(self, source_code_digraph)
+        if self.expanded_nodes == self.killed_after:
+            raise Killed()
+
+
+def explore_from_checkpoint(source_code, checkpoint, **options):
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False, **options)
+    source_code_digraph.build_code_digraph(checkpoint=checkpoint)
+    return source_code_digraph
+
+
+class ExplorationCheckpointTest(ExplorationTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_resuming_from_a_checkpoint(self):
+        for source_code in source_codes:
+            directory = os.path.join(self.directory, str(source_codes.index(source_code)))
+            try:
+                explore_from_checkpoint(source_code, DyingCheckpoint(directory, interval=3, killed_after=7))
+            except Killed:
+                pass
+            resumed = explore_from_checkpoint(source_code, ExplorationCheckpoint(directory, interval=3))
+
+            self.assertSameExploration(source_code, resumed, explore(source_code), ordered=False)
+
+    def test_a_checkpoint_resumes_after_a_function_definition(self):
+        self.assertRaises(Killed, explore_from_checkpoint, FUNCTION_SOURCE_CODE,
+                          DyingCheckpoint(self.directory, interval=2, killed_after=5))
+        resumed = explore_from_checkpoint(FUNCTION_SOURCE_CODE, ExplorationCheckpoint(self.directory, interval=2))
+
+        full = explore(FUNCTION_SOURCE_CODE)
+        self.assertEqual(resumed.node_count, full.node_count)
+        self.assertEqual(sorted(get_branches(FUNCTION_SOURCE_CODE, test_case) for test_case in resumed.test_cases),
+                         sorted(get_branches(FUNCTION_SOURCE_CODE, test_case) for test_case in full.test_cases))
+
+    def test_only_the_nodes_after_the_last_segment_are_explored_again(self):
+        source_code = source_codes[4]
+        self.assertRaises(Killed, explore_from_checkpoint, source_code,
+                          DyingCheckpoint(self.directory, interval=5, killed_after=12))
+
+        checkpoint = ExplorationCheckpoint(self.directory, interval=5)
+        resumed = explore_from_checkpoint(source_code, checkpoint)
+        #segments were written after 5 and 10 nodes
+        self.assertEqual(checkpoint.expanded_nodes, resumed.node_count - 10)
+
+    def test_a_finished_exploration_is_not_explored_again(self):
+        source_code = source_codes[4]
+        finished    = explore_from_checkpoint(source_code, ExplorationCheckpoint(self.directory))
+
+        solver_backend  = Z3Backend()
+        checkpoint      = ExplorationCheckpoint(self.directory)
+        resumed         = explore_from_checkpoint(source_code, checkpoint, solver_backend=solver_backend)
+        self.assertEqual(checkpoint.expanded_nodes, 0)
+        self.assertEqual(solver_backend.statistics['checks'], 0)
+        self.assertEqual(resumed.test_cases, finished.test_cases)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree concolic execution tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.validation import validate_source_code_digraph
+from halfwaytree.concolic import ConcolicExecution
+from test_regression import explore, get_paths
+from test_source_codes import source_codes
+
+ERROR_SOURCE_CODE = """
+x = 0
+y = 0
+if x > 10:
+    if y == x + 3:
+        assert False
+print
+"""
+
+
+class ConcolicExecutionTest(unittest.TestCase):
+
+    def test_concolic_execution_finds_the_feasible_paths(self):
+        """
+            concolic execution builds no digraph and finds each path once, the
+            exploration has a test case per leaf
+        """
+        for source_code in source_codes:
+            concolic = ConcolicExecution(source_code)
+            concolic.build_test_cases()
+
+            self.assertEqual(get_paths(source_code, concolic), get_paths(source_code, explore(source_code)))
+            self.assertEqual(validate_source_code_digraph(concolic), [])
+
+    def test_the_seed_inputs_are_run_first(self):
+        concolic = ConcolicExecution(ERROR_SOURCE_CODE, seed_inputs=[{'x': 20, 'y': 23}])
+        concolic.build_test_cases()
+
+        self.assertEqual(concolic.test_cases[0], {'x': '20', 'y': '23'})
+        self.assertEqual(concolic.error_inputs, [{'x': 20, 'y': 23}])
+        self.assertEqual(concolic.concolic_statistics['executions'], 3)
+
+    def test_negating_branches_reaches_the_assert(self):
+        concolic = ConcolicExecution(ERROR_SOURCE_CODE)
+        concolic.build_test_cases()
+
+        self.assertEqual(len(concolic.error_inputs), 1)
+        inputs = concolic.error_inputs[0]
+        self.assertTrue(inputs['x'] > 10 and inputs['y'] == inputs['x'] + 3)
+        #one solver call per branch, not per path
+        self.assertEqual(concolic.concolic_statistics['solver_calls'], 2)
+        self.assertEqual(concolic.concolic_statistics['divergences'], 0)
+
+    def test_the_search_stops_after_max_executions(self):
+        concolic = ConcolicExecution(ERROR_SOURCE_CODE, max_executions=1)
+        concolic.build_test_cases()
+
+        self.assertEqual(concolic.concolic_statistics['executions'], 1)
+        self.assertEqual(concolic.test_cases, [{'x': '0', 'y': '0'}])
+        self.assertEqual(concolic.error_inputs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
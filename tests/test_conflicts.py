@@ -0,0 +1,75 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree unsat core learning tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.conflicts import UnsatCoreLearner
+from halfwaytree.solvers import Z3Backend
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+#the body of if x < 3 is unsatisfiable, and so is every path below it
+CONFLICT_SOURCE_CODE = """
+x = 0
+y = 0
+if x > 5:
+    if x < 3:
+        print x
+        if y > 1:
+            print y
+        if y < -1:
+            print y
+print
+"""
+
+
+class UnsatCoreLearnerTest(ExplorationTestCase):
+
+    def test_unsat_core_learning(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore(source_code, unsat_core_learner=UnsatCoreLearner()),
+                                       explore(source_code))
+
+    def test_a_core_answers_every_path_condition_holding_it(self):
+        unsat_core_learner  = UnsatCoreLearner()
+        x, y                = z3.Int('x'), z3.Int('y')
+
+        core = unsat_core_learner.learn([y > 0, x > 5, x < 3])
+        #y > 0 plays no part in the conflict
+        self.assertEqual(core, unsat_core_learner.get_keys([x > 5, x < 3]))
+        self.assertEqual(unsat_core_learner.find_core([x < 3, y == 1, x > 5]), core)
+        self.assertEqual(unsat_core_learner.find_core([x > 5, y > 0]), None)
+        self.assertEqual(unsat_core_learner.learn([x > 5]), None)
+
+    def test_paths_below_an_unsatisfiable_path_skip_the_solver(self):
+        unsat_core_learner  = UnsatCoreLearner()
+        with_cores          = Z3Backend()
+        without_cores       = Z3Backend()
+        explored = explore(CONFLICT_SOURCE_CODE, unsat_core_learner=unsat_core_learner, solver_backend=with_cores)
+        baseline = explore(CONFLICT_SOURCE_CODE, solver_backend=without_cores)
+
+        self.assertTrue(unsat_core_learner.statistics['hits'] > 0)
+        self.assertEqual(with_cores.statistics['checks'],
+                         without_cores.statistics['checks'] - unsat_core_learner.statistics['hits'])
+        self.assertSameExploration(CONFLICT_SOURCE_CODE, explored, baseline)
+
+
+if __name__ == "__main__":
+    unittest.main()
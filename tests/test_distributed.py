@@ -0,0 +1,84 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree distributed exploration tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.distributed import explore_on_localhost, serialize_work_item, deserialize_work_item
+from test_regression import ExplorationTestCase, explore, get_branches
+from test_source_codes import source_codes
+
+#paths fork before the call, so workers which did not explore the definition reach it
+WIDE_FUNCTION_SOURCE_CODE = """
+x = 0
+y = 0
+z = 0
+def f(a):
+    if a > 3:
+        return 2
+    return a
+if y > 1:
+    y = 2
+if z > 1:
+    z = 2
+if y > z:
+    y = 3
+if f(x) == 2:
+    print x
+print
+"""
+
+
+class DistributedExplorationTest(ExplorationTestCase):
+
+    def test_workers_on_localhost(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore_on_localhost(source_code, worker_count=3),
+                                       explore(source_code))
+
+    def test_workers_on_localhost_find_the_test_cases_of_a_single_process(self):
+        for source_code in [WIDE_FUNCTION_SOURCE_CODE, source_codes[2], source_codes[4]]:
+            coordinator = explore_on_localhost(source_code, worker_count=3)
+            single      = explore(source_code)
+
+            self.assertEqual(coordinator.node_count, single.node_count)
+            self.assertEqual([get_branches(source_code, test_case) for test_case in coordinator.test_cases],
+                             [get_branches(source_code, test_case) for test_case in single.test_cases])
+
+    def test_every_node_is_explored_by_one_worker(self):
+        coordinator = explore_on_localhost(source_codes[4], worker_count=3)
+
+        self.assertEqual(coordinator.statistics['workers'], 3)
+        self.assertEqual(sum(coordinator.statistics['nodes_by_worker']), coordinator.node_count)
+        self.assertEqual(coordinator.statistics['stolen_items'] > 0, coordinator.statistics['steals'] > 0)
+
+    def test_a_work_item_keeps_its_path_condition_and_position(self):
+        x = z3.Int('x')
+        frontier_item = {'item_id': 4, 'ast_path': [2, 'body', 0], 'parent_node_id': 7, 'child_position': 1,
+                         'node_state': {'constraints': [x > 1], 'variables': {'x': x, 'y': x + 2}, 'type': True}}
+        work_item = deserialize_work_item(serialize_work_item(frontier_item))
+
+        self.assertEqual(work_item['child_position'], 1)
+        self.assertEqual(work_item['ast_path'], [2, 'body', 0])
+        self.assertTrue(z3.eq(work_item['node_state']['constraints'][0], x > 1))
+        self.assertTrue(z3.eq(work_item['node_state']['variables']['y'], x + 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree front end tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import ast
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+import halfwaytree.astor as astor
+from halfwaytree.frontend import run_front_end
+from halfwaytree.validation import validate_source_code_digraph
+from halfwaytree.treefile import get_nodes_in_depth_first_order
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+UNSUPPORTED_SOURCE_CODES = [
+    "x = 0\nif x > 1 or x < 0:\n    print x\nprint\n",
+    "x = 0\nfor i in range(3):\n    break\nprint\n",
+    "x = 0\nfor i in range(0, 3, 0):\n    x = x + i\nprint\n",
+    "x = 0\ndef f(a):\n    assert a > 1\n    return a\nif f(x) > 2:\n    print x\nprint\n",
+    "x = 0\ndef f(*a):\n    return 1\nif f(x) > 2:\n    print x\nprint\n",
+    #else and elif
+    "x = 0\nif x > 1:\n    print x\nelse:\n    print 1\nprint\n",
+    "x = 0\nif x > 1:\n    print x\nelif x < 0:\n    print 1\nprint\n",
+    #conditions which are not comparisons
+    "x = 0\nif x:\n    print x\nprint\n",
+    "x = 0\nif x > 1 and x:\n    print x\nprint\n",
+    "x = 0\nassert x\nprint\n",
+    #a function body reading a module variable
+    "x = 0\ny = 0\ndef f(a):\n    return a + y\nif f(x) > 2:\n    print x\nprint\n",
+]
+
+
+class FrontEndTest(ExplorationTestCase):
+
+    def test_unsupported_constructs_are_reported_before_exploring(self):
+        for source_code in UNSUPPORTED_SOURCE_CODES:
+            self.assertRaises(digraph.UnsupportedConstruct, explore, source_code)
+
+    def test_the_source_code_of_the_normalized_ast_explores_the_same(self):
+        for source_code in source_codes:
+            baseline    = explore(source_code)
+            normalized  = astor.to_source(baseline.make_front_end_artifact(source_code).abstract_syntax_tree)
+            self.assertSameExploration(source_code, explore(normalized), baseline, explored_source_code=normalized)
+
+    def test_an_assert_is_split_into_one_if_statement_per_condition(self):
+        abstract_syntax_tree = ast.parse("x = 0\ny = 0\nassert 0 < x < y, 'ordered'\nprint\n")
+        run_front_end(abstract_syntax_tree)
+
+        if_statements = abstract_syntax_tree.body[2:4]
+        self.assertEqual([if_statement.condition_sources for if_statement in if_statements],
+                         [["(0 >= x)"], ["(x >= y)"]])
+        self.assertEqual([astor.to_source(if_statement.body[0]) for if_statement in if_statements],
+                         ["assert False, 'ordered'"] * 2)
+        statement_ids = [statement.statement_id for statement in ast.walk(abstract_syntax_tree)
+                         if hasattr(statement, 'statement_id')]
+        self.assertEqual(len(statement_ids), len(set(statement_ids)))
+
+    def test_an_assert_fails_on_the_inputs_which_make_its_test_false(self):
+        source_code         = "x = 0\ny = 0\nassert 0 < x < y\nprint\n"
+        source_code_digraph = explore(source_code)
+
+        self.assertEqual([0 < int(test_case['x']) < int(test_case.get('y', 0))
+                          for test_case in source_code_digraph.test_cases], [False, False, True])
+        #each condition fails on a path of its own
+        self.assertEqual(len([node for node, parent_position in get_nodes_in_depth_first_order(
+                              source_code_digraph.digraph) if node.type == "Assert"]), 2)
+        self.assertEqual(validate_source_code_digraph(source_code_digraph), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree spilling frontier tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.frontier import SpillingFrontier
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+
+def make_frontier_item(item_id):
+    return {'item_id': item_id, 'ast_path': ['body', 0], 'parent_node_id': None,
+            'node_state': {'constraints': [], 'variables': {}, 'type': None}}
+
+
+def explore_with_frontier(source_code, frontier):
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False)
+    try:
+        source_code_digraph.build_code_digraph(frontier=frontier)
+    finally:
+        frontier.close()
+    return source_code_digraph
+
+
+class SpillingFrontierTest(ExplorationTestCase):
+
+    def test_a_frontier_spilling_to_disk(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore_with_frontier(source_code, SpillingFrontier(max_items=2)),
+                                       explore(source_code), ordered=False)
+
+    def test_every_spilled_item_is_loaded_back(self):
+        frontier = SpillingFrontier(max_items=2)
+        explore_with_frontier(source_codes[4], frontier)
+
+        self.assertTrue(frontier.statistics['spilled_items'] > 0)
+        self.assertEqual(frontier.statistics['loaded_items'], frontier.statistics['spilled_items'])
+        #an item past max_items is pushed before the lowest priority half is spilled
+        self.assertTrue(frontier.statistics['max_items_in_memory'] <= 3)
+        self.assertEqual(len(frontier), 0)
+
+    def test_items_come_back_in_priority_order_across_segments(self):
+        frontier = SpillingFrontier(max_items=2)
+        try:
+            for item_id in range(1, 8):
+                frontier.append(make_frontier_item(item_id))
+            self.assertTrue(frontier.statistics['segments'] > 0)
+            self.assertEqual([frontier.pop()['item_id'] for item_id in range(7)], range(7, 0, -1))
+        finally:
+            frontier.close()
+
+    def test_closing_removes_the_temporary_directory(self):
+        frontier = SpillingFrontier(max_items=2)
+        for item_id in range(1, 5):
+            frontier.append(make_frontier_item(item_id))
+        self.assertTrue(os.listdir(frontier.directory))
+
+        frontier.close()
+        self.assertFalse(os.path.exists(frontier.directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
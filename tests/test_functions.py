@@ -0,0 +1,94 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree function summary tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import ast
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+import halfwaytree.astor as astor
+from test_regression import ExplorationTestCase, explore, get_branches, FUNCTION_SOURCE_CODE
+from test_source_codes import source_codes
+
+IDENTITY_FUNCTION = "def same(a):\n    return a\n"
+
+#returns nothing when a <= 3
+PARTIAL_RETURN_FUNCTION = "def f(a):\n    if a > 3:\n        return a\n"
+
+
+class CallWrapper(ast.NodeTransformer):
+    """
+        Makes every variable read by an if-statement test go through the
+        identity function same
+    """
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        node.test = NameWrapper().visit(node.test)
+        return node
+
+
+class NameWrapper(ast.NodeTransformer):
+
+    def visit_Name(self, node):
+        return ast.Call(ast.Name('same', ast.Load()), [node], [], None, None)
+
+
+def wrap_in_function_calls(source_code):
+    abstract_syntax_tree = CallWrapper().visit(ast.parse(source_code))
+    return IDENTITY_FUNCTION + astor.to_source(abstract_syntax_tree) + "\n"
+
+
+class FunctionTest(ExplorationTestCase):
+
+    def test_conditions_calling_a_function(self):
+        """
+            the definition of the function is the one node added
+        """
+        for source_code in source_codes:
+            wrapped = wrap_in_function_calls(source_code)
+            self.assertSameExploration(source_code, explore(wrapped), explore(source_code), added_nodes=1,
+                                       explored_source_code=wrapped)
+
+    def test_call_statements_run_the_function(self):
+        source_code = FUNCTION_SOURCE_CODE.replace("y = 0", "f(x)")
+        source_code_digraph = explore(source_code)
+        self.assertEqual(source_code_digraph.function_statistics['calls'], 3)
+        self.assertRaises(digraph.UnsupportedConstruct, explore, "x = 0\nx + 1\nprint\n")
+
+    def test_the_summary_is_made_once_and_each_call_takes_its_paths(self):
+        source_code_digraph = explore(FUNCTION_SOURCE_CODE)
+
+        self.assertEqual(source_code_digraph.function_statistics['summaries'], 1)
+        self.assertEqual(source_code_digraph.function_statistics['summary_paths'], 2)
+        #the branches of f are recorded where it is called, f(x) == 5 needs x > 3
+        self.assertEqual(sorted(get_branches(FUNCTION_SOURCE_CODE, test_case)
+                                for test_case in source_code_digraph.test_cases if test_case is not False),
+                         [[False, False, False], [True, False, False], [True, True, True]])
+
+    def test_a_definition_inside_an_if_statement_is_reported(self):
+        source_code = "x = 0\nif x > 1:\n    def f(a):\n        return a\nprint\n"
+        self.assertRaises(digraph.UnsupportedConstruct, explore, source_code)
+
+    def test_returning_a_value_on_only_some_paths_is_reported_where_it_is_defined(self):
+        #f is never called
+        source_code = "x = 0\n" + PARTIAL_RETURN_FUNCTION + "if x > 2:\n    print x\nprint\n"
+        self.assertRaises(digraph.UnsupportedConstruct, explore, source_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
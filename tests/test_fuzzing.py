@@ -0,0 +1,70 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree random input pre-pass tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.fuzzing import RandomInputPrepass
+from halfwaytree.solvers import Z3Backend
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+
+class RandomInputPrepassTest(ExplorationTestCase):
+
+    def test_sampled_inputs_take_the_paths_of_the_solver(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore(source_code, random_input_prepass=RandomInputPrepass()),
+                                       explore(source_code))
+
+    def test_hits_save_solver_calls(self):
+        source_code             = source_codes[4]
+        random_input_prepass    = RandomInputPrepass()
+        with_prepass            = Z3Backend()
+        without_prepass         = Z3Backend()
+        explore(source_code, random_input_prepass=random_input_prepass, solver_backend=with_prepass)
+        explore(source_code, solver_backend=without_prepass)
+
+        self.assertTrue(random_input_prepass.statistics['hits'] > 0)
+        self.assertEqual(with_prepass.statistics['checks'],
+                         without_prepass.statistics['checks'] - random_input_prepass.statistics['hits'])
+
+    def test_constants_of_the_constraints_are_sampled(self):
+        random_input_prepass    = RandomInputPrepass(sample_count=256)
+        x, y                    = z3.Int('x'), z3.Int('y')
+
+        #one random value in two thousand would hit it
+        solution = random_input_prepass.find_satisfying_inputs([x == 577, y > x])
+        self.assertEqual(solution['x'], 577)
+        self.assertTrue(solution['y'] > 577)
+        self.assertEqual(random_input_prepass.statistics['hits'], 1)
+
+    def test_misses_and_unsupported_constraints_are_left_to_the_solver(self):
+        random_input_prepass    = RandomInputPrepass()
+        x                       = z3.Int('x')
+
+        self.assertEqual(random_input_prepass.find_satisfying_inputs([x * x < 0]), None)
+        self.assertEqual(random_input_prepass.find_satisfying_inputs([z3.BitVec('b', 8) > 1]), None)
+        self.assertEqual(random_input_prepass.find_satisfying_inputs([False]), None)
+        self.assertEqual(random_input_prepass.statistics,
+                         {'queries': 3, 'hits': 0, 'misses': 2, 'unsupported': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree incremental re-analysis tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.incremental import IncrementalSourceCodeDigraph
+from halfwaytree.solvers import Z3Backend
+from test_regression import ExplorationTestCase, explore, get_branches, FUNCTION_SOURCE_CODE
+from test_source_codes import source_codes
+
+
+def explore_incrementally(source_code, previous=None, **options):
+    source_code_digraph = IncrementalSourceCodeDigraph(source_code, previous_digraph=previous, **options)
+    source_code_digraph.build_code_digraph()
+    return source_code_digraph
+
+
+class IncrementalSourceCodeDigraphTest(ExplorationTestCase):
+
+    def test_incremental_reanalysis_of_an_edited_source_code(self):
+        for source_code in source_codes:
+            edited      = "print 'start'\n" + source_code.replace('print "okay1"', 'print "changed"', 1)
+            incremental = explore_incrementally(edited, explore_incrementally(source_code))
+
+            self.assertSameExploration(edited, incremental, explore(edited))
+
+    def test_editing_a_function_body_invalidates_the_subtrees_below(self):
+        source_code = FUNCTION_SOURCE_CODE
+        edited      = source_code.replace("return a + 1", "return a + 2")
+        incremental = explore_incrementally(edited, explore_incrementally(source_code))
+
+        self.assertEqual([get_branches(edited, test_case) for test_case in incremental.test_cases],
+                         [get_branches(edited, test_case) for test_case in explore(edited).test_cases])
+
+    def test_an_unchanged_source_code_reuses_the_whole_tree(self):
+        previous    = explore_incrementally(source_codes[4])
+        incremental = explore_incrementally(source_codes[4], previous)
+
+        self.assertEqual(incremental.incremental_statistics['explored_nodes'], 0)
+        self.assertEqual(incremental.incremental_statistics['reused_nodes'], previous.node_count)
+        self.assertEqual(incremental.test_cases, previous.test_cases)
+
+    def test_paths_before_an_edit_are_answered_without_the_solver(self):
+        previous        = explore_incrementally(source_codes[4])
+        solver_backend  = Z3Backend()
+        edited          = source_codes[4].replace("print 'hi'", "var2 = 7")
+        incremental     = explore_incrementally(edited, previous, solver_backend=solver_backend)
+
+        #the subtree after the edited statement is new, the solver results of its paths are not
+        self.assertTrue(incremental.incremental_statistics['reused_solutions'] > 0)
+        self.assertEqual(solver_backend.statistics['checks'], 0)
+        self.assertSameExploration(edited, incremental, explore(edited))
+
+
+if __name__ == "__main__":
+    unittest.main()
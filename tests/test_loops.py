@@ -0,0 +1,174 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree loop tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import ast
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+import halfwaytree.digraph as digraph
+from halfwaytree.validation import validate_source_code_digraph
+from halfwaytree.treefile import get_nodes_in_depth_first_order
+from test_regression import ExplorationTestCase, BranchRecorder, explore, get_branches, get_paths
+
+#the loop runs a constant number of times, so its body is repeated once per iteration
+LOOP_SOURCE_CODE = """
+x = 0
+y = 0
+for i in range(3):
+    if x > i:
+        y = y + 1
+if y == 2:
+    print x
+print
+"""
+
+UNROLLED_LOOP_SOURCE_CODE = """
+x = 0
+y = 0
+if x > 0:
+    y = y + 1
+if x > 1:
+    y = y + 1
+if x > 2:
+    y = y + 1
+if y == 2:
+    print x
+print
+"""
+
+#only steps induction variables, so it is summarized unless summarize_loops is False
+INDUCTION_LOOP_SOURCE_CODE = """
+n = 0
+i = 0
+total = 0
+while i < n:
+    i = i + 1
+    total = total + 3
+if total == 6:
+    print n
+print
+"""
+
+#for loops ending on each way a loop is rewritten: repeated, summarized and unrolled
+FOR_LOOP_SOURCE_CODES = [
+    "x = 0\nfor i in range(3):\n    x = x + 1\nif i == 2:\n    print x\nprint\n",
+    "x = 0\nfor i in range(2, 11, 3):\n    x = x + i\nif i == 8:\n    print x\nprint\n",
+    "n = 0\nx = 0\nfor i in range(1, n, 2):\n    x = x + 1\nif i == 5:\n    print x\nprint\n",
+    "n = 0\nx = 0\nfor i in range(10, n, -2):\n    x = x + 1\nif i == 4:\n    print x\nprint\n",
+    "n = 0\nx = 0\nfor i in range(n):\n    if x > i:\n        x = x + 2\nif i == 2:\n    print x\nprint\n",
+]
+
+#never ends for x < 3, and needs more iterations than are unrolled for x > 7
+ENDLESS_LOOP_SOURCE_CODE = """
+x = 0
+while x != 3:
+    x = x - 1
+print
+"""
+
+
+def run_with_test_case(source_code, test_case):
+    """
+        returns the variables of the source code once it ran on the inputs of the test case
+    """
+    abstract_syntax_tree = BranchRecorder(test_case).visit(ast.parse(source_code))
+    ast.fix_missing_locations(abstract_syntax_tree)
+    variables = {'__branch__': lambda value: value}
+    exec compile(abstract_syntax_tree, "<test case>", "exec") in variables
+    return variables
+
+
+def get_value_on_test_case(value, test_case):
+    """
+        returns the int value of an expression of the node state, on the inputs of the test case
+    """
+    if not z3.is_expr(value):
+        return value
+    substitutions = [(z3.Int(name), z3.IntVal(int(input_value))) for name, input_value in test_case.iteritems()]
+    return z3.simplify(z3.substitute(value, substitutions)).as_long()
+
+
+class LoopTest(ExplorationTestCase):
+
+    def test_a_loop_over_a_constant_range_is_the_same_as_its_unrolled_body(self):
+        loop        = explore(LOOP_SOURCE_CODE)
+        unrolled    = explore(UNROLLED_LOOP_SOURCE_CODE)
+
+        self.assertEqual([get_branches(LOOP_SOURCE_CODE, test_case) for test_case in loop.test_cases],
+                         [get_branches(UNROLLED_LOOP_SOURCE_CODE, test_case) for test_case in unrolled.test_cases])
+        self.assertEqual(validate_source_code_digraph(loop), [])
+
+    def test_a_summarized_loop_takes_the_paths_of_the_unrolled_loop(self):
+        summarized  = explore(INDUCTION_LOOP_SOURCE_CODE)
+        unrolled    = explore(INDUCTION_LOOP_SOURCE_CODE, summarize_loops=False)
+
+        self.assertEqual(summarized.loop_statistics['summarized'], 1)
+        self.assertEqual(unrolled.loop_statistics['summarized'], 0)
+        self.assertEqual(get_paths(INDUCTION_LOOP_SOURCE_CODE, summarized),
+                         get_paths(INDUCTION_LOOP_SOURCE_CODE, unrolled))
+        self.assertEqual(validate_source_code_digraph(summarized), [])
+        self.assertEqual(validate_source_code_digraph(unrolled), [])
+
+    def test_the_loop_variable_ends_on_the_last_value_of_the_range(self):
+        for source_code in FOR_LOOP_SOURCE_CODES:
+            source_code_digraph = explore(source_code)
+            checked_count       = 0
+            for node, parent_position in get_nodes_in_depth_first_order(source_code_digraph.digraph):
+                test_case = None
+                if node.test_case_index is not None:
+                    test_case = source_code_digraph.test_cases[node.test_case_index]
+                if test_case is True:
+                    test_case = {}
+                if not isinstance(test_case, dict):
+                    continue
+
+                try:
+                    variables = run_with_test_case(source_code, test_case)
+                except NameError:
+                    #Python never binds the variable of a range without values, the digraph keeps its start
+                    continue
+                self.assertEqual(get_value_on_test_case(node.state['variables']['i'], test_case),
+                                 variables['i'], "{0}on {1}".format(source_code, test_case))
+                checked_count += 1
+
+            self.assertTrue(checked_count > 0, source_code)
+
+    def test_a_range_without_values_leaves_the_loop_variable_as_it_was(self):
+        source_code = "x = 0\ni = 5\nfor i in range(0):\n    x = x + 1\nif i == 5:\n    print x\nprint\n"
+        source_code_digraph = explore(source_code, symbolic_inputs=["x"])
+        self.assertEqual([get_branches(source_code, test_case) for test_case in source_code_digraph.test_cases],
+                         [[True], False])
+
+    def test_paths_past_the_unroll_bound_are_cut_off(self):
+        source_code_digraph = explore(ENDLESS_LOOP_SOURCE_CODE)
+
+        self.assertEqual(source_code_digraph.cut_off_path_count, 1)
+        self.assertEqual(sorted(int(test_case['x']) for test_case in source_code_digraph.test_cases), range(3, 8))
+        for test_case in source_code_digraph.test_cases:
+            #every test case leaves the loop the way its path does
+            self.assertEqual(run_with_test_case(ENDLESS_LOOP_SOURCE_CODE, test_case)['x'], 3)
+
+    def test_a_function_whose_loop_may_be_cut_off_is_reported(self):
+        source_code = "x = 0\ndef f(a):\n    while a != 1:\n        a = a - 2\n    return a\n" \
+                      "if f(x) == 1:\n    print x\nprint\n"
+        self.assertRaises(digraph.UnsupportedConstruct, explore, source_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
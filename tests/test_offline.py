@@ -0,0 +1,79 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree offline solving tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import unittest
+import shutil
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.offline import QueryDump, OfflineSolver, read_queries, read_results, join_results, main
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+
+class OfflineSolvingTest(ExplorationTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_solving_dumped_queries_offline(self):
+        offline_solver = OfflineSolver(processes=2)
+        for index, source_code in enumerate(source_codes):
+            with QueryDump(os.path.join(self.directory, "queries-{0}.jsonl".format(index))) as query_dump:
+                offline = explore(source_code, query_dump=query_dump)
+            join_results(offline, offline_solver.run(read_queries(query_dump.path)))
+
+            self.assertSameExploration(source_code, offline, explore(source_code))
+
+    def test_test_cases_are_unsolved_until_the_results_are_joined(self):
+        source_code = source_codes[4]
+        baseline    = explore(source_code)
+        with QueryDump(os.path.join(self.directory, "queries"), separate_files=True) as query_dump:
+            offline = explore(source_code, query_dump=query_dump)
+
+        self.assertEqual(offline.test_cases, [None] * len(baseline.test_cases))
+        self.assertEqual(query_dump.statistics['queries'], len(baseline.test_cases))
+        self.assertEqual(len([query for query in read_queries(query_dump.path) if query['smt2']]),
+                         len(baseline.test_cases))
+
+        offline_solver = OfflineSolver(processes=2)
+        self.assertEqual(join_results(offline, offline_solver.run(read_queries(query_dump.path))),
+                         len(baseline.test_cases))
+        self.assertEqual(offline_solver.statistics['unsat'], baseline.test_cases.count(False))
+        self.assertEqual(offline_solver.statistics['sat'] + offline_solver.statistics['unsat'],
+                         len(baseline.test_cases))
+        self.assertSameExploration(source_code, offline, baseline)
+
+    def test_the_command_line_writes_a_result_per_query(self):
+        queries_path    = os.path.join(self.directory, "queries.jsonl")
+        results_path    = os.path.join(self.directory, "results.jsonl")
+        with QueryDump(queries_path) as query_dump:
+            offline = explore(source_codes[2], query_dump=query_dump)
+
+        main([queries_path, "--processes", "1", "--output", results_path])
+        results = read_results(results_path)
+        self.assertEqual(sorted(result['query_id'] for result in results), range(query_dump.statistics['queries']))
+
+        join_results(offline, results)
+        self.assertSameExploration(source_codes[2], offline, explore(source_codes[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree regression tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+"""
+    usage: python -m unittest discover tests
+
+    Explores every sample source code without a visual digraph and compares
+    the result with the one of the original recursive engine
+"""
+
+import unittest
+import ast
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.validation import validate_source_code_digraph
+from test_source_codes import source_codes
+
+
+"""
+    node count of every sample source code, with the branches its test cases take in
+    the order of test_cases. z3 may give other models from one run to the next, the
+    branches they take are the same
+"""
+BASELINE_EXPLORATIONS = [
+    (15, [[True, True], [True, False], [False, True], [False, False]]),
+    (5, [[True], [False]]),
+    (15, [[True, True], [True, False], [False]]),
+    (8, [[True], [False]]),
+    (23, [[True, True, True], False, [True, False, True], [True, False, False], False]),
+    (7, [[True], [False]]),
+    (9, [[True, True], False, [False]]),
+    (6, [[True], [False]]),
+    (10, [[True, True], [True, False], [False]]),
+    (5, [[True], [False]]),
+    (5, [[True], [False]]),
+    (7, [[True, True], [True, False], [False]]),
+    (5, [[True], [False]]),
+    (6, [[True], [False]]),
+    (10, [[True, True], [True, False], [False]]),
+    (6, [[True], [True], [True], [False]]),
+    (3, [[True], [False]]),
+    (6, [[True, True], [True, False], [False]]),
+    (6, [[True, True], [True, False], [False]]),
+    (8, [[True, False], [True, False], [True, False], False, [True, False], [False]]),
+]
+
+FUNCTION_SOURCE_CODE = """
+x = 0
+def f(a):
+    if a > 3:
+        return a + 1
+    return a
+y = 0
+if x > 1:
+    y = 2
+if f(x) == 5:
+    print x
+print
+"""
+
+
+class BranchRecorder(ast.NodeTransformer):
+    """
+        Gives the input variables of a source code the values of a test case,
+        and makes every if-statement record whether its test was true
+    """
+
+    def __init__(self, test_case):
+        """
+            param test_case: dictionary of the values of the input variables, True when any input works
+        """
+        self.test_case = dict(test_case) if test_case is not True else {}
+
+    def visit_Assign(self, node):
+        target = node.targets[0]
+        if isinstance(target, ast.Name) and target.id in self.test_case:
+            #only the first assignment of a variable is its input
+            node.value = ast.Num(int(self.test_case.pop(target.id)))
+        return node
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        node.test = ast.Call(ast.Name('__branch__', ast.Load()), [node.test], [], None, None)
+        return node
+
+    def visit_Print(self, node):
+        return ast.Pass()
+
+    def visit_Assert(self, node):
+        return ast.Pass()
+
+
+def get_branches(source_code, test_case):
+    """
+        param test_case: dictionary, or False for an unsatisfiable path
+        returns the list of the outcomes of the if-statements the test case runs
+                through, or False for an unsatisfiable path
+    """
+    if test_case is False:
+        return False
+
+    abstract_syntax_tree = BranchRecorder(test_case).visit(ast.parse(source_code))
+    ast.fix_missing_locations(abstract_syntax_tree)
+
+    branches = []
+    def record_branch(value):
+        branches.append(bool(value))
+        return value
+
+    exec compile(abstract_syntax_tree, "<test case>", "exec") in {'__branch__': record_branch}
+    return branches
+
+
+def get_paths(source_code, source_code_digraph):
+    """
+        returns the set of the branches of the satisfiable test cases
+    """
+    return set(tuple(branches) for branches in
+               [get_branches(source_code, test_case) for test_case in source_code_digraph.test_cases] if branches)
+
+
+def explore(source_code, **options):
+    source_code_digraph = digraph.SourceCodeDigraph(source_code=source_code, create_visual=False, **options)
+    source_code_digraph.build_code_digraph()
+    return source_code_digraph
+
+
+class ExplorationTestCase(unittest.TestCase):
+
+    def assertSameExploration(self, source_code, explored, baseline, ordered=True, added_nodes=0,
+                              explored_source_code=None):
+        """
+            param explored: the SourceCodeDigraph explored with a feature
+            param baseline: the SourceCodeDigraph explored without it
+            param ordered: boolean, when False test cases may come in another order
+            param added_nodes: int, nodes the feature adds to the baseline
+            param explored_source_code: string, the source code explored, when the feature rewrote it
+        """
+        explored_source_code    = explored_source_code or source_code
+        explored_branches       = [get_branches(explored_source_code, test_case) for test_case in explored.test_cases]
+        baseline_branches       = [get_branches(source_code, test_case) for test_case in baseline.test_cases]
+        if not ordered:
+            explored_branches, baseline_branches = sorted(explored_branches), sorted(baseline_branches)
+
+        self.assertEqual(explored.node_count, baseline.node_count + added_nodes)
+        self.assertEqual(explored_branches, baseline_branches)
+        self.assertEqual(validate_source_code_digraph(explored), [])
+
+
+class RegressionTest(ExplorationTestCase):
+
+    def test_test_cases_are_in_baseline_order(self):
+        """
+            the test case of an if-statement comes after those of its body
+        """
+        for index, source_code in enumerate(source_codes):
+            source_code_digraph = explore(source_code)
+            node_count, branches = BASELINE_EXPLORATIONS[index]
+
+            self.assertEqual(source_code_digraph.node_count, node_count, "source code {0}".format(index))
+            self.assertEqual([get_branches(source_code, test_case) for test_case in source_code_digraph.test_cases],
+                             branches, "source code {0}".format(index))
+
+
+if __name__ == "__main__":
+    unittest.main()
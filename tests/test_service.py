@@ -0,0 +1,85 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree service tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import StringIO
+import unittest
+import json
+import time
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.service import AnalysisService
+from test_regression import explore
+from test_source_codes import source_codes
+
+#two to the power of 20 paths, far more than a test waits for
+ENDLESS_SOURCE_CODE = "".join("x{0} = 0\n".format(index) for index in range(20)) + \
+                      "".join("if x{0} > {0}:\n    print x{0}\n".format(index) for index in range(20)) + "print\n"
+
+
+class AnalysisServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service    = AnalysisService(max_running_jobs=2)
+        self.events     = []
+
+    def get_events(self, job_id):
+        return [event for event in self.events if event['id'] == job_id]
+
+    def test_test_cases_are_streamed_before_the_job_finishes(self):
+        thread = self.service.handle_request({'id': 1, 'method': 'analyze', 'source_code': source_codes[4]},
+                                             self.events.append)
+        thread.join()
+
+        baseline = explore(source_codes[4])
+        self.assertEqual([event['test_case'] for event in self.events[:-1]], baseline.test_cases)
+        self.assertEqual([event['event'] for event in self.events[:-1]], ['test_case'] * len(baseline.test_cases))
+        self.assertEqual((self.events[-1]['event'], self.events[-1]['status'], self.events[-1]['node_count']),
+                         ('finished', 'ok', baseline.node_count))
+
+    def test_a_job_over_its_timeout_is_stopped(self):
+        thread = self.service.handle_request({'id': 1, 'method': 'analyze', 'source_code': ENDLESS_SOURCE_CODE,
+                                              'timeout': 0.5}, self.events.append)
+        thread.join(30)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.events[-1]['status'], 'timeout')
+        self.assertEqual(self.service.jobs, {})
+
+    def test_a_cancelled_job_is_stopped(self):
+        thread = self.service.handle_request({'id': 1, 'method': 'analyze', 'source_code': ENDLESS_SOURCE_CODE},
+                                             self.events.append)
+        time.sleep(0.5)
+        self.service.handle_request({'id': 2, 'method': 'cancel', 'job': 1}, self.events.append)
+        thread.join(30)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.get_events(2), [{'id': 2, 'event': 'cancelled', 'job': 1}])
+        self.assertEqual(self.get_events(1)[-1]['status'], 'cancelled')
+
+    def test_bad_requests_are_answered_with_an_error(self):
+        input_file  = StringIO.StringIO("not json\n" + json.dumps({'id': 1, 'method': 'draw'}) + "\n" +
+                                        json.dumps({'id': 2, 'method': 'cancel', 'job': 5}) + "\n")
+        output_file = StringIO.StringIO()
+        self.service.serve_lines(input_file, output_file)
+
+        events = [json.loads(line) for line in output_file.getvalue().splitlines()]
+        self.assertEqual([(event['id'], event['event']) for event in events],
+                         [(None, 'error'), (1, 'error'), (2, 'error')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree constraint simplifier tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.simplifier import ConstraintSimplifier
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+
+class ConstraintSimplifierTest(ExplorationTestCase):
+
+    def test_simplified_path_conditions_take_the_same_paths(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore(source_code, constraint_simplifier=ConstraintSimplifier()),
+                                       explore(source_code))
+
+    def test_true_and_duplicate_constraints_are_dropped(self):
+        constraint_simplifier   = ConstraintSimplifier()
+        x                       = z3.Int('x')
+
+        constraints = constraint_simplifier.add_constraints([], [x + 0 > 2 * 3, 1 < 2])
+        self.assertEqual([str(constraint) for constraint in constraints], ["Not(x <= 6)"])
+        self.assertEqual(constraint_simplifier.add_constraints(constraints, [x > 6]), constraints)
+        self.assertEqual(constraint_simplifier.add_constraints(constraints, [1 > 2]), constraints + [False])
+        self.assertEqual((constraint_simplifier.statistics['dropped_true'],
+                          constraint_simplifier.statistics['dropped_duplicates']), (1, 1))
+
+    def test_implied_bounds_are_dropped_and_weaker_ones_replaced(self):
+        constraint_simplifier   = ConstraintSimplifier()
+        x                       = z3.Int('x')
+
+        constraints = constraint_simplifier.add_constraints([], [x < 10])
+        #x < 20 follows from x < 10
+        self.assertEqual(constraint_simplifier.add_constraints(constraints, [x < 20]), constraints)
+        #x < 5 makes x < 10 redundant
+        constraints = constraint_simplifier.add_constraints(constraints, [x < 5, x >= 0])
+        self.assertEqual([str(constraint) for constraint in constraints], ["Not(5 <= x)", "x >= 0"])
+        self.assertEqual((constraint_simplifier.statistics['dropped_implied_bounds'],
+                          constraint_simplifier.statistics['replaced_bounds']), (1, 1))
+
+    def test_a_constraint_met_on_many_paths_is_simplified_once(self):
+        constraint_simplifier   = ConstraintSimplifier()
+        x                       = z3.Int('x')
+        constraint              = x + 1 > 3
+
+        constraint_simplifier.add_constraints([], [constraint])
+        constraint_simplifier.add_constraints([x < 0], [constraint])
+        self.assertEqual(constraint_simplifier.statistics['cache_hits'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
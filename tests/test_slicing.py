@@ -0,0 +1,73 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree assert slicing tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import ast
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.slicing import get_assert_slice
+from halfwaytree.frontend import run_front_end
+from halfwaytree.validation import validate_source_code_digraph
+from test_regression import explore
+
+#only x decides whether the assert is reached, the if-statements on y and z do not
+SLICED_SOURCE_CODE = """
+x = 0
+y = 0
+z = 0
+if y > 1:
+    y = 2
+if z > 1:
+    z = 3
+w = x + 1
+if w > 5:
+    assert False
+print
+"""
+
+
+def get_statement_sources(abstract_syntax_tree, statement_ids):
+    return sorted(getattr(statement, 'source', None) or "if " + " and ".join(statement.condition_sources)
+                  for statement in ast.walk(abstract_syntax_tree)
+                  if getattr(statement, 'statement_id', None) in statement_ids)
+
+
+class AssertSliceTest(unittest.TestCase):
+
+    def test_the_slice_holds_the_statements_the_assert_depends_on(self):
+        abstract_syntax_tree = ast.parse(SLICED_SOURCE_CODE)
+        run_front_end(abstract_syntax_tree)
+
+        self.assertEqual(get_statement_sources(abstract_syntax_tree, get_assert_slice(abstract_syntax_tree)),
+                         ["assert False", "if (w > 5)", "w = (x + 1)", "x = 0"])
+
+    def test_forks_outside_the_slice_are_skipped(self):
+        sliced      = explore(SLICED_SOURCE_CODE, slice_on_asserts=True)
+        baseline    = explore(SLICED_SOURCE_CODE)
+
+        self.assertEqual(sliced.slicing_statistics['sliced_if_statements'], 2)
+        #the four paths through the ifs on y and z are one
+        self.assertEqual(len(sliced.test_cases), len(baseline.test_cases) / 4)
+        self.assertTrue(sliced.node_count < baseline.node_count)
+        self.assertEqual(validate_source_code_digraph(sliced), [])
+
+        #the assert is still reached, on the inputs which reach it without slicing
+        self.assertEqual([int(test_case['x']) > 4 for test_case in sliced.test_cases], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree solver backend tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import multiprocessing
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.solvers import Z3Backend, BitVectorBackend, PortfolioBackend, get_solver_backend
+from halfwaytree.conflicts import UnsatCoreLearner
+from test_regression import ExplorationTestCase, explore
+from test_source_codes import source_codes
+
+#only looks for solutions among bit-vectors, so it never proves a path condition unsatisfiable
+BOUNDED_PORTFOLIO = [{'name': 'bit-vector', 'tactic': ['simplify', 'nla2bv', 'smt'], 'bounded': True}]
+
+
+class SolverBackendTest(ExplorationTestCase):
+
+    def test_portfolio_solver_backend(self):
+        solver_backend = get_solver_backend("portfolio")
+        try:
+            for source_code in source_codes:
+                self.assertSameExploration(source_code, explore(source_code, solver_backend=solver_backend),
+                                           explore(source_code))
+        finally:
+            solver_backend.close()
+
+    def test_a_portfolio_made_by_a_digraph_is_closed_after_the_exploration(self):
+        process_count = len(multiprocessing.active_children())
+        for source_code in source_codes[:5]:
+            source_code_digraph = explore(source_code, solver_backend="portfolio")
+            self.assertEqual(source_code_digraph.node_count, explore(source_code).node_count)
+        self.assertEqual(len(multiprocessing.active_children()), process_count)
+
+    def test_a_check_the_solver_gives_up_on_is_unknown(self):
+        #the skip tactic decides nothing but trivial constraints
+        solver_backend  = Z3Backend(tactic="skip")
+        x               = z3.Int('x')
+
+        self.assertEqual(solver_backend.check([x > 1, x < 0]), (None, None))
+        self.assertEqual(solver_backend.statistics, {'checks': 1, 'unknown': 1})
+
+    def test_unknown_paths_are_left_unsolved(self):
+        solver_backend      = Z3Backend(tactic="skip")
+        unsat_core_learner  = UnsatCoreLearner()
+        source_code_digraph = explore(source_codes[1], solver_backend=solver_backend,
+                                      unsat_core_learner=unsat_core_learner)
+
+        self.assertEqual(source_code_digraph.test_cases, [None, None])
+        self.assertTrue(solver_backend.statistics['unknown'] > 0)
+        self.assertEqual(unsat_core_learner.statistics['learned_cores'], 0)
+
+    def test_an_undecided_race_is_unknown(self):
+        solver_backend = PortfolioBackend(configurations=BOUNDED_PORTFOLIO)
+        try:
+            source_code_digraph = explore(source_codes[4], solver_backend=solver_backend)
+        finally:
+            solver_backend.close()
+
+        #the unsatisfiable paths of the integer encoding
+        baseline = explore(source_codes[4])
+        self.assertEqual([test_case is None for test_case in source_code_digraph.test_cases],
+                         [test_case is False for test_case in baseline.test_cases])
+        #inner nodes on those paths are unknown as well
+        self.assertTrue(solver_backend.statistics['unknown'] >= baseline.test_cases.count(False))
+
+    def test_the_bit_vector_encoding_forbids_overflows_by_default(self):
+        for source_code in source_codes:
+            self.assertSameExploration(source_code, explore(source_code, solver_backend=BitVectorBackend()),
+                                       explore(source_code))
+
+    def test_wrapping_overflows_is_opted_into(self):
+        forbid  = BitVectorBackend(width=8)
+        wrap    = BitVectorBackend(width=8, overflow="wrap")
+        x       = forbid.make_integer('x')
+
+        #only true when x + 1 wraps around
+        self.assertEqual(forbid.check([x + 1 < x]), (False, None))
+        isfeasible, z3_solutions = wrap.check([x + 1 < x])
+        self.assertTrue(isfeasible)
+        self.assertEqual(wrap.format_value(z3_solutions[x]), "127")
+        self.assertRaises(ValueError, BitVectorBackend, overflow="saturate")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree tracing tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import halfwaytree.digraph as digraph
+from halfwaytree.tracing import Tracer
+from test_regression import explore
+from test_source_codes import source_codes
+
+
+class FakeClock:
+    """
+        a clock which moves one second every time it is read
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 1.0
+        return self.time
+
+
+class TracerTest(unittest.TestCase):
+
+    def test_child_spans_are_not_counted_in_their_parent(self):
+        tracer = Tracer(clock=FakeClock())
+        tracer.begin("explore", "subtree")
+        tracer.begin("check", "solver", {'constraints': 2})
+        tracer.end({'result': 'sat'})
+        tracer.end()
+
+        self.assertEqual(tracer.events, [("check", "solver", {'constraints': 2, 'result': 'sat'}, 3.0, 1.0, 1),
+                                         ("explore", "subtree", None, 2.0, 3.0, 0)])
+        self.assertEqual(tracer.get_collapsed_stacks(), ["explore 2000000", "explore;check 1000000"])
+        self.assertEqual(tracer.statistics, {'spans': 2, 'seconds_by_category': {'subtree': 2.0, 'solver': 1.0}})
+
+    def test_the_chrome_trace_puts_parents_before_their_children(self):
+        tracer = Tracer(clock=FakeClock())
+        tracer.begin("explore", "subtree")
+        tracer.begin("check", "solver")
+        tracer.end()
+        tracer.end()
+
+        trace_events = tracer.get_chrome_trace()['traceEvents']
+        self.assertEqual([(trace_event['name'], trace_event['ts'], trace_event['dur'])
+                          for trace_event in trace_events], [("explore", 1000000, 3000000), ("check", 2000000, 1000000)])
+
+    def test_an_exploration_traces_its_solver_checks(self):
+        tracer = Tracer()
+        explore(source_codes[4], tracer=tracer)
+
+        self.assertEqual(tracer.stack, [])
+        self.assertTrue(tracer.events)
+        self.assertTrue('solver' in tracer.statistics['seconds_by_category'])
+        self.assertTrue(all(depth > 0 for name, category, args, start_time, duration, depth in tracer.events
+                            if category == 'solver'))
+
+    def test_tracer_spans_end_when_the_budget_is_exceeded(self):
+        tracer = Tracer()
+        source_code_digraph = digraph.SourceCodeDigraph(source_code=source_codes[4], create_visual=False,
+                                                        tracer=tracer, max_node_count=5)
+        self.assertRaises(digraph.ExplorationBudgetExceeded, source_code_digraph.build_code_digraph)
+        self.assertEqual(tracer.stack, [])
+        self.assertTrue(any(args == {'unfinished': True}
+                            for name, category, args, start_time, duration, depth in tracer.events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree tree file tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import unittest
+import shutil
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from halfwaytree.treefile import write_tree_file, TreeFileReader, get_nodes_in_depth_first_order, encode_text
+from test_regression import explore
+from test_source_codes import source_codes
+
+ASSERT_SOURCE_CODE = "x = 0\nif x > 2:\n    assert False\nif x < -2:\n    assert False\nprint\n"
+
+
+class TreeFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory  = tempfile.mkdtemp()
+        self.path       = os.path.join(self.directory, "exploration.hwt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_every_node_reads_back_as_it_was_written(self):
+        for source_code in source_codes:
+            source_code_digraph = explore(source_code)
+            write_tree_file(source_code_digraph, self.path)
+            nodes = get_nodes_in_depth_first_order(source_code_digraph.digraph)
+
+            with TreeFileReader(self.path) as reader:
+                self.assertEqual(reader.node_count, len(nodes))
+                for node_id, (node, parent_position) in enumerate(nodes):
+                    self.assertEqual(reader.get_type(node_id), node.type)
+                    self.assertEqual(reader.get_label(node_id), encode_text(node.statement))
+                    self.assertEqual(reader.get_parent(node_id), parent_position if node_id > 0 else None)
+
+                    test_case = None
+                    if node.test_case_index is not None:
+                        test_case = source_code_digraph.test_cases[node.test_case_index]
+                    self.assertEqual(reader.get_test_case(node_id), test_case)
+
+    def test_queries_on_the_error_nodes(self):
+        source_code_digraph = explore(ASSERT_SOURCE_CODE)
+        write_tree_file(source_code_digraph, self.path)
+        nodes = get_nodes_in_depth_first_order(source_code_digraph.digraph)
+
+        with TreeFileReader(self.path) as reader:
+            error_nodes = reader.get_error_nodes()
+            self.assertEqual(len(error_nodes), 2)
+            self.assertEqual(error_nodes, [node_id for node_id, (node, parent_position) in enumerate(nodes)
+                                           if node.type == "Assert"])
+            for node_id in error_nodes:
+                path = reader.get_path_to_node(node_id)
+                self.assertEqual((path[0], path[-1]), (0, node_id))
+                self.assertTrue(all(reader.get_parent(child) == parent for parent, child in zip(path, path[1:])))
+
+            self.assertEqual(reader.get_nodes_of_type("While"), [])
+            self.assertRaises(IndexError, reader.get_type, reader.node_count)
+
+    def test_other_files_are_refused(self):
+        with open(self.path, 'wb') as other_file:
+            other_file.write("x" * 200)
+        self.assertRaises(ValueError, TreeFileReader, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
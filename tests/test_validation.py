@@ -0,0 +1,76 @@
+#-------------------------------------------------------------------------------
+# Name:         Halfwaytree test case validator tests
+# Purpose:      Symbolic execution for Python applications
+#
+# Author:       HDizzle
+# url:          https://github.com/sudouser2010/halfwaytree
+# Created:      06/Sept/2014
+# Copyright:    (c) HDizzle 2014
+# License:      MIT
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import tempfile
+import unittest
+import shutil
+import sys
+import os
+
+#add the directory above so code can load modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import z3
+
+from halfwaytree.validation import TestCaseValidator, validate_source_code_digraph
+from halfwaytree.solvers import BitVectorBackend
+from halfwaytree.offline import QueryDump
+from test_regression import explore
+from test_source_codes import source_codes
+
+
+class TestCaseValidatorTest(unittest.TestCase):
+
+    def test_the_test_cases_of_every_sample_source_code_are_valid(self):
+        for source_code in source_codes:
+            self.assertEqual(validate_source_code_digraph(explore(source_code)), [])
+
+    def test_division_floors_as_in_python(self):
+        x = z3.Int('x')
+        #z3 div is euclidean, 7 div -2 is -3 while python gives -4
+        validator = TestCaseValidator([{'x': '7'}, {'x': '7'}], [[x / -2 == -3], [x / -2 == -4]])
+
+        mismatches = validator.validate()
+        self.assertEqual([mismatch['test_case_index'] for mismatch in mismatches], [0])
+
+    def test_a_division_by_zero_fails_the_path(self):
+        x = z3.Int('x')
+        validator = TestCaseValidator([{'x': '0'}, {'x': '5'}], [[5 / x == 0], [5 / x == 1]])
+        self.assertEqual([mismatch['test_case_index'] for mismatch in validator.validate()], [0])
+
+    def test_a_test_case_relying_on_a_wrapped_overflow_is_reported(self):
+        source_code         = "x = 0\nif x + 1 < x:\n    print x\nprint\n"
+        source_code_digraph = explore(source_code, solver_backend=BitVectorBackend(width=8, overflow="wrap"))
+
+        #127 + 1 wraps around to -128 in 8 bits, python gives 128
+        self.assertEqual(source_code_digraph.test_cases[0], {'x': '127'})
+        self.assertEqual([mismatch['test_case_index'] for mismatch in
+                          validate_source_code_digraph(source_code_digraph)], [0])
+        self.assertEqual(validate_source_code_digraph(explore(source_code, solver_backend=BitVectorBackend())), [])
+
+    def test_unsolved_test_cases_are_not_replayed(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with QueryDump(os.path.join(directory, "queries.jsonl")) as query_dump:
+                source_code_digraph = explore(source_codes[1], query_dump=query_dump)
+        finally:
+            shutil.rmtree(directory)
+
+        validator = TestCaseValidator(source_code_digraph.test_cases, source_code_digraph.path_conditions)
+        self.assertEqual(validator.validate(), [])
+        self.assertEqual(validator.unsolved_rows, range(len(source_code_digraph.test_cases)))
+        self.assertEqual(validator.report().splitlines()[0], "replayed 0 test cases, 0 mismatches, 2 unsolved")
+
+
+if __name__ == "__main__":
+    unittest.main()